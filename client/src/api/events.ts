@@ -51,6 +51,22 @@ export const getEventOccurrences = async (id: number, count: number = 10) => {
   return res.data;
 };
 
+export const getCalendarOccurrences = async (start: string, end: string) => {
+  const res = await axios.get(`${API_BASE}/events/calendar/`, {
+    params: { start, end },
+    headers: createAuthHeaders(),
+  });
+  return res.data;
+};
+
+export const getUpcomingOccurrences = async (limit = 10) => {
+  const res = await axios.get(`${API_BASE}/events/upcoming/`, {
+    params: { limit },
+    headers: createAuthHeaders(),
+  });
+  return res.data;
+};
+
 export const deleteOccurrence = async (eventId: number, startTime: string) => {
   const res = await axios.post(`${API_BASE}/events/${eventId}/occurrences/delete/`, { start_time: startTime }, { headers: createAuthHeaders() });
   return res.data;
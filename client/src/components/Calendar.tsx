@@ -3,7 +3,7 @@ import FullCalendar from '@fullcalendar/react';
 import dayGridPlugin from '@fullcalendar/daygrid';
 import timeGridPlugin from '@fullcalendar/timegrid';
 import interactionPlugin from '@fullcalendar/interaction';
-import type { EventClickArg, EventDropArg } from '@fullcalendar/core';
+import type { DatesSetArg, EventClickArg, EventDropArg } from '@fullcalendar/core';
 import './calendar.css';
 
 /**
@@ -16,6 +16,8 @@ interface CalendarProps {
   onEventClick?: (arg: EventClickArg) => void;
   /** Callback triggered when an event is dragged and dropped */
   onEventDrop?: (arg: EventDropArg) => void;
+  /** Callback triggered when the visible date range changes */
+  onDatesSet?: (arg: DatesSetArg) => void;
   /** Height of the calendar (defaults to 'auto') */
   height?: string | number;
 }
@@ -29,6 +31,7 @@ const Calendar: React.FC<CalendarProps> = ({
   events = [],
   onEventClick,
   onEventDrop,
+  onDatesSet,
   height = 'auto',
 }) => {
   return (
@@ -41,6 +44,7 @@ const Calendar: React.FC<CalendarProps> = ({
       height={height}
       eventClick={onEventClick}
       eventDrop={onEventDrop}
+      datesSet={onDatesSet}
     />
   );
 };
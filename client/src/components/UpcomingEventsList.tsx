@@ -1,19 +1,22 @@
 import React, { useEffect, useState } from 'react';
-import { getEvents, deleteEvent } from '../api/events';
+import { getUpcomingOccurrences, deleteEvent } from '../api/events';
 import { List, ListItem, ListItemText, Typography, Box, CircularProgress, Alert, IconButton, Snackbar } from '@mui/material';
 import DeleteIcon from '@mui/icons-material/Delete';
 import { useAuth } from '../context/AuthContext';
 
 /**
- * Represents an event in the upcoming events list.
+ * Represents an occurrence in the upcoming events list, as returned by the upcoming endpoint.
  */
 interface Event {
   id: number;
   title: string;
-  start_time: string;
-  end_time: string;
+  start: string;
+  end: string;
+  is_recurring_instance: boolean;
 }
 
+const UPCOMING_LIMIT = 20;
+
 /**
  * UpcomingEventsList component for displaying and managing upcoming events.
  * Displays a list of upcoming events (US-07) with the ability to delete events (US-09).
@@ -39,19 +42,13 @@ const UpcomingEventsList: React.FC = () => {
   }, [isAuthenticated, authLoading]);
 
   /**
-   * Fetches events from the API and filters for upcoming events.
-   * Sorts events by start time to ensure chronological order (US-07).
+   * Fetches the next occurrences that have not ended yet, in chronological order (US-07).
+   * The server merges one-off events with the expanded recurring series.
    */
   const fetchEvents = async () => {
     try {
       setLoading(true);
-      const fetchedEvents = await getEvents();
-      // Filter events to show only upcoming ones and sort by start time
-      const now = new Date();
-      const upcoming = fetchedEvents
-        .filter((event: Event) => new Date(event.end_time) >= now)
-        .sort((a: Event, b: Event) => new Date(a.start_time).getTime() - new Date(b.start_time).getTime());
-      setEvents(upcoming);
+      setEvents(await getUpcomingOccurrences(UPCOMING_LIMIT));
     } catch (err: any) {
       // Skip error handling for 401 errors if the user is already unauthenticated
       if (!(err.response && err.response.status === 401 && !isAuthenticated)) {
@@ -70,6 +67,7 @@ const UpcomingEventsList: React.FC = () => {
   const handleDelete = async (eventId: number) => {
     try {
       await deleteEvent(eventId);
+      // Deleting a series removes all of its listed occurrences
       setEvents(events.filter((event) => event.id !== eventId));
       setSnackbarMessage('Event deleted successfully!');
       setSnackbarSeverity('success');
@@ -109,7 +107,7 @@ const UpcomingEventsList: React.FC = () => {
         <List>
           {events.map((event) => (
             <ListItem
-              key={event.id}
+              key={`${event.id}-${event.start}`}
               secondaryAction={
                 <IconButton edge="end" aria-label="delete" onClick={() => handleDelete(event.id)}>
                   <DeleteIcon />
@@ -118,7 +116,7 @@ const UpcomingEventsList: React.FC = () => {
             >
               <ListItemText
                 primary={event.title}
-                secondary={new Date(event.start_time).toLocaleString()}
+                secondary={new Date(event.start).toLocaleString()}
               />
             </ListItem>
           ))}
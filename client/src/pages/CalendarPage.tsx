@@ -1,10 +1,10 @@
 import React, { useEffect, useState } from 'react';
 import Calendar from '../components/Calendar';
 import EventForm, { type EventFormValues } from '../components/EventForm';
-import { getEvents, getEventOccurrences, getEvent, updateEvent, deleteEvent, deleteOccurrence, createEvent } from '../api/events';
+import { getCalendarOccurrences, getEvent, updateEvent, deleteEvent, deleteOccurrence, createEvent } from '../api/events';
 import { Box, Typography, CircularProgress, Alert, Modal, Backdrop, Fade, Button, Dialog, DialogActions, DialogContent, DialogContentText, DialogTitle } from '@mui/material';
 import AddIcon from '@mui/icons-material/Add';
-import type { EventClickArg, EventDropArg } from '@fullcalendar/core';
+import type { DatesSetArg, EventClickArg, EventDropArg } from '@fullcalendar/core';
 import { useAuth } from '../context/AuthContext';
 
 /**
@@ -39,61 +39,40 @@ const CalendarPage: React.FC = () => {
   const [editingEvent, setEditingEvent] = useState<EventFormValues | null>(null);
   const [deleteConfirmOpen, setDeleteConfirmOpen] = useState(false);
   const [eventToDelete, setEventToDelete] = useState<{ id: number; isRecurringInstance?: boolean; start?: string } | null>(null);
+  const [visibleRange, setVisibleRange] = useState<{ start: string; end: string } | null>(null);
 
   const { isAuthenticated, loading: authLoading } = useAuth();
 
   useEffect(() => {
     if (isAuthenticated && !authLoading) {
-      fetchEvents();
+      if (visibleRange) {
+        fetchEvents();
+      }
     } else if (!authLoading && !isAuthenticated) {
       setLoading(false);
       setEvents([]);
       setError('Please log in to view events.');
     }
-  }, [isAuthenticated, authLoading]);
+  }, [isAuthenticated, authLoading, visibleRange]);
 
   /**
-   * Fetches events and expands recurring events into occurrences for display (US-06).
-   * Handles both one-off and recurring events by calling the appropriate API endpoints.
+   * Fetches every occurrence in the visible date range with a single request (US-06).
+   * The server expands one-off and recurring events together, excluding deleted instances.
    */
   const fetchEvents = async () => {
+    if (!visibleRange) return;
     try {
       setLoading(true);
-      const fetchedEvents = await getEvents();
-      const allCalendarEvents: any[] = [];
-
-      for (const event of fetchedEvents) {
-        if (event.recurrence_rule) {
-          try {
-            const occurrences = await getEventOccurrences(event.id, 50);
-            occurrences.forEach((occurrence: any) => {
-              allCalendarEvents.push({
-                id: event.id,
-                title: event.title,
-                start: occurrence.start,
-                end: occurrence.end,
-                isRecurringInstance: occurrence.is_recurring_instance,
-              });
-            });
-          } catch (occurrenceError) {
-            // Fallback to base event if occurrences cannot be fetched
-            allCalendarEvents.push({
-              id: event.id,
-              title: event.title,
-              start: event.start_time,
-              end: event.end_time,
-            });
-          }
-        } else {
-          allCalendarEvents.push({
-            id: event.id,
-            title: event.title,
-            start: event.start_time,
-            end: event.end_time,
-          });
-        }
-      }
-      setEvents(allCalendarEvents);
+      const occurrences = await getCalendarOccurrences(visibleRange.start, visibleRange.end);
+      setEvents(
+        occurrences.map((occurrence: any) => ({
+          id: occurrence.id,
+          title: occurrence.title,
+          start: occurrence.start,
+          end: occurrence.end,
+          isRecurringInstance: occurrence.is_recurring_instance,
+        }))
+      );
     } catch (err: any) {
       if (!(err.response && err.response.status === 401 && !isAuthenticated)) {
         setError(err.message || 'Failed to fetch events');
@@ -103,6 +82,18 @@ const CalendarPage: React.FC = () => {
     }
   };
 
+  /**
+   * Tracks the calendar's visible date range so only that window is fetched.
+   * @param arg - Dates set argument from FullCalendar.
+   */
+  const handleDatesSet = (arg: DatesSetArg) => {
+    const start = arg.start.toISOString();
+    const end = arg.end.toISOString();
+    setVisibleRange((current) =>
+      current && current.start === start && current.end === end ? current : { start, end }
+    );
+  };
+
   /**
    * Handles event clicks to either open the edit modal or prompt for deletion.
    * For recurring instances, prompts for deletion (US-09); otherwise, opens edit form (US-08).
@@ -273,7 +264,7 @@ const CalendarPage: React.FC = () => {
     }
   };
 
-  if (loading || authLoading) {
+  if (authLoading) {
     return <CircularProgress />;
   }
 
@@ -318,6 +309,8 @@ const CalendarPage: React.FC = () => {
         Create New Event
       </Button>
 
+      {loading && <CircularProgress size={24} sx={{ mb: 2 }} />}
+
       {error && (
         <Alert severity="error" sx={{ mb: 2, width: '100%' }}>
           {error}
@@ -347,6 +340,7 @@ const CalendarPage: React.FC = () => {
           events={events}
           onEventClick={handleEventClick}
           onEventDrop={handleEventDrop}
+          onDatesSet={handleDatesSet}
           height="auto"
         />
       </Box>
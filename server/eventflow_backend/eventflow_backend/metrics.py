@@ -0,0 +1,197 @@
+import hmac
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+# Per-request performance instrumentation.
+# MetricsMiddleware opens a RequestMetrics for each request in a context variable; the ORM
+# execute wrapper, the recurrence expansion entry points and the JSON renderer add to it.
+# Totals go out as a Server-Timing header and into in-process histograms served at /metrics
+# in the Prometheus text format. Outside a request (management commands, tests calling
+# functions directly) every hook is a context-variable lookup and nothing else.
+
+current_metrics = ContextVar('eventflow_request_metrics', default=None)
+
+class RequestMetrics:
+    """Running totals for one request; durations are in seconds."""
+    __slots__ = ('started', 'queries', 'db_seconds', 'expansion_seconds', 'occurrences', 'render_seconds', 'expanding')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.expansion_seconds = 0.0
+        self.occurrences = 0
+        self.render_seconds = 0.0
+        self.expanding = False
+
+    def server_timing(self, total_seconds):
+        """Formats the totals as a Server-Timing header value, durations in milliseconds."""
+        return ', '.join((
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"',
+            f'expand;dur={self.expansion_seconds * 1000:.2f};desc="{self.occurrences} occurrences"',
+            f'render;dur={self.render_seconds * 1000:.2f}',
+            f'total;dur={total_seconds * 1000:.2f}',
+        ))
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the queries run for the current request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_seconds += perf_counter() - started
+
+def install_query_recorder(connection):
+    """Adds record_query to a connection's execute wrappers, once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@receiver(connection_created)
+def install_query_recorder_on_connect(sender, connection, **kwargs):
+    """Instruments every new database connection, whichever thread opens it."""
+    install_query_recorder(connection)
+
+def timed_expansion(count=len):
+    """
+    Decorates a recurrence expansion entry point to record its time and the occurrences it returns.
+    Queries the function runs while it expands are left to the database time, and nested
+    entry points are only counted once, by the outermost.
+    :param count: callable returning the number of occurrences in the function's result
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = current_metrics.get()
+            if metrics is None or metrics.expanding:
+                return fn(*args, **kwargs)
+            metrics.expanding = True
+            db_before = metrics.db_seconds
+            started = perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                metrics.expanding = False
+                metrics.expansion_seconds += perf_counter() - started - (metrics.db_seconds - db_before)
+            metrics.occurrences += count(result)
+            return result
+        return wrapper
+    return decorator
+
+def timed_render(render):
+    """Decorates a renderer's render method to record the time spent rendering the response body."""
+    @wraps(render)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return render(*args, **kwargs)
+        started = perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            metrics.render_seconds += perf_counter() - started
+    return wrapper
+
+class Histogram:
+    """
+    Thread-safe Prometheus histogram with fixed upper bounds, one series per label value tuple.
+    Bucket counts are kept per bucket and made cumulative when exposed.
+    """
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, labels=()):
+        """Records one observation for a tuple of label values."""
+        # Bounds are inclusive (le), so the first bound not below the value takes it
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def expose(self):
+        """Returns the histogram in the Prometheus text exposition format, as a list of lines."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip((*map(format_bound, self.buckets), '+Inf'), counts):
+                cumulative += bucket_count
+                bucket_labels = ','.join([*pairs, 'le="%s"' % bound])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            label_text = f'{{{",".join(pairs)}}}' if pairs else ''
+            lines.append(f'{self.name}_sum{label_text} {total!r}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+    def clear(self):
+        """Drops every recorded series."""
+        with self._lock:
+            self._series.clear()
+
+def escape_label(value):
+    """Escapes a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_bound(bound):
+    """Formats a bucket bound the way Prometheus clients do (1.0, 0.005, 100.0)."""
+    return repr(float(bound))
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_DURATION = Histogram('eventflow_request_duration_seconds', 'Time to produce a response, by view.', DURATION_BUCKETS, ('view', 'method'))
+DB_QUERIES = Histogram('eventflow_request_db_queries', 'Database queries run per request, by view.', (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000), ('view',))
+DB_DURATION = Histogram('eventflow_request_db_duration_seconds', 'Time spent in database queries per request, by view.', DURATION_BUCKETS, ('view',))
+EXPANSION_DURATION = Histogram('eventflow_request_expansion_duration_seconds', 'Time spent expanding recurrence rules per request, by view.', DURATION_BUCKETS, ('view',))
+OCCURRENCES = Histogram('eventflow_request_occurrences', 'Occurrences generated by recurrence expansion per request, by view.', (0, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000), ('view',))
+RENDER_DURATION = Histogram('eventflow_request_render_duration_seconds', 'Time spent rendering response bodies per request, by view.', DURATION_BUCKETS, ('view',))
+
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, EXPANSION_DURATION, OCCURRENCES, RENDER_DURATION)
+
+# Anything else is reported as OTHER, so arbitrary methods cannot grow the label set
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+def observe_request(view, method, metrics, total_seconds):
+    """Adds one finished request's totals to the histograms."""
+    labels = (view,)
+    method = method if method in HTTP_METHODS else 'OTHER'
+    REQUEST_DURATION.observe(total_seconds, (view, method))
+    DB_QUERIES.observe(metrics.queries, labels)
+    DB_DURATION.observe(metrics.db_seconds, labels)
+    EXPANSION_DURATION.observe(metrics.expansion_seconds, labels)
+    OCCURRENCES.observe(metrics.occurrences, labels)
+    RENDER_DURATION.observe(metrics.render_seconds, labels)
+
+def metrics_view(request):
+    """
+    Serves this process's histograms in the Prometheus text format.
+    When EVENTFLOW_METRICS_TOKEN is set, scrapers must send it as a bearer token; otherwise
+    only staff signed in through the admin can read it.
+    """
+    token = getattr(settings, 'EVENTFLOW_METRICS_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    if not token and not getattr(getattr(request, 'user', None), 'is_staff', False):
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    lines = [line for histogram in HISTOGRAMS for line in histogram.expose()]
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
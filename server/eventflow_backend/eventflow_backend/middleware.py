@@ -0,0 +1,98 @@
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.middleware import clickjacking, csrf
+from .metrics import RequestMetrics, current_metrics, install_query_recorder, observe_request
+
+# Browser-only middleware that steps aside for the JWT-authenticated API.
+# Sessions, CSRF tokens, flash messages and frame options only serve the admin and other
+# pages rendered for a browser; API clients send a bearer token and get JSON back, so these
+# subclasses pass requests under API_PATH_PREFIX straight to the next handler. They stay
+# subclasses of Django's classes, so the admin's middleware checks still recognize them.
+
+def is_api_request(request):
+    """Returns whether a request targets the stateless API rather than a browser page."""
+    return request.path_info.startswith(getattr(settings, 'API_PATH_PREFIX', '/api/'))
+
+class WebOnlyMiddlewareMixin:
+    """Skips a MiddlewareMixin-based middleware for API requests, in sync and async mode alike."""
+
+    def __call__(self, request):
+        if is_api_request(request):
+            # A coroutine in async mode, which the handler awaits like the middleware's own
+            return self.get_response(request)
+        return super().__call__(request)
+
+class SessionMiddleware(WebOnlyMiddlewareMixin, sessions.SessionMiddleware):
+    """SessionMiddleware that neither loads nor saves sessions for API requests."""
+
+class CsrfViewMiddleware(WebOnlyMiddlewareMixin, csrf.CsrfViewMiddleware):
+    """CsrfViewMiddleware that leaves API requests, which carry no cookies to forge, unchecked."""
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # Django calls process_view from its own handler, so it has to be skipped separately
+        if is_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+class AuthenticationMiddleware(WebOnlyMiddlewareMixin, auth.AuthenticationMiddleware):
+    """AuthenticationMiddleware for browser pages; API views authenticate the bearer token themselves."""
+
+class MessageMiddleware(WebOnlyMiddlewareMixin, messages.MessageMiddleware):
+    """MessageMiddleware that sets up no message storage for API requests."""
+
+class XFrameOptionsMiddleware(WebOnlyMiddlewareMixin, clickjacking.XFrameOptionsMiddleware):
+    """XFrameOptionsMiddleware for browser pages; JSON responses are never framed."""
+
+class MetricsMiddleware:
+    """
+    Records each request's query count, database time, recurrence expansion time, occurrences
+    generated and render time. The totals are sent back in a Server-Timing header and added
+    to the /metrics histograms, labelled by view name. Disable with EVENTFLOW_METRICS=False.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'EVENTFLOW_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        # Connections opened before the metrics module was loaded missed the connection_created hook
+        install_query_recorder(connections[DEFAULT_DB_ALIAS])
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        # Database calls run in sync_to_async threads, which copy this context
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        """Adds the Server-Timing header and records the request in the histograms."""
+        total_seconds = perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing(total_seconds)
+        view = request.resolver_match.view_name if request.resolver_match else 'unmatched'
+        observe_request(view, request.method, metrics, total_seconds)
+        return response
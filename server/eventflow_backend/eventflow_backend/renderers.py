@@ -0,0 +1,47 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from .metrics import timed_render
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer that encodes with orjson when it is installed, falling back to DRF's stdlib encoder.
+    Output is byte-for-byte what JSONRenderer produces for compact, UTF-8 responses: values orjson
+    would format differently (datetimes, decimals, lazy strings) go through DRF's JSONEncoder, and
+    U+2028/U+2029 are escaped the same way. Indented output always uses the stdlib path.
+    """
+
+    @timed_render
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Match JSONRenderer, which escapes these for JavaScript compatibility
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+class ICalendarRenderer(BaseRenderer):
+    """
+    Renderer that lets clients negotiate text/calendar for the iCalendar export.
+    Calendars are streamed by the view itself, so only error responses are rendered here, as plain text.
+    """
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return b'' if data is None else str(data).encode(self.charset)
@@ -51,17 +51,26 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
 ]
 
+# Session, CSRF, auth, messages and clickjacking middleware only run for browser pages (the admin);
+# requests under API_PATH_PREFIX authenticate with JWT and skip them
 MIDDLEWARE = [
+    'eventflow_backend.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'eventflow_backend.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'eventflow_backend.middleware.CsrfViewMiddleware',
+    'eventflow_backend.middleware.AuthenticationMiddleware',
+    'eventflow_backend.middleware.MessageMiddleware',
+    'eventflow_backend.middleware.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 ]
 
+API_PATH_PREFIX = '/api/'
+
+# The deploy checks look for Django's CSRF and clickjacking middleware by dotted path; the
+# subclasses above provide both for every non-API page
+SILENCED_SYSTEM_CHECKS = ['security.W002', 'security.W003']
+
 ROOT_URLCONF = 'eventflow_backend.urls'
 
 TEMPLATES = [
@@ -94,9 +103,35 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', os.environ.get('POSTGRES_PASSWORD', 'admin1234')),
         'HOST': os.environ.get('DB_HOST', os.environ.get('POSTGRES_HOST', 'db')),
         'PORT': os.environ.get('DB_PORT', os.environ.get('POSTGRES_PORT', '5432')),
+        # Keep each worker's connection open between requests (seconds; 0 reconnects per request),
+        # checking it is still alive before reuse instead of failing the next request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DB_POOL=True swaps persistent connections for a psycopg 3 connection pool per worker process.
+# gunicorn.conf.py sizes DB_POOL_MAX_SIZE to the worker class; workers x max size must stay
+# below the server's max_connections. Requests wait up to DB_POOL_TIMEOUT seconds for a connection.
+# DB_ENGINE=sqlite runs on a local SQLite file instead (DB_NAME, default db.sqlite3 next to manage.py),
+# e.g. to seed and benchmark without a PostgreSQL server
+if os.environ.get('DB_ENGINE', 'postgresql') in ('sqlite', 'sqlite3'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+    }
+elif os.environ.get('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -145,7 +180,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
+    ],
+    # Uses orjson when installed, with the stdlib encoder as fallback
+    'DEFAULT_RENDERER_CLASSES': [
+        'eventflow_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
@@ -157,5 +197,58 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False,
 }
 
+# Seconds each worker may reuse the user a JWT resolves to instead of querying it per request
+# (0 disables); saving or deleting a user drops it at once in the worker that made the change
+EVENTFLOW_AUTH_USER_CACHE_SECONDS = int(os.environ.get('EVENTFLOW_AUTH_USER_CACHE_SECONDS', '0'))
+EVENTFLOW_AUTH_USER_CACHE_SIZE = int(os.environ.get('EVENTFLOW_AUTH_USER_CACHE_SIZE', '10000'))
+
+# Per-request query, expansion and render timings, sent as Server-Timing and aggregated at /metrics.
+# Histograms are per worker process; set EVENTFLOW_METRICS_TOKEN to require it as a bearer token,
+# otherwise /metrics is only served to staff signed in through the admin
+EVENTFLOW_METRICS = os.environ.get('EVENTFLOW_METRICS', 'True') == 'True'
+EVENTFLOW_METRICS_TOKEN = os.environ.get('EVENTFLOW_METRICS_TOKEN') or None
+
+# Limits on .ics uploads to /api/events/import/, which are imported within the request and so
+# must finish inside the worker timeout; the import_ics command is not limited
+EVENTFLOW_ICS_MAX_UPLOAD_BYTES = int(os.environ.get('EVENTFLOW_ICS_MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+EVENTFLOW_ICS_MAX_EVENTS = int(os.environ.get('EVENTFLOW_ICS_MAX_EVENTS', '20000'))
+
 # CORS settings for React frontend
 CORS_ALLOW_ALL_ORIGINS = True  # For development only; restrict in production
+
+# Maximum number of compiled recurrence rules kept in each worker's LRU cache
+EVENTFLOW_RULE_CACHE_SIZE = int(os.environ.get('EVENTFLOW_RULE_CACHE_SIZE', '1024'))
+
+# Calendar windows with at least this many recurring series are expanded across a process pool
+# of EVENTFLOW_EXPANSION_WORKERS processes. Every server worker process starts its own pool, so
+# gunicorn.conf.py defaults this to the CPUs divided among its workers (at least 1); elsewhere
+# the default is one per CPU
+EVENTFLOW_PARALLEL_EXPANSION_THRESHOLD = int(os.environ.get('EVENTFLOW_PARALLEL_EXPANSION_THRESHOLD', '1000'))
+EVENTFLOW_EXPANSION_WORKERS = int(os.environ['EVENTFLOW_EXPANSION_WORKERS']) if os.environ.get('EVENTFLOW_EXPANSION_WORKERS') else None
+
+# Optional pre-expanded occurrence table (EventOccurrence) for calendar range reads.
+# Run `manage.py extend_occurrence_horizon` nightly when enabled.
+EVENTFLOW_MATERIALIZE_OCCURRENCES = os.environ.get('EVENTFLOW_MATERIALIZE_OCCURRENCES', 'False') == 'True'
+EVENTFLOW_OCCURRENCE_HORIZON_DAYS = int(os.environ.get('EVENTFLOW_OCCURRENCE_HORIZON_DAYS', '548'))
+# Edits regenerate a series' occurrences from this many days back; older rows are kept as history
+EVENTFLOW_OCCURRENCE_RETENTION_DAYS = int(os.environ.get('EVENTFLOW_OCCURRENCE_RETENTION_DAYS', '90'))
+
+# Cache backend shared by all workers; point CACHE_BACKEND at Redis/Memcached in production, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://cache:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'eventflow'),
+    }
+}
+
+# Longest start/end window, in days, that the calendar-style endpoints expand in one request
+EVENTFLOW_MAX_WINDOW_DAYS = int(os.environ.get('EVENTFLOW_MAX_WINDOW_DAYS', '366'))
+
+# Cache alias and lifetime (seconds) for expanded occurrence lists
+EVENTFLOW_EXPANSION_CACHE = os.environ.get('EVENTFLOW_EXPANSION_CACHE', 'default')
+EVENTFLOW_EXPANSION_CACHE_TIMEOUT = int(os.environ.get('EVENTFLOW_EXPANSION_CACHE_TIMEOUT', '3600'))
+
+# Reject event writes that overlap another of the user's events; series are checked this many days ahead
+EVENTFLOW_PREVENT_OVERLAPS = os.environ.get('EVENTFLOW_PREVENT_OVERLAPS', 'False') == 'True'
+EVENTFLOW_OVERLAP_CHECK_DAYS = int(os.environ.get('EVENTFLOW_OVERLAP_CHECK_DAYS', '365'))
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'events'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .recurrence_utils import compiled_rule_cache, expansion_pool
+        compiled_rule_cache.maxsize = getattr(settings, 'EVENTFLOW_RULE_CACHE_SIZE', compiled_rule_cache.maxsize)
+        expansion_pool.threshold = getattr(settings, 'EVENTFLOW_PARALLEL_EXPANSION_THRESHOLD', expansion_pool.threshold)
+        expansion_pool.max_workers = getattr(settings, 'EVENTFLOW_EXPANSION_WORKERS', expansion_pool.max_workers)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+# Async-native read endpoints, mounted under /api/async/events/
+urlpatterns = [
+    path('', async_views.event_list, name='async-event-list'),
+    path('calendar/', async_views.event_calendar, name='async-event-calendar'),
+    path('<int:pk>/occurrences/', async_views.event_occurrences, name='async-event-occurrences'),
+]
@@ -0,0 +1,133 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from .expansion_cache import expansion_cache
+from .fast_serializers import event_values_serializer
+from .materialization import materialization_enabled, materialized_window
+from .models import Event, OccurrenceException
+from .occurrences import exception_times_of, expand_series, expand_window, max_window, parse_count, parse_window_bound, serialize_occurrence, window_filter, window_too_long
+from eventflow_backend.renderers import FastJSONRenderer
+from users.authentication import CachedJWTAuthentication
+
+# Async-native versions of the read-heavy event endpoints (list, occurrences, calendar window).
+# Under an ASGI server (see server/gunicorn.conf.py) a slow query parks the request on the event
+# loop instead of blocking a whole worker, and recurrence expansion runs in a worker thread.
+# Responses match the EventViewSet actions of the same name.
+jwt_authentication = CachedJWTAuthentication()
+renderer = FastJSONRenderer()
+
+def json_response(data, status=status.HTTP_200_OK):
+    """Renders data with the API's JSON renderer."""
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+async def expand_off_loop(expand, *args):
+    """
+    Runs a CPU-bound expansion function in a worker thread, so other requests on this event loop
+    keep being served meanwhile. The expanders touch no database, so they need not run in the
+    thread reserved for sync ORM calls.
+    """
+    return await sync_to_async(expand, thread_sensitive=False)(*args)
+
+def async_jwt_required(view):
+    """
+    Authenticates a GET request with the API's JWT scheme before running an async view.
+    Answers 401 (with the same body DRF would send) when credentials are missing or invalid.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = json_response({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            # Resolving the user hits the database, so run it off the event loop
+            result = await sync_to_async(jwt_authentication.authenticate)(request)
+        except AuthenticationFailed as exc:
+            result, detail = None, exc.detail
+        else:
+            detail = NotAuthenticated.default_detail
+        if result is None:
+            response = json_response(detail if isinstance(detail, dict) else {'detail': detail}, status=status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = jwt_authentication.authenticate_header(request)
+            return response
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+@async_jwt_required
+async def event_list(request):
+    """Lists the authenticated user's events ordered by start time (US-06)."""
+    queryset = Event.objects.filter(user=request.user).order_by('start_time', 'pk')
+    rows = [row async for row in event_values_serializer.values(queryset)]
+    return json_response(event_values_serializer.serialize(rows))
+
+@async_jwt_required
+async def event_occurrences(request, pk):
+    """
+    Retrieves occurrences of a recurring event (US-06).
+    Accepts the same 'count', 'start' and 'end' parameters as EventViewSet.occurrences.
+    """
+    try:
+        event = await Event.objects.select_related('recurrence_rule').aget(pk=pk, user=request.user)
+    except Event.DoesNotExist:
+        return json_response({'detail': 'No Event matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+    if not event.recurrence_rule:
+        return json_response({'detail': 'This event does not have a recurrence rule.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        count = parse_count(request.GET.get('count'))
+    except ValueError:
+        return json_response({'detail': 'count must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        after = parse_window_bound(request.GET['start']) if 'start' in request.GET else event.start_time
+        before = parse_window_bound(request.GET['end']) if 'end' in request.GET else None
+    except (ValueError, OverflowError):
+        return json_response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def expand():
+        exceptions = [exc async for exc in event.exceptions.all()]
+        return await expand_off_loop(expand_series, event, exception_times_of(exceptions), after, before, count)
+
+    key = await expansion_cache.akey(request.user.pk, 'occurrences', event.pk, count, after.isoformat(), before.isoformat() if before else '')
+    return json_response(await expansion_cache.aget_or_set(key, expand))
+
+@async_jwt_required
+async def event_calendar(request):
+    """
+    Retrieves every occurrence overlapping a calendar window (US-06).
+    Accepts the same 'start' and 'end' parameters as EventViewSet.calendar.
+    """
+    start_param = request.GET.get('start')
+    end_param = request.GET.get('end')
+    if not start_param or not end_param:
+        return json_response({'detail': 'start and end are required.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        window_start = parse_window_bound(start_param)
+        window_end = parse_window_bound(end_param)
+    except (ValueError, OverflowError):
+        return json_response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+    if window_end <= window_start:
+        return json_response({'detail': 'end must be after start.'}, status=status.HTTP_400_BAD_REQUEST)
+    if window_too_long(window_start, window_end):
+        return json_response({'detail': f'The window can span at most {max_window().days} days.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    async def expand():
+        if materialization_enabled():
+            rows = await sync_to_async(materialized_window)(request.user, window_start, window_end)
+            if rows is not None:
+                return [serialize_occurrence(*row) for row in rows]
+        queryset = Event.objects.filter(user=request.user).filter(window_filter(window_start, window_end))
+        events = [event async for event in queryset.select_related('recurrence_rule')]
+        # One query for the exceptions of every series in the window, grouped per event
+        cancelled = {}
+        exceptions = OccurrenceException.objects.filter(
+            event__user=request.user, event__start_time__lt=window_end, event__recurrence_rule__isnull=False,
+        ).values_list('event_id', 'start_time')
+        async for event_id, start_time in exceptions:
+            cancelled.setdefault(event_id, set()).add(start_time.replace(microsecond=0))
+        return await expand_off_loop(expand_window, events, lambda event: cancelled.get(event.pk, set()), window_start, window_end)
+
+    key = await expansion_cache.akey(request.user.pk, 'calendar', window_start.isoformat(), window_end.isoformat())
+    return json_response(await expansion_cache.aget_or_set(key, expand))
@@ -0,0 +1,51 @@
+import heapq
+from django.contrib.auth.models import User
+from django.db.models import Q
+from .intervals import user_busy_indexes
+
+def merge_free_slots(busy_lists, window_start, window_end, duration, limit):
+    """
+    Sweep several sorted busy-interval lists, merged lazily with a k-way heap merge, for common free time.
+    The sweep stops as soon as `limit` slots are found, so the earliest slots cost the least.
+    :param busy_lists: iterables of (start, end) tuples, each sorted by start
+    :param duration: timedelta, minimum length of a free slot
+    :param limit: int, maximum number of slots to return
+    :return: list of (start, end) free slots in chronological order, each at least duration long
+    """
+    slots = []
+    cursor = window_start
+    for start, end in heapq.merge(*busy_lists):
+        if start >= window_end:
+            break
+        if start - cursor >= duration:
+            slots.append((cursor, start))
+            if len(slots) >= limit:
+                return slots
+        cursor = max(cursor, end)
+    if window_end - cursor >= duration:
+        slots.append((cursor, window_end))
+    return slots[:limit]
+
+def find_common_slots(user_ids, window_start, window_end, duration, limit=10):
+    """
+    Find the earliest windows in which all the given users are free for at least duration.
+    Each user's busy blocks come from their cached interval index; indexes missing from the
+    cache are built together with two queries.
+    :return: list of (start, end) free slots in chronological order
+    """
+    indexes = user_busy_indexes(user_ids, window_start, window_end)
+    busy_lists = [index.busy(window_start, window_end) for index in indexes.values()]
+    return merge_free_slots(busy_lists, window_start, window_end, duration, limit)
+
+def schedulable_user_ids(user, user_ids):
+    """
+    Returns which of the given users' busy times `user` may read: their own, those of users who
+    share one of their groups, and anyone's for staff. Unknown ids are simply left out.
+    :param user: the requesting User
+    :param user_ids: iterable of user ids
+    :return: set of user ids
+    """
+    users = User.objects.filter(pk__in=list(user_ids))
+    if not user.is_staff:
+        users = users.filter(Q(pk=user.pk) | Q(groups__in=user.groups.all()))
+    return set(users.values_list('pk', flat=True).distinct())
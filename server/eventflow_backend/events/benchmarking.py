@@ -0,0 +1,176 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from .icalendar import escape_text, fold_line
+from .models import Event, OccurrenceException, RecurrenceRule
+from .recurrence_utils import compiled_rule_cache, expand_recurrence, normalize_rule, rule_fingerprint
+
+BENCH_USER_PREFIX = 'bench-user-'
+
+# Recurrence patterns of seeded series with their relative frequency, roughly as people use them:
+# mostly weekly meetings and daily routines, some monthly and relative-day events, a few yearly ones
+SEED_RULES = (
+    (3, {'frequency': 'DAILY', 'interval': 1}),
+    (1, {'frequency': 'DAILY', 'interval': 2}),
+    (4, {'frequency': 'WEEKLY', 'interval': 1}),
+    (3, {'frequency': 'WEEKLY', 'interval': 1, 'weekdays': 'MO,WE,FR'}),
+    (2, {'frequency': 'WEEKLY', 'interval': 2, 'weekdays': 'TU,TH'}),
+    (1, {'frequency': 'WEEKLY', 'interval': 3}),
+    (2, {'frequency': 'MONTHLY', 'interval': 1}),
+    (1, {'frequency': 'MONTHLY', 'interval': 1, 'relative_day': '1MO'}),
+    (1, {'frequency': 'MONTHLY', 'interval': 1, 'relative_day': '-1FR'}),
+    (1, {'frequency': 'YEARLY', 'interval': 1}),
+)
+
+def measure(fn, repeat=20, warmup=2):
+    """
+    Times repeated calls of a zero-argument callable.
+    :param fn: callable to time
+    :param repeat: int, number of timed calls
+    :param warmup: int, number of untimed calls made first
+    :return: dict of latency statistics in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+def summarize(samples):
+    """
+    Summarizes latency samples.
+    :param samples: non-empty list of latencies in milliseconds
+    :return: dict with the run count and min/median/p95/p99/max in milliseconds
+    """
+    samples = sorted(samples)
+    def percentile(fraction):
+        return round(samples[min(len(samples) - 1, int(len(samples) * fraction))], 3)
+    return {
+        'runs': len(samples),
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(samples[-1], 3),
+    }
+
+def compare_results(results, baseline, tolerance=0.25, min_delta_ms=0.5, metric='median_ms'):
+    """
+    Compares benchmark scenarios with a baseline run of the same suite.
+    A scenario regresses when it is more than `tolerance` slower and the slowdown exceeds
+    min_delta_ms, so sub-millisecond jitter does not fail a run.
+    :param results: dict of scenario name to latency statistics, as returned by measure
+    :param baseline: dict of the same shape from an earlier run
+    :return: list of dicts with the scenario, baseline and current values, relative change and
+        whether it regressed, for the scenarios present in both runs
+    """
+    rows = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name][metric], stats[metric]
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            'scenario': name,
+            'baseline_ms': before,
+            'current_ms': after,
+            'change': round(change, 3),
+            'regressed': change > tolerance and after - before > min_delta_ms,
+        })
+    return rows
+
+def explain(queryset):
+    """Returns the database's query plan for a queryset, executed for real where the backend supports it."""
+    if connection.vendor == 'postgresql':
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+def bench_users():
+    """Returns the users created by seed_events, in creation order."""
+    return User.objects.filter(username__startswith=BENCH_USER_PREFIX).order_by('pk')
+
+def seed_events(total_events, users=1000, recurring_ratio=0.2, exceptions_per_series=2, batch_size=10000, seed=0):
+    """
+    Bulk-inserts synthetic users, events, recurrence rules and exceptions for benchmarking.
+    Events are spread evenly across users and over the two years around now; series follow the
+    SEED_RULES mix, and each cancels exceptions_per_series of its first twenty instances.
+    :return: list of seeded User instances
+    """
+    rng = random.Random(seed)
+    existing = bench_users().count()
+    User.objects.bulk_create([
+        User(username=f'{BENCH_USER_PREFIX}{index}', password='!')
+        for index in range(existing, max(existing, users))
+    ], batch_size=batch_size)
+    seeded_users = list(bench_users()[:users])
+    origin = timezone.now() - timedelta(days=365)
+    # Rules are interned, so the series share the handful of distinct patterns
+    interned = RecurrenceRule.objects.intern_many(fields for _, fields in SEED_RULES)
+    rules = [interned[rule_fingerprint(normalize_rule(fields))] for _, fields in SEED_RULES]
+    weights = [weight for weight, _ in SEED_RULES]
+
+    created = 0
+    while created < total_events:
+        size = min(batch_size, total_events - created)
+        recurring = [rng.random() < recurring_ratio for _ in range(size)]
+        events = []
+        for offset, is_recurring in enumerate(recurring):
+            start = origin + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60, 15))
+            events.append(Event(
+                title=f'Event {created + offset}',
+                start_time=start,
+                end_time=start + timedelta(minutes=rng.choice([15, 30, 60, 120])),
+                user=seeded_users[(created + offset) % len(seeded_users)],
+                recurrence_rule=rng.choices(rules, weights)[0] if is_recurring else None,
+            ))
+        events = Event.objects.bulk_create(events)
+        exceptions = []
+        for event in events:
+            if not event.recurrence_rule_id:
+                continue
+            instances = expand_recurrence(event.start_time, event.end_time, compiled_rule_cache.get(event.recurrence_rule), count=20)
+            exceptions.extend(
+                OccurrenceException(event=event, start_time=start.replace(microsecond=0))
+                for start, _ in rng.sample(instances[1:], min(exceptions_per_series, max(0, len(instances) - 1)))
+            )
+        OccurrenceException.objects.bulk_create(exceptions, ignore_conflicts=True)
+        created += size
+    return seeded_users
+
+SYNTHETIC_RRULES = (
+    'FREQ=DAILY', 'FREQ=DAILY;INTERVAL=2', 'FREQ=WEEKLY', 'FREQ=WEEKLY;BYDAY=MO,WE,FR', 'FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH',
+    'FREQ=MONTHLY', 'FREQ=MONTHLY;BYDAY=-1FR', 'FREQ=YEARLY', 'FREQ=WEEKLY;COUNT=10', 'FREQ=DAILY;UNTIL=20301231T235959Z',
+)
+
+def write_synthetic_ics(fh, total_events, recurring_ratio=0.2, exdates_per_series=2, seed=0):
+    """
+    Writes an iCalendar file of synthetic VEVENTs resembling a calendar migrated from another system:
+    UTC and Europe/Berlin times, a handful of common RRULEs, EXDATEs and folded descriptions.
+    :param fh: file opened in binary mode
+    """
+    rng = random.Random(seed)
+    origin = datetime(2024, 1, 1)
+    fh.write(b''.join(fold_line(line) for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//EventFlow//Benchmark//EN')))
+    for index in range(total_events):
+        start = origin + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60, 15))
+        end = start + timedelta(minutes=rng.choice([15, 30, 60, 120]))
+        if rng.random() < 0.5:
+            times = [f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}", f"DTEND:{end.strftime('%Y%m%dT%H%M%SZ')}"]
+        else:
+            times = [f"DTSTART;TZID=Europe/Berlin:{start.strftime('%Y%m%dT%H%M%S')}", f"DTEND;TZID=Europe/Berlin:{end.strftime('%Y%m%dT%H%M%S')}"]
+        lines = ['BEGIN:VEVENT', f'UID:bench-{index}@example.com', *times, f'SUMMARY:Imported event {index}',
+                 f"DESCRIPTION:{escape_text('Agenda: ' + ', '.join(f'item {item}' for item in range(rng.randint(0, 12))))}"]
+        if rng.random() < recurring_ratio:
+            lines.append(f'RRULE:{rng.choice(SYNTHETIC_RRULES)}')
+            exdates = {start + timedelta(days=7 * rng.randint(1, 20)) for _ in range(exdates_per_series)}
+            lines.extend(f"EXDATE:{exdate.strftime('%Y%m%dT%H%M%SZ')}" for exdate in sorted(exdates))
+        lines.append('END:VEVENT')
+        fh.write(b''.join(fold_line(line) for line in lines))
+    fh.write(fold_line('END:VCALENDAR'))
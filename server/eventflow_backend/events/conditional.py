@@ -0,0 +1,39 @@
+import hashlib
+from functools import wraps
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from .expansion_cache import expansion_cache
+
+def user_etag(user_id, renderer_format):
+    """
+    Builds the entity tag for a user's event reads from their expansion cache generation.
+    Every write to the user's events, exceptions included, bumps the generation (see signals), so
+    the tag changes whenever any read could, at the cost of one cache lookup rather than a query.
+    :param renderer_format: str, the response format, which renders the same data differently
+    :return: quoted ETag string
+    """
+    fingerprint = f'{user_id}:{expansion_cache.generation(user_id)}:{renderer_format}'
+    return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+def conditional_read(view_method):
+    """
+    Decorates a read-only EventViewSet action with ETag handling.
+    A request whose If-None-Match still matches gets a 304 Not Modified before the action runs,
+    so no rules are expanded and nothing is serialized. Detail actions still resolve their
+    object first, so a missing or foreign event is a 404, never a 304. No Last-Modified is sent:
+    deletions and cancelled occurrences leave no timestamp behind to base it on.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        etag = user_etag(request.user.pk, request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None and (self.lookup_url_kwarg or self.lookup_field) in kwargs:
+            # The tag covers only the user's own events; raises Http404 for any other pk
+            self.get_object()
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+        return response
+    return wrapper
@@ -0,0 +1,77 @@
+from threading import Lock
+from django.db import connections
+
+class ConnectionCounters:
+    """
+    Per-worker counts of requests served and database connections Django opened for them.
+    With persistent connections or a pool, many requests share each connect; a ratio near 1
+    means every request pays connection setup.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connects = 0
+        self._lock = Lock()
+
+    def request_started(self):
+        with self._lock:
+            self.requests += 1
+
+    def connection_created(self):
+        with self._lock:
+            self.connects += 1
+
+    def stats(self):
+        """Returns the counters and the requests served per connect."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'connects': self.connects,
+                'requests_per_connect': round(self.requests / self.connects, 2) if self.connects else None,
+            }
+
+connection_counters = ConnectionCounters()
+
+def pool_stats(pool):
+    """
+    Summarizes a psycopg_pool.ConnectionPool's counters, with saturation as the share of its
+    maximum size checked out. Requests that waited, and for how long, show the pool is too small.
+    :return: dict of pool size, usage and wait counters
+    """
+    stats = pool.get_stats()
+    in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    return {
+        'min_size': stats.get('pool_min', 0),
+        'max_size': stats.get('pool_max', 0),
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'in_use': in_use,
+        'saturation': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': stats.get('requests_num', 0),
+        'requests_queued': stats.get('requests_queued', 0),
+        'requests_wait_ms': stats.get('requests_wait_ms', 0),
+        'requests_errors': stats.get('requests_errors', 0),
+        'connections': stats.get('connections_num', 0),
+        'connections_ms': stats.get('connections_ms', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+def connection_stats(alias='default'):
+    """
+    Reports how this worker connects to a database: persistent connection settings, connect
+    counters, and the pool's saturation counters when DB_POOL is enabled.
+    """
+    connection = connections[alias]
+    stats = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'conn_health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        **connection_counters.stats(),
+        'pool': None,
+    }
+    # Only the PostgreSQL backend has a pool attribute, which is None unless pooling is configured
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pool'] = pool_stats(pool)
+    return stats
@@ -0,0 +1,164 @@
+import time
+from threading import Lock
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GENERATION_KEY = 'eventflow:gen:{user_id}'
+
+class ExpansionCache:
+    """
+    Caches expanded occurrence lists in Django's cache framework, shared by every worker.
+    Keys embed a per-user generation number, and any write to a user's events bumps it, so
+    stale entries are never read again and simply age out of the backend. The backend is
+    whichever CACHES alias EVENTFLOW_EXPANSION_CACHE names (local memory, file, Redis, ...).
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    @property
+    def cache(self):
+        """Returns the configured cache backend."""
+        return caches[getattr(settings, 'EVENTFLOW_EXPANSION_CACHE', 'default')]
+
+    @property
+    def timeout(self):
+        """Returns the lifetime of cached expansions in seconds."""
+        return getattr(settings, 'EVENTFLOW_EXPANSION_CACHE_TIMEOUT', 3600)
+
+    def generation(self, user_id):
+        """
+        Returns the user's current generation number, initializing it if missing.
+        New generations start from the clock rather than 1, so a generation key evicted by the
+        backend can never come back with a number whose entries are still cached.
+        """
+        key = GENERATION_KEY.format(user_id=user_id)
+        value = self.cache.get(key)
+        if value is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            value = self.cache.get(key)
+        return value
+
+    def generations(self, user_ids):
+        """Returns {user_id: generation} for many users with a couple of round trips to the backend."""
+        keys = {user_id: GENERATION_KEY.format(user_id=user_id) for user_id in user_ids}
+        found = self.cache.get_many(keys.values())
+        missing = [key for key in keys.values() if key not in found]
+        if missing:
+            for key in missing:
+                self.cache.add(key, time.time_ns(), timeout=None)
+            found.update(self.cache.get_many(missing))
+        return {user_id: found[key] for user_id, key in keys.items()}
+
+    def bump(self, user_id):
+        """Invalidates every cached expansion of the user's events by moving to a new generation."""
+        key = GENERATION_KEY.format(user_id=user_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, time.time_ns(), timeout=None)
+
+    def invalidate(self, user_id):
+        """
+        Bumps the user's generation now and again once the current transaction commits.
+        The first bump makes later reads inside the transaction miss; the second drops anything
+        a concurrent request cached from the pre-commit data in between.
+        """
+        self.bump(user_id)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self.bump(user_id))
+
+    async def ageneration(self, user_id):
+        """Async version of generation()."""
+        key = GENERATION_KEY.format(user_id=user_id)
+        value = await self.cache.aget(key)
+        if value is None:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+            value = await self.cache.aget(key)
+        return value
+
+    def key(self, user_id, kind, *parts):
+        """Builds a cache key for one expansion of the user's events under their current generation."""
+        return self._key(user_id, kind, self.generation(user_id), parts)
+
+    def keys(self, user_ids, kind, *parts):
+        """Builds {user_id: key} for the same expansion of many users' events."""
+        return {
+            user_id: self._key(user_id, kind, generation, parts)
+            for user_id, generation in self.generations(user_ids).items()
+        }
+
+    async def akey(self, user_id, kind, *parts):
+        """Async version of key()."""
+        return self._key(user_id, kind, await self.ageneration(user_id), parts)
+
+    def _key(self, user_id, kind, generation, parts):
+        return ':'.join(['eventflow', kind, str(user_id), str(generation), *map(str, parts)])
+
+    def _count(self, value):
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def get_or_set(self, key, compute):
+        """
+        Returns the cached value for key, calling compute() and caching its result on a miss.
+        :param key: str, built with key()
+        :param compute: zero-argument callable producing a picklable value
+        """
+        value = self.cache.get(key)
+        self._count(value)
+        if value is None:
+            value = compute()
+            self.cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def get_or_set_many(self, keys, compute):
+        """
+        Returns {id: value} for a dict of {id: key}, computing all the misses in one call.
+        :param keys: dict of id to cache key, built with keys()
+        :param compute: callable taking the list of missing ids and returning {id: value} for them
+        """
+        found = self.cache.get_many(keys.values())
+        values = {ident: found[key] for ident, key in keys.items() if key in found}
+        missing = [ident for ident in keys if ident not in values]
+        with self._lock:
+            self.hits += len(values)
+            self.misses += len(missing)
+        if missing:
+            computed = compute(missing)
+            self.cache.set_many({keys[ident]: computed[ident] for ident in missing}, timeout=self.timeout)
+            values.update(computed)
+        return values
+
+    async def aget_or_set(self, key, compute):
+        """Async version of get_or_set(); compute is a zero-argument coroutine function."""
+        value = await self.cache.aget(key)
+        self._count(value)
+        if value is None:
+            value = await compute()
+            await self.cache.aset(key, value, timeout=self.timeout)
+        return value
+
+    def stats(self):
+        """Returns this worker's hit/miss counters."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+        }
+
+    def reset_stats(self):
+        """Zeroes the hit/miss counters."""
+        with self._lock:
+            self.hits = self.misses = 0
+
+expansion_cache = ExpansionCache()
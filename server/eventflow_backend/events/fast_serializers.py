@@ -0,0 +1,95 @@
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+from django.utils import timezone
+from .serializers import EventSerializer
+
+# Field types whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+def _datetime_to_representation(value):
+    """Matches DRF's ISO 8601 DateTimeField output: current time zone, 'Z' for UTC."""
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+def _date_to_representation(value):
+    """Matches DRF's ISO 8601 DateField output."""
+    return value.isoformat()
+
+def _is_iso_format(field, default):
+    """Returns whether a date/datetime field renders ISO 8601, the only format the fast converters reproduce."""
+    output_format = getattr(field, 'format', default)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+class ValuesSerializer:
+    """
+    Read-only serializer that renders `.values()` rows into the same dicts as a ModelSerializer.
+    The ModelSerializer's fields are inspected once, up front, and compiled into a list of
+    (output key, row key, converter) accessors, so rendering a row is a tight loop of dict
+    lookups instead of DRF field objects, attribute access and per-field validation hooks.
+    Nested model serializers become joined columns under their relation's prefix.
+    """
+
+    def __init__(self, serializer_class, prefix=''):
+        """
+        :param serializer_class: ModelSerializer subclass whose output is reproduced
+        :param prefix: str, lookup prefix when nested under a relation (e.g. 'recurrence_rule__')
+        """
+        self.prefix = prefix
+        self.lookups = []
+        self.accessors = []
+        self.key_lookup = None
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            lookup = prefix + field.source
+            if isinstance(field, serializers.ModelSerializer):
+                nested = ValuesSerializer(type(field), prefix=lookup + '__')
+                self.lookups.extend(nested.lookups)
+                self.accessors.append((name, nested.key_lookup, nested))
+                continue
+            self.lookups.append(lookup)
+            if field.source == 'id':
+                self.key_lookup = lookup
+            if isinstance(field, serializers.DateTimeField) and _is_iso_format(field, api_settings.DATETIME_FORMAT):
+                converter = _datetime_to_representation
+            elif isinstance(field, serializers.DateField) and _is_iso_format(field, api_settings.DATE_FORMAT):
+                converter = _date_to_representation
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                converter = None
+            else:
+                converter = field.to_representation
+            self.accessors.append((name, lookup, converter))
+
+    def to_representation(self, row):
+        """
+        Renders one `.values()` row into the ModelSerializer's representation.
+        A nested relation whose key column is NULL renders as None.
+        """
+        data = {}
+        for name, lookup, converter in self.accessors:
+            if isinstance(converter, ValuesSerializer):
+                data[name] = converter.to_representation(row) if row[lookup] is not None else None
+                continue
+            value = row[lookup]
+            data[name] = value if converter is None or value is None else converter(value)
+        return data
+
+    def values(self, queryset):
+        """Returns the queryset as `.values()` rows carrying every column the serializer needs."""
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows):
+        """Renders an iterable of `.values()` rows into a list of representations."""
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+event_values_serializer = ValuesSerializer(EventSerializer)
@@ -0,0 +1,511 @@
+import re
+from collections import deque
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.db import transaction
+from django.utils import timezone
+from .expansion_cache import expansion_cache
+from .materialization import materialization_enabled, refresh_event_occurrences, remove_materialized_occurrence
+from .models import Event, OccurrenceException, RecurrenceRule
+from .recurrence_utils import FREQ_MAP, RELATIVE_DAY_RE, RULE_TUPLE_FIELDS, WEEKDAY_MAP, build_rrule, rule_fingerprint
+
+# iCalendar (RFC 5545) export and import; recurrence rules map to RRULE/EXDATE and are never expanded
+PRODID = '-//EventFlow//EventFlow Calendar//EN'
+UID_DOMAIN = 'eventflow'
+EXPORT_FIELDS = (
+    'pk', 'title', 'description', 'start_time', 'end_time', 'created_at', 'updated_at', 'recurrence_rule_id',
+    'recurrence_rule__frequency', 'recurrence_rule__interval', 'recurrence_rule__weekdays',
+    'recurrence_rule__relative_day', 'recurrence_rule__end_date',
+)
+WEEKDAY_ORDER = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+ESCAPED_TEXT_RE = re.compile(r'\\([\\;,nN])')
+# COUNTs above this are only accepted where the last instance can be computed without expanding
+MAX_RRULE_COUNT = 10000
+DURATION_RE = re.compile(r'([-+])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+def escape_text(value):
+    """Escape a TEXT property value (backslashes, separators and line breaks)."""
+    value = value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+    return value.replace('\r\n', '\\n').replace('\r', '\\n').replace('\n', '\\n')
+
+def fold_line(line):
+    """
+    Encode a content line, folded into lines of at most 75 octets as RFC 5545 requires.
+    Folds never split a multi-byte UTF-8 character.
+    :return: bytes ending in CRLF
+    """
+    encoded = line.encode()
+    parts = []
+    limit = 75
+    while len(encoded) > limit:
+        cut = limit
+        while encoded[cut] & 0xC0 == 0x80:  # continuation byte: back up to the character start
+            cut -= 1
+        parts.append(encoded[:cut])
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    parts.append(encoded)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+def format_datetime(value):
+    """Format an aware datetime as a UTC DATE-TIME value, e.g. 20250602T090000Z."""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def rrule_value(frequency, interval, weekdays, relative_day, end_date):
+    """
+    Build the RRULE value equivalent to a RecurrenceRule's fields, as the expanders interpret them.
+    A relative day ('2FR') becomes BYDAY plus BYSETPOS and overrides the weekday list, and the
+    inclusive end_date becomes an UNTIL at the end of that UTC day (stored starts are UTC).
+    :return: str, e.g. 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE'
+    """
+    parts = [f'FREQ={frequency}']
+    if interval and interval != 1:
+        parts.append(f'INTERVAL={interval}')
+    match = RELATIVE_DAY_RE.match(relative_day) if relative_day else None
+    if match:
+        parts.append(f'BYDAY={match.group(2)};BYSETPOS={match.group(1)}')
+    elif weekdays:
+        days = [day.strip() for day in weekdays.split(',') if day.strip() in WEEKDAY_MAP]
+        if days:
+            parts.append(f"BYDAY={','.join(days)}")
+    if end_date:
+        parts.append(f"UNTIL={end_date.strftime('%Y%m%d')}T235959Z")
+    return ';'.join(parts)
+
+def vevent_lines(row, exdates):
+    """
+    Build the content lines of one VEVENT.
+    :param row: tuple of the EXPORT_FIELDS values of an event
+    :param exdates: list of cancelled instance starts of the event
+    :return: list of str
+    """
+    pk, title, description, start_time, end_time, created_at, updated_at, rule_id, *rule = row
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{pk}@{UID_DOMAIN}',
+        f'DTSTAMP:{format_datetime(updated_at)}',
+        f'CREATED:{format_datetime(created_at)}',
+        f'LAST-MODIFIED:{format_datetime(updated_at)}',
+        f'DTSTART:{format_datetime(start_time)}',
+        f'DTEND:{format_datetime(end_time)}',
+        f'SUMMARY:{escape_text(title)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape_text(description)}')
+    if rule_id is not None:
+        lines.append(f'RRULE:{rrule_value(*rule)}')
+        if exdates:
+            lines.append(f"EXDATE:{','.join(format_datetime(start) for start in exdates)}")
+    lines.append('END:VEVENT')
+    return lines
+
+def render_vevents(rows):
+    """
+    Render a chunk of event rows as VEVENTs, fetching the chunk's exceptions with one query.
+    :return: bytes
+    """
+    exdates = {}
+    series_ids = [row[0] for row in rows if row[7] is not None]
+    if series_ids:
+        exceptions = OccurrenceException.objects.filter(event_id__in=series_ids).order_by('event_id', 'start_time')
+        for event_id, start_time in exceptions.values_list('event_id', 'start_time'):
+            exdates.setdefault(event_id, []).append(start_time)
+    return b''.join(fold_line(line) for row in rows for line in vevent_lines(row, exdates.get(row[0])))
+
+def iter_calendar(queryset, chunk_size=500):
+    """
+    Yield an iCalendar document of the events in queryset, a chunk of VEVENTs at a time.
+    Events are read with a chunked iterator and series keep their rules, so memory stays bounded
+    by chunk_size and output size grows with the number of events, not of occurrences.
+    :param queryset: Event queryset
+    :return: generator of bytes
+    """
+    yield b''.join(fold_line(line) for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN'))
+    chunk = []
+    for row in queryset.order_by('pk').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield render_vevents(chunk)
+            chunk = []
+    if chunk:
+        yield render_vevents(chunk)
+    yield fold_line('END:VCALENDAR')
+
+def unescape_text(value):
+    """Undo escape_text on a TEXT property value."""
+    return ESCAPED_TEXT_RE.sub(lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+def iter_content_lines(stream):
+    """
+    Yield the unfolded content lines of an iCalendar stream.
+    Lines are unfolded before they are decoded, since folds may split multi-byte characters.
+    :param stream: iterable of bytes lines, e.g. a file opened in binary mode or an uploaded file
+    :return: generator of str
+    """
+    pending = None
+    for raw in stream:
+        raw = raw.rstrip(b'\r\n')
+        if raw[:1] in (b' ', b'\t'):
+            if pending is not None:
+                pending += raw[1:]
+            continue
+        if pending:
+            yield pending.decode('utf-8', 'replace')
+        pending = raw
+    if pending:
+        yield pending.decode('utf-8', 'replace')
+
+def parse_content_line(line):
+    """
+    Split a content line into its name, parameters and value.
+    :return: tuple of (upper-cased name, dict of upper-cased parameter names to values, value)
+    """
+    head, _, value = line.partition(':')
+    if '"' in head:
+        return _parse_quoted_content_line(line)
+    name, *params = head.split(';')
+    return name.upper(), dict(_split_param(param) for param in params), value
+
+def _split_param(param):
+    """Split an unquoted 'NAME=value' parameter."""
+    name, _, value = param.partition('=')
+    return name.upper(), value
+
+def _parse_quoted_content_line(line):
+    """Slow path of parse_content_line for lines whose parameter values are quoted and may contain ':' or ';'."""
+    index = 0
+    while index < len(line) and line[index] not in ';:':
+        index += 1
+    name = line[:index].upper()
+    params = {}
+    while index < len(line) and line[index] == ';':
+        equals = line.find('=', index)
+        if equals < 0:
+            break
+        param = line[index + 1:equals].upper()
+        index = equals + 1
+        if line.startswith('"', index):
+            close = line.find('"', index + 1)
+            close = len(line) if close < 0 else close
+            params[param] = line[index + 1:close]
+            index = close + 1
+        else:
+            start = index
+            while index < len(line) and line[index] not in ';:':
+                index += 1
+            params[param] = line[start:index]
+        # Skip any further values of a multi-valued parameter
+        while index < len(line) and line[index] not in ';:':
+            index += 1
+    return name, params, line[index + 1:]
+
+def iter_components(lines, component='VEVENT'):
+    """
+    Yield the properties of each component of a type, skipping components nested in it (e.g. VALARM).
+    :param lines: iterable of unfolded content lines, see iter_content_lines
+    :return: generator of dicts of property name to list of (params, value) tuples
+    :raises ValueError: if the stream does not start with BEGIN:VCALENDAR
+    """
+    properties = None
+    depth = 0
+    for number, line in enumerate(lines):
+        name, params, value = parse_content_line(line)
+        if number == 0 and (name.lstrip('\ufeff'), value.upper()) != ('BEGIN', 'VCALENDAR'):
+            raise ValueError('Not an iCalendar file: it must start with BEGIN:VCALENDAR.')
+        if name == 'BEGIN':
+            if properties is not None:
+                depth += 1
+            elif value.upper() == component:
+                properties = {}
+        elif name == 'END':
+            if properties is None:
+                continue
+            if depth:
+                depth -= 1
+            elif value.upper() == component:
+                yield properties
+                properties = None
+        elif properties is not None and not depth:
+            properties.setdefault(name, []).append((params, value))
+
+@lru_cache(maxsize=256)
+def resolve_tzid(tzid):
+    """
+    Map a TZID parameter to a tzinfo, also trying the trailing Area/Location of prefixed ids
+    (e.g. '/mozilla.org/20050126_1/Europe/Berlin'). Unknown ids fall back to the default time zone.
+    """
+    candidates = [tzid]
+    parts = tzid.strip('/').split('/')
+    if len(parts) > 2:
+        candidates.append('/'.join(parts[-2:]))
+    for candidate in candidates:
+        try:
+            return ZoneInfo(candidate)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    return timezone.get_default_timezone()
+
+def parse_ical_datetime(value, params):
+    """
+    Parse a DATE or DATE-TIME value. Floating times and dates are taken in the TZID zone if
+    given, else the default time zone; dates become midnight.
+    :return: tuple of (aware datetime, whether the value is a DATE)
+    """
+    value = value.strip()
+    tzinfo = resolve_tzid(params['TZID']) if 'TZID' in params else timezone.get_default_timezone()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return timezone.make_aware(datetime(int(value[:4]), int(value[4:6]), int(value[6:8])), tzinfo), True
+    parsed = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]), int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith('Z'):
+        return parsed.replace(tzinfo=dt_timezone.utc), False
+    return timezone.make_aware(parsed, tzinfo), False
+
+def parse_duration(value):
+    """Parse a DURATION value such as PT1H30M or -P1D into a timedelta."""
+    match = DURATION_RE.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f'Invalid duration: {value}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    try:
+        duration = timedelta(
+            weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0),
+        )
+    except OverflowError:
+        raise ValueError(f'Duration out of range: {value}') from None
+    return -duration if sign == '-' else duration
+
+def count_end_date(start_utc, rule, count):
+    """
+    Find the UTC day of a series' last instance under COUNT.
+    Daily rules and weekly rules on the start's weekday advance a fixed step, so the last day is
+    computed directly; other rules are expanded, up to MAX_RRULE_COUNT instances.
+    :param start_utc: aware datetime in UTC, the series start
+    :param rule: dict of RecurrenceRule fields
+    :return: date, or None if the COUNT is too large to resolve
+    """
+    try:
+        if rule['frequency'] == 'DAILY' and not rule['weekdays']:
+            return (start_utc + timedelta(days=rule['interval'] * (count - 1))).date()
+        if rule['frequency'] == 'WEEKLY' and not rule['weekdays']:
+            return (start_utc + timedelta(weeks=rule['interval'] * (count - 1))).date()
+    except OverflowError:
+        return None
+    if count > MAX_RRULE_COUNT:
+        return None
+    return deque(build_rrule(start_utc, rule, count=count), maxlen=1)[0].date()
+
+def parse_rrule(value, start):
+    """
+    Convert an RRULE value into RecurrenceRule fields, as the expanders will interpret them.
+    Series are expanded from their UTC start, so weekdays are shifted when the local start falls on
+    another day in UTC, and COUNT or UNTIL become the inclusive end_date of the last occurrence's UTC day.
+    :param start: aware datetime, the series' DTSTART
+    :return: dict of RecurrenceRule fields, or None if the rule uses parts the model cannot express
+    """
+    try:
+        parts = dict(part.split('=', 1) for part in value.upper().split(';') if part)
+        interval = int(parts.pop('INTERVAL', 1))
+        count = int(parts['COUNT']) if 'COUNT' in parts else None
+    except ValueError:
+        return None
+    frequency = parts.pop('FREQ', None)
+    byday = parts.pop('BYDAY', None)
+    bysetpos = parts.pop('BYSETPOS', None)
+    until = parts.pop('UNTIL', None)
+    parts.pop('COUNT', None)
+    # WKST only matters to multi-day weekly rules with gaps; the expanders always start weeks on Monday
+    wkst = parts.pop('WKST', 'MO')
+    if parts or frequency not in FREQ_MAP or interval < 1 or (count is not None and count < 1):
+        return None
+    if wkst != 'MO' and frequency == 'WEEKLY' and interval > 1 and byday and ',' in byday:
+        return None
+
+    start_utc = start.astimezone(dt_timezone.utc)
+    shift = (start_utc.date() - start.date()).days
+    rule = {'frequency': frequency, 'interval': interval, 'weekdays': None, 'relative_day': None, 'end_date': None}
+    if byday:
+        days = byday.split(',')
+        if bysetpos is None and all(day in WEEKDAY_MAP for day in days):
+            rule['weekdays'] = ','.join(WEEKDAY_ORDER[(WEEKDAY_ORDER.index(day) + shift) % 7] for day in days)
+        else:
+            # A single ordinal weekday ('2FR', or 'FR' with BYSETPOS=2); ordinals do not survive a day shift
+            match = RELATIVE_DAY_RE.fullmatch(days[0])
+            if match and bysetpos is None:
+                ordinal, day = match.groups()
+            elif days[0] in WEEKDAY_MAP and bysetpos and re.fullmatch(r'-?\d+', bysetpos):
+                ordinal, day = bysetpos, days[0]
+            else:
+                return None
+            if len(days) != 1 or shift or frequency not in ('MONTHLY', 'YEARLY') or day not in WEEKDAY_MAP or int(ordinal) == 0:
+                return None
+            rule['relative_day'] = f'{int(ordinal)}{day}'
+    elif bysetpos is not None:
+        return None
+
+    if count is not None:
+        rule['end_date'] = count_end_date(start_utc, rule, count)
+        if rule['end_date'] is None:
+            return None
+    elif until is not None:
+        try:
+            if len(until) == 8:
+                bound = datetime.combine(parse_ical_datetime(until, {'VALUE': 'DATE'})[0].date(), time.max, tzinfo=start.tzinfo)
+            else:
+                bound, _ = parse_ical_datetime(until, {})
+                if not until.endswith('Z'):
+                    bound = bound.replace(tzinfo=start.tzinfo)
+        except ValueError:
+            return None
+        bound = bound.astimezone(dt_timezone.utc)
+        # Rules yield at most one instance a day, at the start's time of day
+        last_day = bound.date()
+        if datetime.combine(last_day, start_utc.timetz()) > bound:
+            last_day -= timedelta(days=1)
+        rule['end_date'] = last_day
+    return rule
+
+def convert_vevent(properties):
+    """
+    Convert a parsed VEVENT into event fields and its recurrence data.
+    :param properties: dict of property name to list of (params, value) tuples, see iter_components
+    :return: dict with keys: title, description, start_time, end_time, is_all_day, rule (RecurrenceRule
+        fields, None, or False if the RRULE cannot be expressed), exdates, uid, recurrence_id, cancelled
+    :raises ValueError: if the event has no valid DTSTART or does not end after it starts
+    """
+    def first(name):
+        values = properties.get(name)
+        return values[0] if values else None
+
+    if first('DTSTART') is None:
+        raise ValueError('VEVENT without DTSTART.')
+    start, is_date = parse_ical_datetime(first('DTSTART')[1], first('DTSTART')[0])
+    if first('DTEND') is not None:
+        end, _ = parse_ical_datetime(first('DTEND')[1], first('DTEND')[0])
+    elif first('DURATION') is not None:
+        end = start + parse_duration(first('DURATION')[1])
+    else:
+        end = start + timedelta(days=1) if is_date else start
+    if end <= start:
+        raise ValueError('VEVENT does not end after it starts.')
+
+    rule = None
+    if first('RRULE') is not None:
+        rule = parse_rrule(first('RRULE')[1], start) or False
+    exdates = set()
+    for params, value in properties.get('EXDATE', ()):
+        for item in value.split(','):
+            if item.strip():
+                exdates.add(parse_ical_datetime(item, params)[0].astimezone(dt_timezone.utc))
+    recurrence_id = first('RECURRENCE-ID')
+    return {
+        'title': unescape_text(first('SUMMARY')[1])[:255] if first('SUMMARY') else '(No title)',
+        'description': unescape_text(first('DESCRIPTION')[1]) if first('DESCRIPTION') else '',
+        'start_time': start,
+        'end_time': end,
+        'is_all_day': is_date,
+        'rule': rule,
+        'exdates': exdates,
+        'uid': first('UID')[1] if first('UID') else None,
+        'recurrence_id': parse_ical_datetime(recurrence_id[1], recurrence_id[0])[0] if recurrence_id else None,
+        'cancelled': first('STATUS') is not None and first('STATUS')[1].upper() == 'CANCELLED',
+    }
+
+def import_calendar(stream, user, batch_size=1000, progress=None, max_events=None):
+    """
+    Import the VEVENTs of an iCalendar stream as the user's events, in one transaction.
+    The stream is parsed lazily and written in batches with bulk_create, so memory depends on the
+    batch size rather than the file size. Identical rules are stored once. Instances overridden by a
+    RECURRENCE-ID component become one-off events and are cancelled in their series. Rules the model
+    cannot express are imported as their first occurrence and counted in 'unsupported_rules'.
+    :param stream: iterable of bytes lines
+    :param progress: optional callable receiving the running counts after each batch
+    :param max_events: optional int; files with more VEVENTs are rejected and nothing is written
+    :return: dict of counts: events, series, rules (distinct rules used), exceptions, skipped, unsupported_rules
+    :raises ValueError: if the stream is not an iCalendar file or has more than max_events VEVENTs
+    """
+    stats = {'events': 0, 'series': 0, 'rules': 0, 'exceptions': 0, 'skipped': 0, 'unsupported_rules': 0}
+    # Rules are interned once per distinct pattern and batch, so imports share rules with existing events
+    rules = {}
+    pending_rules = {}
+    series_pks = {}
+    overrides = []
+    batch = []
+    # bulk_create sends no post_save, so materialized occurrences are refreshed here instead of by signals
+    materialize = materialization_enabled()
+
+    def write_batch():
+        if pending_rules:
+            interned = RecurrenceRule.objects.intern_many(pending_rules.values())
+            rules.update((key, interned[rule_fingerprint(fields)]) for key, fields in pending_rules.items())
+            pending_rules.clear()
+        for event, _, _, key in batch:
+            if key is not None:
+                event.recurrence_rule = rules[key]
+        Event.objects.bulk_create([event for event, _, _, _ in batch])
+        exceptions = [OccurrenceException(event=event, start_time=start) for event, exdates, _, _ in batch for start in exdates]
+        OccurrenceException.objects.bulk_create(exceptions, ignore_conflicts=True)
+        if materialize:
+            for event, _, _, _ in batch:
+                refresh_event_occurrences(event)
+        for event, _, uid, key in batch:
+            if uid and key is not None:
+                series_pks[uid] = event.pk
+        stats['rules'] = len(rules)
+        stats['exceptions'] += len(exceptions)
+        stats['events'] += len(batch)
+        batch.clear()
+        if progress:
+            progress(dict(stats))
+
+    with transaction.atomic():
+        for seen, properties in enumerate(iter_components(iter_content_lines(stream)), 1):
+            if max_events is not None and seen > max_events:
+                raise ValueError(f'The calendar has more than {max_events} events.')
+            try:
+                vevent = convert_vevent(properties)
+            except (ValueError, IndexError, OverflowError):
+                stats['skipped'] += 1
+                continue
+            if vevent['recurrence_id'] is not None:
+                overrides.append((vevent['uid'], vevent['recurrence_id']))
+                vevent['rule'] = None
+            if vevent['cancelled']:
+                if vevent['recurrence_id'] is None:
+                    stats['skipped'] += 1
+                continue
+            if vevent['rule'] is False:
+                stats['unsupported_rules'] += 1
+                vevent['rule'] = None
+
+            event = Event(
+                user=user, title=vevent['title'], description=vevent['description'], start_time=vevent['start_time'],
+                end_time=vevent['end_time'], is_all_day=vevent['is_all_day'],
+            )
+            exdates = ()
+            key = None
+            if vevent['rule']:
+                key = tuple(vevent['rule'][field] for field in RULE_TUPLE_FIELDS)
+                if key not in rules:
+                    pending_rules[key] = vevent['rule']
+                exdates = vevent['exdates']
+                stats['series'] += 1
+            batch.append((event, exdates, vevent['uid'], key))
+            if len(batch) >= batch_size:
+                write_batch()
+        if batch:
+            write_batch()
+
+        # Overrides may precede their series in the file, so they are matched once everything is written
+        exceptions = [
+            OccurrenceException(event_id=series_pks[uid], start_time=start.astimezone(dt_timezone.utc))
+            for uid, start in overrides if uid in series_pks
+        ]
+        OccurrenceException.objects.bulk_create(exceptions, batch_size=batch_size, ignore_conflicts=True)
+        if materialize:
+            for exception in exceptions:
+                remove_materialized_occurrence(exception.event_id, exception.start_time)
+        stats['exceptions'] += len(exceptions)
+    # bulk_create sends no model signals, so invalidate cached expansions explicitly
+    expansion_cache.invalidate(user.pk)
+    return stats
@@ -0,0 +1,163 @@
+from bisect import bisect_right
+from datetime import datetime, timezone as dt_timezone
+from eventflow_backend.metrics import timed_expansion
+from .expansion_cache import expansion_cache
+from .models import Event, OccurrenceException
+from .occurrences import window_filter
+from .recurrence_utils import RULE_TUPLE_FIELDS, expand_many
+
+class IntervalIndex:
+    """
+    Static index over half-open [start, end) intervals, each tagged with an event id.
+    Two sorted-array structures back it:
+    - the union of the intervals as disjoint busy blocks, answered with bisect in O(log n + k);
+    - the intervals sorted by start, with an implicit balanced tree over the array whose nodes
+      store the latest end in their subtree, so conflict searches skip subtrees that end too early.
+    """
+
+    def __init__(self, intervals):
+        """
+        :param intervals: iterable of (start, end, event_id) tuples; empty intervals are ignored
+        """
+        intervals = sorted(interval for interval in intervals if interval[1] > interval[0])
+        self.starts = [interval[0] for interval in intervals]
+        self.ends = [interval[1] for interval in intervals]
+        self.event_ids = [interval[2] for interval in intervals]
+        self.max_ends = self._build_max_ends()
+
+        # Merge into disjoint blocks; touching intervals merge too, since [a, b) + [b, c) is busy throughout
+        self.block_starts = []
+        self.block_ends = []
+        for start, end in zip(self.starts, self.ends):
+            if self.block_ends and start <= self.block_ends[-1]:
+                self.block_ends[-1] = max(self.block_ends[-1], end)
+            else:
+                self.block_starts.append(start)
+                self.block_ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _build_max_ends(self):
+        """Store in each node (the midpoint of its range) the latest end within the range."""
+        max_ends = list(self.ends)
+        # Post-order over the implicit tree: children are finished before their parent
+        stack = [(0, len(self.ends), False)]
+        while stack:
+            lo, hi, children_done = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if not children_done:
+                stack.extend([(lo, hi, True), (lo, mid, False), (mid + 1, hi, False)])
+                continue
+            for child_lo, child_hi in ((lo, mid), (mid + 1, hi)):
+                if child_lo < child_hi:
+                    max_ends[mid] = max(max_ends[mid], max_ends[(child_lo + child_hi) // 2])
+        return max_ends
+
+    def busy(self, window_start, window_end):
+        """
+        Return the busy blocks overlapping [window_start, window_end), clipped to the window.
+        :return: list of (start, end) tuples in chronological order
+        """
+        blocks = []
+        # The first block ending after the window starts is the first one that can overlap it
+        index = bisect_right(self.block_ends, window_start)
+        while index < len(self.block_starts) and self.block_starts[index] < window_end:
+            blocks.append((max(self.block_starts[index], window_start), min(self.block_ends[index], window_end)))
+            index += 1
+        return blocks
+
+    def is_busy(self, window_start, window_end):
+        """Return whether any interval overlaps [window_start, window_end), in O(log n)."""
+        index = bisect_right(self.block_ends, window_start)
+        return index < len(self.block_starts) and self.block_starts[index] < window_end
+
+    def conflicts(self, window_start, window_end, exclude_event_id=None):
+        """
+        Yield the intervals overlapping [window_start, window_end) in start order.
+        :param exclude_event_id: event id whose intervals are skipped (e.g. the event being edited)
+        :return: generator of (start, end, event_id) tuples
+        """
+        return self._search(0, len(self.starts), window_start, window_end, exclude_event_id)
+
+    def _search(self, lo, hi, window_start, window_end, exclude_event_id):
+        """In-order search of the subtree over [lo, hi) for intervals overlapping the window."""
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        # Every interval in this subtree ends by max_ends[mid]; prune it if that is not after the window start
+        if self.max_ends[mid] <= window_start:
+            return
+        yield from self._search(lo, mid, window_start, window_end, exclude_event_id)
+        # Intervals are sorted by start, so from mid onwards nothing starts before the window ends
+        if self.starts[mid] >= window_end:
+            return
+        if self.ends[mid] > window_start and self.event_ids[mid] != exclude_event_id:
+            yield self.starts[mid], self.ends[mid], self.event_ids[mid]
+        yield from self._search(mid + 1, hi, window_start, window_end, exclude_event_id)
+
+def month_range(window_start, window_end):
+    """
+    Widen a window to whole UTC months, so nearby windows share one cached index.
+    :return: tuple of (first instant of window_start's month, first instant of the month after window_end's)
+    """
+    start = window_start.astimezone(dt_timezone.utc)
+    end = window_end.astimezone(dt_timezone.utc)
+    range_start = datetime(start.year, start.month, 1, tzinfo=dt_timezone.utc)
+    month = end.year * 12 + end.month  # months since year 0 up to the month after window_end's
+    if end == datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc):
+        month -= 1
+    range_end = datetime(month // 12, month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+    return range_start, range_end
+
+@timed_expansion(count=lambda indexes: sum(map(len, indexes.values())))
+def build_busy_indexes(user_ids, range_start, range_end):
+    """
+    Expand users' events into IntervalIndexes of their occurrences overlapping a range.
+    Uses two queries however many users and events there are, and the batch expander for series.
+    :return: dict of user id to IntervalIndex
+    """
+    # Flat rows instead of model instances: index builds touch thousands of events and need only these columns
+    rule_columns = [f'recurrence_rule__{field}' for field in RULE_TUPLE_FIELDS]
+    rows = (
+        Event.objects.filter(user_id__in=user_ids).filter(window_filter(range_start, range_end))
+        .values_list('pk', 'user_id', 'start_time', 'end_time', 'recurrence_rule_id', *rule_columns)
+    )
+    cancelled = {}
+    exceptions = OccurrenceException.objects.filter(
+        event__user_id__in=user_ids, event__start_time__lt=range_end, event__recurrence_rule__isnull=False,
+    ).values_list('event_id', 'start_time')
+    for event_id, start_time in exceptions:
+        cancelled.setdefault(event_id, set()).add(start_time.replace(microsecond=0))
+
+    intervals = {user_id: [] for user_id in user_ids}
+    series = []
+    specs = []
+    for pk, user_id, start_time, end_time, rule_id, *rule in rows:
+        if rule_id is None:
+            intervals[user_id].append((start_time, end_time, pk))
+            continue
+        # Same tuple as rule_to_tuple, whose end_date is an ISO string
+        rule[-1] = rule[-1].isoformat() if rule[-1] else None
+        series.append((pk, user_id))
+        specs.append((start_time, end_time, tuple(rule), range_start, range_end, cancelled.get(pk)))
+    for (pk, user_id), instances in zip(series, expand_many(specs)):
+        intervals[user_id].extend((start, end, pk) for start, end in instances)
+    return {user_id: IntervalIndex(user_intervals) for user_id, user_intervals in intervals.items()}
+
+def user_busy_indexes(user_ids, window_start, window_end):
+    """
+    Return {user id: IntervalIndex} of the users' occurrences covering [window_start, window_end).
+    Indexes are built over whole months and kept in the shared expansion cache until the
+    user's events change, so repeated free/busy and overlap queries skip the expansion;
+    the indexes missing from the cache are built together.
+    """
+    range_start, range_end = month_range(window_start, window_end)
+    keys = expansion_cache.keys(user_ids, 'busy-index', range_start.isoformat(), range_end.isoformat())
+    return expansion_cache.get_or_set_many(keys, lambda missing: build_busy_indexes(missing, range_start, range_end))
+
+def user_busy_index(user_id, window_start, window_end):
+    """Return the IntervalIndex of one user's occurrences covering [window_start, window_end)."""
+    return user_busy_indexes([user_id], window_start, window_end)[user_id]
@@ -0,0 +1,58 @@
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.availability import find_common_slots
+from events.benchmarking import bench_users, measure, seed_events
+from events.expansion_cache import expansion_cache
+
+class Command(BaseCommand):
+    """
+    Times the multi-user slot search over seeded benchmark users, with cold and warm index caches.
+    Seeds synthetic data first unless enough benchmark users exist, so run it against a dedicated database.
+    """
+    help = 'Benchmarks the find-slot engine for many users over a one-month window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users searched together.')
+        parser.add_argument('--events-per-user', type=int, default=200, help='Events seeded per user when seeding.')
+        parser.add_argument('--days', type=int, default=31, help='Length of the search window in days.')
+        parser.add_argument('--duration', type=int, default=30, help='Meeting length in minutes.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per scenario.')
+        parser.add_argument('--budget-ms', type=float, default=250, help='Interactive latency budget for the p95.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+
+    def handle(self, *args, **options):
+        if bench_users().count() < options['users']:
+            self.stdout.write(f"Seeding {options['users'] * options['events_per_user']} events for {options['users']} users...")
+            seed_events(options['users'] * options['events_per_user'], users=options['users'])
+        user_ids = list(bench_users().values_list('pk', flat=True)[:options['users']])
+        window_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        window_end = window_start + timedelta(days=options['days'])
+        duration = timedelta(minutes=options['duration'])
+
+        def search():
+            return find_common_slots(user_ids, window_start, window_end, duration, limit=5)
+
+        def cold_search():
+            # Moving every user to a new generation forces the interval indexes to be rebuilt
+            for user_id in user_ids:
+                expansion_cache.bump(user_id)
+            return search()
+
+        results = {
+            'users': len(user_ids),
+            'days': options['days'],
+            'cold': measure(cold_search, repeat=options['repeat'], warmup=1),
+            'warm': measure(search, repeat=options['repeat']),
+            'slots_found': len(search()),
+        }
+        for scenario in ('cold', 'warm'):
+            stats = results[scenario]
+            verdict = self.style.SUCCESS('within budget') if stats['p95_ms'] <= options['budget_ms'] else self.style.ERROR('over budget')
+            self.stdout.write(f"{scenario:<5} median {stats['median_ms']} ms, p95 {stats['p95_ms']} ms ({verdict})")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,58 @@
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from events.benchmarking import bench_users, explain, measure, seed_events
+from events.models import Event, OccurrenceException
+
+class Command(BaseCommand):
+    """
+    Prints query plans and latencies for the event and exception hot-path queries.
+    Seeds synthetic data first, so run it against a dedicated benchmark database.
+    """
+    help = 'Seeds synthetic events and reports EXPLAIN plans and latencies for the hot-path queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1_000_000, help='Total number of events to seed.')
+        parser.add_argument('--users', type=int, default=1000, help='Number of users the events are spread across.')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded benchmark data.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+
+    def handle(self, *args, **options):
+        if not options['skip_seed']:
+            self.stdout.write(f"Seeding {options['events']} events across {options['users']} users...")
+            seed_events(options['events'], users=options['users'])
+        user = bench_users().first()
+        if user is None:
+            raise CommandError('No benchmark data found; run without --skip-seed first.')
+        series = Event.objects.filter(user=user, recurrence_rule__isnull=False).first()
+        exception = OccurrenceException.objects.filter(event__user=user).first()
+        window_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        window_end = window_start + timedelta(days=31)
+
+        queries = {
+            'list_events': Event.objects.filter(user=user).select_related('recurrence_rule'),
+            'window_by_start': Event.objects.filter(user=user, start_time__gte=window_start, start_time__lt=window_end),
+            'window_by_end': Event.objects.filter(user=user, end_time__gt=window_start, end_time__lte=window_end),
+            'event_exceptions': OccurrenceException.objects.filter(event=series),
+            'exception_match': OccurrenceException.objects.filter(
+                event_id=exception.event_id if exception else None,
+                start_time=exception.start_time if exception else window_start,
+            ),
+        }
+
+        results = {'vendor': connection.vendor, 'events': Event.objects.count(), 'queries': {}}
+        for name, queryset in queries.items():
+            plan = explain(queryset)
+            stats = measure(lambda: list(queryset.all()), repeat=options['repeat'])
+            results['queries'][name] = {'plan': plan, **stats}
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            self.stdout.write(f"median {stats['median_ms']} ms, p95 {stats['p95_ms']} ms\n")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
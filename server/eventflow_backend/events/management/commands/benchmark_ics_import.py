@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from events.benchmarking import summarize, write_synthetic_ics
+from events.icalendar import import_calendar
+from events.models import Event
+
+BENCH_IMPORT_USER = 'bench-import'
+
+class Command(BaseCommand):
+    """
+    Measures iCalendar import throughput and peak memory on a synthetic file, importing it for a dedicated
+    user and deleting the imported rows after each run. Run it against a dedicated database.
+    """
+    help = 'Benchmarks the iCalendar import pipeline on a synthetic .ics file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000, help='Number of VEVENTs in the synthetic file.')
+        parser.add_argument('--recurring-ratio', type=float, default=0.2, help='Share of VEVENTs with an RRULE.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of events written per bulk insert.')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed imports.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_IMPORT_USER, defaults={'password': '!'})
+        with tempfile.NamedTemporaryFile(suffix='.ics', delete=False) as fh:
+            write_synthetic_ics(fh, options['events'], recurring_ratio=options['recurring_ratio'])
+        size = os.path.getsize(fh.name)
+        samples = []
+        try:
+            # An untimed warm-up import measures the pipeline's own peak allocations
+            self.clear(user)
+            tracemalloc.start()
+            with open(fh.name, 'rb') as source:
+                import_calendar(source, user, batch_size=options['batch_size'])
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+            tracemalloc.stop()
+            for run in range(options['repeat']):
+                self.clear(user)
+                started = time.perf_counter()
+                with open(fh.name, 'rb') as source:
+                    stats = import_calendar(source, user, batch_size=options['batch_size'])
+                samples.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(f"run {run + 1}: {stats['events'] / samples[-1] * 1000:.0f} events/s")
+        finally:
+            os.unlink(fh.name)
+            self.clear(user)
+
+        latency = summarize(samples)
+        results = {
+            'events': options['events'],
+            'file_mb': round(size / 1e6, 1),
+            'import': latency,
+            'events_per_second': round(options['events'] / latency['median_ms'] * 1000),
+            'counts': stats,
+            'import_peak_mb': peak_mb,
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"{results['events_per_second']} events/s median over {len(samples)} imports of a "
+            f"{results['file_mb']} MB file; {stats['rules']} distinct rules for {stats['series']} series; "
+            f"peak import memory {peak_mb} MB."
+        ))
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(results, out, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def clear(self, user):
+        """Deletes the events imported for the benchmark user; their interned rules are shared and kept."""
+        Event.objects.filter(user=user).delete()
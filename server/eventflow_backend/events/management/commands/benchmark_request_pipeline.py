@@ -0,0 +1,75 @@
+import json
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from events.benchmarking import measure
+from users.authentication import user_cache
+
+# Django's stock browser middleware, which every API request ran before the API profile
+FULL_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+]
+
+class Command(BaseCommand):
+    """
+    Times an authenticated API request through the whole Django handler under four profiles:
+    the full browser middleware stack, the API middleware profile, the API profile with the
+    cached JWT user resolver, and the latter with per-request metrics recording. The request
+    hits a view that does no work of its own, so the differences are the pipeline overhead.
+    """
+    help = 'Benchmarks the per-request cost of the middleware stack, JWT user lookup and metrics recording.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/users/me/', help='Authenticated GET endpoint to request.')
+        parser.add_argument('--repeat', type=int, default=2000, help='Timed requests per profile.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='bench-api')
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+        profiles = {
+            'full_stack': {'MIDDLEWARE': FULL_MIDDLEWARE, 'EVENTFLOW_AUTH_USER_CACHE_SECONDS': 0},
+            'api_profile': {'MIDDLEWARE': settings.MIDDLEWARE, 'EVENTFLOW_AUTH_USER_CACHE_SECONDS': 0, 'EVENTFLOW_METRICS': False},
+            'api_profile_cached_user': {'MIDDLEWARE': settings.MIDDLEWARE, 'EVENTFLOW_AUTH_USER_CACHE_SECONDS': 60, 'EVENTFLOW_METRICS': False},
+            'api_profile_cached_user_metrics': {'MIDDLEWARE': settings.MIDDLEWARE, 'EVENTFLOW_AUTH_USER_CACHE_SECONDS': 60, 'EVENTFLOW_METRICS': True},
+        }
+
+        results = {'path': options['path'], 'profiles': {}}
+        for name, overrides in profiles.items():
+            user_cache.clear()
+            with override_settings(ALLOWED_HOSTS=['*'], **overrides):
+                # A new client loads the middleware chain from the overridden settings
+                client = Client()
+
+                def request():
+                    response = client.get(options['path'], **headers)
+                    assert response.status_code == 200, response.status_code
+
+                stats = measure(request, repeat=options['repeat'], warmup=10)
+                with CaptureQueriesContext(connection) as queries:
+                    request()
+            results['profiles'][name] = {**stats, 'queries': len(queries)}
+
+        baseline = results['profiles']['full_stack']['median_ms']
+        for name, stats in results['profiles'].items():
+            saved = round((baseline - stats['median_ms']) * 1000, 1)
+            self.stdout.write(
+                f"{name:<32} median {stats['median_ms']} ms, p95 {stats['p95_ms']} ms, "
+                f"{stats['queries']} queries, {saved} us saved per request"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
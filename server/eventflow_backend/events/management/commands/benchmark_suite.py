@@ -0,0 +1,134 @@
+import json
+import platform
+from datetime import timedelta
+from itertools import count
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from events.benchmarking import SEED_RULES, bench_users, compare_results, measure, seed_events
+from events.expansion_cache import expansion_cache
+from events.models import Event
+from events.recurrence_utils import compiled_rule_cache, expand_recurrence
+
+class Command(BaseCommand):
+    """
+    Runs the performance regression suite: recurrence expansion on its own, then the list,
+    occurrences, calendar, create and delete-occurrence endpoints at several data sizes.
+    Benchmark data is seeded up to each size in turn, so run it against a dedicated database
+    (e.g. DB_ENGINE=sqlite DB_NAME=bench.sqlite3, or a local PostgreSQL). Occurrence and calendar
+    reads bypass the expansion cache, so they time the expansion itself.
+    Write the results with --output, and pass an earlier run's file as --baseline to fail on regressions.
+    """
+    help = 'Benchmarks expansion and the main event endpoints at several data sizes, optionally against a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Total benchmark events to measure at.')
+        parser.add_argument('--users', type=int, default=100, help='Number of benchmark users the events are spread across.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per scenario.')
+        parser.add_argument('--reset', action='store_true', help='Delete existing benchmark users and their events first.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+        parser.add_argument('--baseline', help='Results file of an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Relative slowdown of a median counted as a regression.')
+        parser.add_argument('--min-delta-ms', type=float, default=0.5, help='Smallest absolute slowdown counted as a regression.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            bench_users().delete()
+        sizes = sorted(set(options['sizes']))
+        seeded = Event.objects.filter(user__in=bench_users()).count()
+        if seeded > sizes[0]:
+            raise CommandError(f'{seeded} benchmark events already exist, more than the smallest size; pass --reset.')
+
+        scenarios = {'expand_recurrence': measure(self.expand_all_patterns, repeat=options['repeat'])}
+        for size in sizes:
+            if seeded < size:
+                self.stdout.write(f'Seeding up to {size} events...')
+                seed_events(size - seeded, users=options['users'], seed=size)
+                seeded = size
+            for name, stats in self.run_endpoints(options['repeat']).items():
+                scenarios[f'{name}@{size}'] = stats
+
+        results = {
+            'vendor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'started': timezone.now().isoformat(),
+            'users': options['users'],
+            'scenarios': scenarios,
+        }
+        for name, stats in scenarios.items():
+            self.stdout.write(f"{name:<28} median {stats['median_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            if baseline.get('vendor') != results['vendor']:
+                self.stdout.write(self.style.WARNING(f"Baseline ran on {baseline.get('vendor')}, this run on {results['vendor']}."))
+            rows = compare_results(scenarios, baseline['scenarios'], options['tolerance'], options['min_delta_ms'])
+            for row in rows:
+                line = f"{row['scenario']:<28} {row['baseline_ms']:>9} -> {row['current_ms']:>9} ms  {row['change']:+.1%}"
+                self.stdout.write(self.style.ERROR(line) if row['regressed'] else line)
+            regressed = [row['scenario'] for row in rows if row['regressed']]
+            if regressed:
+                raise CommandError(f"{len(regressed)} scenarios regressed beyond {options['tolerance']:.0%}: {', '.join(regressed)}")
+            self.stdout.write(self.style.SUCCESS(f'No regressions across {len(rows)} scenarios.'))
+
+    def expand_all_patterns(self):
+        """Expands 100 instances of every seeded recurrence pattern."""
+        start = timezone.now()
+        for _, rule in SEED_RULES:
+            expand_recurrence(start, start + timedelta(hours=1), rule, count=100)
+
+    def run_endpoints(self, repeat):
+        """
+        Times the event endpoints as the first benchmark user, who holds 1/users of the events.
+        :return: dict of scenario name to latency statistics
+        """
+        user = bench_users().first()
+        series = Event.objects.filter(user=user, recurrence_rule__isnull=False).select_related('recurrence_rule').first()
+        if series is None:
+            raise CommandError('The first benchmark user has no recurring events; seed more events.')
+        client = APIClient()
+        client.force_authenticate(user)
+        window_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        window = {'start': window_start.isoformat(), 'end': (window_start + timedelta(days=35)).isoformat()}
+        # Every delete needs an occurrence that has not been cancelled yet
+        instances = iter(expand_recurrence(series.start_time, series.end_time, compiled_rule_cache.get(series.recurrence_rule), count=repeat + 100))
+        created = count()
+
+        def get(path, params=None, uncached=False):
+            def request():
+                if uncached:
+                    expansion_cache.bump(user.pk)
+                response = client.get(path, params)
+                assert response.status_code == 200, (path, response.status_code)
+            return request
+
+        def create():
+            index = next(created)
+            start = window_start + timedelta(hours=index)
+            payload = {'title': f'Benchmark {index}', 'start_time': start.isoformat(), 'end_time': (start + timedelta(minutes=30)).isoformat()}
+            if index % 2:
+                payload['recurrence_rule'] = {'frequency': 'WEEKLY', 'interval': 1, 'weekdays': 'MO,WE'}
+            response = client.post('/api/events/', payload, format='json')
+            assert response.status_code == 201, response.status_code
+
+        def delete_occurrence():
+            start, _ = next(instances)
+            response = client.post(f'/api/events/{series.pk}/occurrences/delete/', {'start_time': start.isoformat()}, format='json')
+            assert response.status_code == 204, response.status_code
+
+        return {
+            'list': measure(get('/api/events/'), repeat=repeat),
+            'occurrences': measure(get(f'/api/events/{series.pk}/occurrences/', {'count': 50}, uncached=True), repeat=repeat),
+            'calendar': measure(get('/api/events/calendar/', window, uncached=True), repeat=repeat),
+            'create': measure(create, repeat=repeat),
+            'delete_occurrence': measure(delete_occurrence, repeat=repeat),
+        }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from events.materialization import current_horizon, extend_horizon
+from events.models import Event
+
+class Command(BaseCommand):
+    """
+    Extends materialized EventOccurrence rows up to the rolling horizon.
+    Intended to run nightly when EVENTFLOW_MATERIALIZE_OCCURRENCES is enabled.
+    """
+    help = 'Extends materialized event occurrences up to the rolling horizon.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Regenerate every event from its start instead of only extending past the previous horizon.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of events processed per transaction.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            Event.objects.update(materialized_until=None)
+        horizon = current_horizon()
+        processed, created = extend_horizon(horizon, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Materialized {created} occurrences for {processed} events up to {horizon.isoformat()}.'
+        ))
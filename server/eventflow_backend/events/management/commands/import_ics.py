@@ -0,0 +1,39 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from events.icalendar import import_calendar
+
+class Command(BaseCommand):
+    """
+    Imports an iCalendar (.ics) file, e.g. an export from another calendar system, as a user's events.
+    The file is streamed and written in batches inside one transaction, so a failed import leaves nothing behind.
+    """
+    help = 'Imports the events of an iCalendar (.ics) file for a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the .ics file.')
+        parser.add_argument('--user', required=True, help='Username of the owner of the imported events.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of events written per bulk insert.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{stats['events']} events imported ({stats['events'] / elapsed:.0f} events/s)")
+
+        try:
+            with open(options['path'], 'rb') as fh:
+                stats = import_calendar(fh, user, batch_size=options['batch_size'], progress=progress)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['events']} events ({stats['series']} recurring, {stats['rules']} distinct rules, "
+            f"{stats['exceptions']} exceptions) in {elapsed:.1f} s; skipped {stats['skipped']}, "
+            f"{stats['unsupported_rules']} unsupported rules imported as single events."
+        ))
@@ -0,0 +1,114 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from events.benchmarking import bench_users, summarize
+from events.models import Event
+
+class Command(BaseCommand):
+    """
+    Load-tests running servers with concurrent keep-alive clients and compares throughput and tail latency.
+    Typical use is one WSGI (sync workers) and one ASGI (uvicorn workers) deployment of the same
+    code and database, e.g. --wsgi http://localhost:8000 --asgi http://localhost:8001. Any other
+    deployments of the sync API can be compared with --target, e.g. servers started with
+    DB_CONN_MAX_AGE=0, the default persistent connections, and DB_POOL=True.
+    Requests authenticate as the first benchmark user, so seed with benchmark_hot_queries first.
+    """
+    help = 'Compares throughput and tail latency of the event read endpoints on WSGI and ASGI servers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', help='Base URL of a server running eventflow_backend.wsgi.')
+        parser.add_argument('--asgi', help='Base URL of a server running eventflow_backend.asgi.')
+        parser.add_argument('--target', action='append', default=[], metavar='LABEL=URL', help='Labelled base URL of another server running the sync API; repeatable.')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50], help='Concurrent clients per run.')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and concurrency level.')
+        parser.add_argument('--output', help='Optional path to write the results as JSON.')
+
+    def handle(self, *args, **options):
+        if not options['wsgi'] and not options['asgi'] and not options['target']:
+            raise CommandError('Pass --wsgi, --asgi and/or --target.')
+        if any('=' not in target for target in options['target']):
+            raise CommandError('--target takes LABEL=URL.')
+        user = bench_users().first()
+        if user is None:
+            raise CommandError('No benchmark data found; run benchmark_hot_queries first.')
+        series = Event.objects.filter(user=user, recurrence_rule__isnull=False).first()
+        token = str(AccessToken.for_user(user))
+        window_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        window = urlencode({'start': window_start.isoformat(), 'end': (window_start + timedelta(days=35)).isoformat()})
+
+        # The sync endpoints live under /api/events/, their async counterparts under /api/async/events/
+        endpoints = {'list': '', 'calendar': f'calendar/?{window}'}
+        if series:
+            endpoints['occurrences'] = f'{series.pk}/occurrences/?count=50'
+        targets = []
+        if options['wsgi']:
+            targets.append(('wsgi', options['wsgi'], '/api/events/'))
+        if options['asgi']:
+            targets.append(('asgi', options['asgi'], '/api/async/events/'))
+        for target in options['target']:
+            label, base_url = target.split('=', 1)
+            targets.append((label, base_url, '/api/events/'))
+
+        results = []
+        width = max(len(server) for server, _, _ in targets)
+        for server, base_url, prefix in targets:
+            for endpoint, path in endpoints.items():
+                for concurrency in options['concurrency']:
+                    url = base_url.rstrip('/') + prefix + path
+                    stats = self.run(url, token, concurrency, options['requests'])
+                    results.append({'server': server, 'endpoint': endpoint, 'concurrency': concurrency, **stats})
+                    self.stdout.write(
+                        f"{server:<{width}} {endpoint:<12} c={concurrency:<4} {stats['throughput_rps']:>8} req/s  "
+                        f"p50 {stats['median_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms  "
+                        f"errors {stats['errors']}"
+                    )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, url, token, concurrency, total):
+        """
+        Sends total GET requests to url from concurrency threads, each reusing one connection.
+        :return: dict of latency statistics plus throughput and error count
+        """
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        target = parts.path + (f'?{parts.query}' if parts.query else '')
+        headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+        local = threading.local()
+        errors = []
+
+        def request(_):
+            if not hasattr(local, 'connection'):
+                local.connection = connection_class(parts.netloc, timeout=60)
+            started = time.perf_counter()
+            try:
+                local.connection.request('GET', target, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as exc:
+                errors.append(type(exc).__name__)
+                local.connection.close()
+                del local.connection
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+        return {
+            **summarize(samples),
+            'throughput_rps': round(total / elapsed, 1),
+            'errors': len(errors),
+        }
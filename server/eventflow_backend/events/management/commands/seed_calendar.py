@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from events.benchmarking import SEED_RULES, bench_users, seed_events
+from events.models import Event, OccurrenceException
+
+class Command(BaseCommand):
+    """
+    Seeds synthetic calendars for benchmarking and load testing: users named bench-user-N, each with
+    a mix of one-off events and DAILY/WEEKLY/MONTHLY/YEARLY and relative-day series with exceptions.
+    Seeding adds to any earlier benchmark data; pass --clear to start over.
+    """
+    help = 'Seeds synthetic users, events, recurring series and exceptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of benchmark users.')
+        parser.add_argument('--events-per-user', type=int, default=200, help='Events seeded per user.')
+        parser.add_argument('--recurring-ratio', type=float, default=0.2, help='Share of events that are recurring series.')
+        parser.add_argument('--exceptions-per-series', type=int, default=2, help='Cancelled occurrences per series.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data.')
+        parser.add_argument('--clear', action='store_true', help='Delete existing benchmark users and their events first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = bench_users().delete()
+            self.stdout.write(f'Deleted {deleted} benchmark rows.')
+        total = options['users'] * options['events_per_user']
+        self.stdout.write(f"Seeding {total} events for {options['users']} users...")
+        users = seed_events(
+            total,
+            users=options['users'],
+            recurring_ratio=options['recurring_ratio'],
+            exceptions_per_series=options['exceptions_per_series'],
+            seed=options['seed'],
+        )
+        events = Event.objects.filter(user__in=users)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(users)} users now have {events.count()} events, "
+            f"{events.filter(recurrence_rule__isnull=False).count()} of them series across {len(SEED_RULES)} patterns, "
+            f"and {OccurrenceException.objects.filter(event__user__in=users).count()} exceptions."
+        ))
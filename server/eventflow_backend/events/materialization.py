@@ -0,0 +1,134 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Q
+from django.utils import timezone
+from eventflow_backend.metrics import timed_expansion
+from .models import Event, EventOccurrence
+from .recurrence_utils import compiled_rule_cache, iter_window
+
+def materialization_enabled():
+    """Returns whether EventOccurrence rows are maintained and used for calendar reads."""
+    return getattr(settings, 'EVENTFLOW_MATERIALIZE_OCCURRENCES', False)
+
+def current_horizon(now=None):
+    """Returns the point in time occurrences are materialized up to, relative to now."""
+    now = now or timezone.now()
+    return now + timedelta(days=getattr(settings, 'EVENTFLOW_OCCURRENCE_HORIZON_DAYS', 548))
+
+@timed_expansion()
+def _build_rows(event, after, before):
+    """
+    Builds unsaved EventOccurrence rows for an event's instances starting in [after, before).
+    One-off events always get their single row, wherever it falls relative to the horizon.
+    """
+    if not event.recurrence_rule:
+        return [EventOccurrence(event=event, user_id=event.user_id, start_time=event.start_time, end_time=event.end_time)]
+    exception_times = {exc.start_time.replace(microsecond=0) for exc in event.exceptions.all()}
+    rule = compiled_rule_cache.get(event.recurrence_rule)
+    return [
+        EventOccurrence(event=event, user_id=event.user_id, start_time=start_dt, end_time=end_dt)
+        for start_dt, end_dt in iter_window(event.start_time, event.end_time, rule, after, before)
+        if start_dt.replace(microsecond=0) not in exception_times
+    ]
+
+def retention_cutoff(now=None):
+    """Returns the point in time before which refreshes leave a series' materialized occurrences as they are."""
+    now = now or timezone.now()
+    return now - timedelta(days=getattr(settings, 'EVENTFLOW_OCCURRENCE_RETENTION_DAYS', 90))
+
+def refresh_event_occurrences(event, horizon=None):
+    """
+    Regenerates the materialized occurrences of a single event up to the horizon.
+    Called whenever the event, its recurrence rule or its exceptions change (see signals). A series
+    materialized before is only regenerated from the retention cutoff on, keeping older rows as
+    history, so editing a long-running series does not rewrite all its past; new series and
+    one-off events are generated in full.
+    """
+    horizon = horizon or current_horizon()
+    after = event.start_time
+    stale = EventOccurrence.objects.filter(event=event)
+    if event.recurrence_rule_id and event.materialized_until is not None:
+        cutoff = retention_cutoff()
+        after = max(after, cutoff)
+        stale = stale.filter(start_time__gte=cutoff)
+    with transaction.atomic():
+        stale.delete()
+        EventOccurrence.objects.bulk_create(_build_rows(event, after, horizon), batch_size=1000)
+        event.materialized_until = horizon
+        Event.objects.filter(pk=event.pk).update(materialized_until=horizon)
+
+def remove_materialized_occurrence(event, start_time):
+    """Deletes the materialized row of an occurrence that has just been excluded; event may be an Event or its pk."""
+    EventOccurrence.objects.filter(event=event, start_time=start_time.replace(microsecond=0)).delete()
+
+def extend_horizon(horizon=None, batch_size=500):
+    """
+    Extends every event's materialized occurrences up to the horizon.
+    Only instances between an event's previous horizon and the new one are generated;
+    events that were never materialized are refreshed in full.
+    :return: tuple of (events processed, rows created)
+    """
+    horizon = horizon or current_horizon()
+    events = (
+        Event.objects
+        .filter(Q(materialized_until__isnull=True) | Q(recurrence_rule__isnull=False, materialized_until__lt=horizon))
+        .select_related('recurrence_rule')
+        .prefetch_related('exceptions')
+        .order_by('pk')
+    )
+    processed = created = 0
+    last_pk = 0
+    while True:
+        batch = list(events.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            rows = []
+            for event in batch:
+                if event.materialized_until is None:
+                    EventOccurrence.objects.filter(event=event).delete()
+                    after = event.start_time
+                else:
+                    after = event.materialized_until
+                rows.extend(_build_rows(event, after, horizon))
+            EventOccurrence.objects.bulk_create(rows, batch_size=1000)
+            Event.objects.filter(pk__in=[event.pk for event in batch]).update(materialized_until=horizon)
+        processed += len(batch)
+        created += len(rows)
+        last_pk = batch[-1].pk
+    return processed, created
+
+def materialized_window(user, window_start, window_end):
+    """
+    Reads the occurrences overlapping [window_start, window_end) from the materialized table.
+    Returns None when any of the user's events is not materialized far enough to cover the window,
+    in which case the caller must fall back to expanding the rules.
+    :return: list of (event_id, title, start, end, is_recurring) tuples, or None
+    """
+    summary = Event.objects.filter(user=user).aggregate(
+        longest=Max(ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField())),
+        stale=Count('pk', filter=Q(materialized_until__isnull=True) | Q(
+            recurrence_rule__isnull=False, materialized_until__lt=window_end,
+        )),
+    )
+    if summary['stale']:
+        return None
+    if summary['longest'] is None:
+        return []
+    # Bounding start_time on both sides keeps this a single (user, start_time) index range scan
+    rows = (
+        EventOccurrence.objects
+        .filter(
+            user=user,
+            start_time__gt=window_start - summary['longest'],
+            start_time__lt=window_end,
+            end_time__gt=window_start,
+        )
+        .order_by('start_time', 'event_id')
+        .values_list('event_id', 'event__title', 'start_time', 'end_time', 'event__recurrence_rule_id')
+    )
+    return [
+        (event_id, title, start_time, end_time, rule_id is not None)
+        for event_id, title, start_time, end_time, rule_id in rows
+    ]
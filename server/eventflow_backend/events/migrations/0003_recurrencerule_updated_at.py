@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_occurrenceexception'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurrencerule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='relative_day',
+            field=models.CharField(blank=True, help_text='e.g., 1MO for first Monday, -1SU for last Sunday, for monthly recurrences (US-05)', max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='weekdays',
+            field=models.CharField(blank=True, help_text='Comma-separated weekdays (e.g., MON,TUE) for weekly recurrences (US-04)', max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_exceptions(apps, schema_editor):
+    """Keeps the oldest of any duplicate (event, start_time) exceptions so the unique constraint can be added."""
+    OccurrenceException = apps.get_model('events', 'OccurrenceException')
+    duplicates = (
+        OccurrenceException.objects.values('event_id', 'start_time')
+        .annotate(keep=Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        OccurrenceException.objects.filter(
+            event_id=duplicate['event_id'], start_time=duplicate['start_time'],
+        ).exclude(id=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_eventoccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # The composite indexes are created before the single-column FK indexes they replace are dropped
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'start_time'], name='events_event_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'end_time'], name='events_event_user_end_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_exceptions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='occurrenceexception',
+            constraint=models.UniqueConstraint(fields=('event', 'start_time'), name='events_exception_event_start_uniq'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='eventoccurrence',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='event_occurrences', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='occurrenceexception',
+            name='event',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='exceptions', to='events.event'),
+        ),
+    ]
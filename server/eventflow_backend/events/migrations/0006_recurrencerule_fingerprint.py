@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+import hashlib
+
+from django.db import migrations, models
+
+# Frozen copies of events.recurrence_utils as of this migration, so later changes to rule
+# normalization or fingerprinting cannot change what it computes. Unlike the live version,
+# normalize_rule here also repairs legacy zero intervals to 1.
+RULE_TUPLE_FIELDS = ('frequency', 'interval', 'weekdays', 'relative_day', 'end_date')
+WEEKDAY_INDEX = {code: index for index, code in enumerate(('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'))}
+
+
+def normalize_rule(rule):
+    """Returns a rule's pattern fields with weekdays ordered Monday first and blank optional fields as None."""
+    weekdays = rule.get('weekdays')
+    if weekdays:
+        codes = {code.strip() for code in weekdays.split(',') if code.strip()}
+        weekdays = ','.join(sorted(codes, key=lambda code: (WEEKDAY_INDEX.get(code, len(WEEKDAY_INDEX)), code)))
+    return {
+        'frequency': rule.get('frequency'),
+        'interval': rule.get('interval') or 1,
+        'weekdays': weekdays or None,
+        'relative_day': rule.get('relative_day') or None,
+        'end_date': rule.get('end_date') or None,
+    }
+
+
+def rule_fingerprint(rule):
+    """Returns the SHA-256 hex digest of a rule's normalized pattern fields."""
+    normalized = normalize_rule(rule)
+    canonical = '|'.join('' if normalized[field] is None else str(normalized[field]) for field in RULE_TUPLE_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def merge_duplicate_rules(apps, schema_editor):
+    """
+    Fingerprints every rule and merges rules with identical patterns into the oldest one,
+    repointing their events, so the unique constraint can be added.
+    """
+    RecurrenceRule = apps.get_model('events', 'RecurrenceRule')
+    Event = apps.get_model('events', 'Event')
+    kept = {}
+    duplicates = {}
+    for rule in RecurrenceRule.objects.order_by('pk').iterator():
+        fields = normalize_rule({field: getattr(rule, field) for field in RULE_TUPLE_FIELDS})
+        fingerprint = rule_fingerprint(fields)
+        if fingerprint in kept:
+            duplicates.setdefault(kept[fingerprint], []).append(rule.pk)
+            continue
+        kept[fingerprint] = rule.pk
+        RecurrenceRule.objects.filter(pk=rule.pk).update(fingerprint=fingerprint, **fields)
+    for keep, merged in duplicates.items():
+        Event.objects.filter(recurrence_rule_id__in=merged).update(recurrence_rule_id=keep)
+        RecurrenceRule.objects.filter(pk__in=merged).delete()
+
+
+class Migration(migrations.Migration):
+    # PostgreSQL cannot alter a table with pending deferred FK checks, which repointing events leaves
+    # behind, so the data step commits in its own transaction before the unique index is built
+    atomic = False
+
+    dependencies = [
+        ('events', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurrencerule',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_rules, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='fingerprint',
+            field=models.CharField(editable=False, help_text='SHA-256 of the normalized pattern fields, identifying identical rules', max_length=64, unique=True),
+        ),
+    ]
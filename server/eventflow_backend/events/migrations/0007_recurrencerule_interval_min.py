@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_recurrencerule_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='interval',
+            field=models.PositiveIntegerField(default=1, help_text='Interval between recurrences', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
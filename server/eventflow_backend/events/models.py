@@ -1,11 +1,45 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
+from .recurrence_utils import RULE_TUPLE_FIELDS, normalize_rule, rule_fingerprint
+
+class RecurrenceRuleManager(models.Manager):
+    """
+    Manager that interns recurrence rules: events with the same pattern share one row, found by
+    the fingerprint of its normalized fields. Interned rows are shared, so writes never edit them;
+    an event whose pattern changes is pointed at the interned row for its new pattern instead.
+    """
+
+    def intern(self, **fields):
+        """Returns the rule with the given pattern fields, creating it on first use."""
+        fields = normalize_rule(fields)
+        rule, _ = self.get_or_create(fingerprint=rule_fingerprint(fields), defaults=fields)
+        return rule
+
+    def intern_many(self, rules):
+        """
+        Interns many rules with at most three queries, however many events use them.
+        :param rules: iterable of dicts of pattern fields
+        :return: dict of fingerprint to RecurrenceRule
+        """
+        pending = {}
+        for fields in rules:
+            fields = normalize_rule(fields)
+            pending[rule_fingerprint(fields)] = fields
+        interned = self.in_bulk(list(pending), field_name='fingerprint')
+        missing = [self.model(fingerprint=fingerprint, **fields) for fingerprint, fields in pending.items() if fingerprint not in interned]
+        if missing:
+            # Concurrent writers may intern the same rules; the unique fingerprint keeps one row each
+            self.bulk_create(missing, ignore_conflicts=True)
+            interned.update(self.in_bulk([rule.fingerprint for rule in missing], field_name='fingerprint'))
+        return interned
 
 class RecurrenceRule(models.Model):
     """
     Model representing a recurrence rule for events.
     Supports standard recurrence patterns (US-02), intervals (US-03),
     weekday selection (US-04), and relative-date patterns (US-05).
+    Rules are content-addressed and shared between events; create them with objects.intern.
     """
     FREQUENCY_CHOICES = [
         ('DAILY', 'Daily'),
@@ -14,7 +48,7 @@ class RecurrenceRule(models.Model):
         ('YEARLY', 'Yearly'),
     ]
     frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
-    interval = models.PositiveIntegerField(default=1, help_text='Interval between recurrences')
+    interval = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)], help_text='Interval between recurrences')
     weekdays = models.CharField(
         max_length=20, blank=True, null=True,
         help_text='Comma-separated weekdays (e.g., MON,TUE) for weekly recurrences (US-04)'
@@ -24,11 +58,26 @@ class RecurrenceRule(models.Model):
         help_text='e.g., 1MO for first Monday, -1SU for last Sunday, for monthly recurrences (US-05)'
     )
     end_date = models.DateField(blank=True, null=True)
+    fingerprint = models.CharField(
+        max_length=64, unique=True, editable=False,
+        help_text='SHA-256 of the normalized pattern fields, identifying identical rules'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RecurrenceRuleManager()
 
     def __str__(self):
         """Returns a string representation of the recurrence rule."""
         return f"{self.frequency} every {self.interval} (ends {self.end_date})"
 
+    def save(self, *args, **kwargs):
+        """Normalizes the pattern fields and keeps the fingerprint in step with them."""
+        fields = normalize_rule({field: getattr(self, field) for field in RULE_TUPLE_FIELDS})
+        for field, value in fields.items():
+            setattr(self, field, value)
+        self.fingerprint = rule_fingerprint(fields)
+        super().save(*args, **kwargs)
+
 class Event(models.Model):
     """
     Model representing an event with optional recurrence.
@@ -38,7 +87,8 @@ class Event(models.Model):
     title = models.CharField(max_length=255)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events')
+    # Covered by the (user, start_time) index below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events', db_index=False)
     recurrence_rule = models.ForeignKey(
         RecurrenceRule, on_delete=models.SET_NULL, blank=True, null=True, related_name='events'
     )
@@ -46,6 +96,16 @@ class Event(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    materialized_until = models.DateTimeField(
+        blank=True, null=True, editable=False,
+        help_text='Horizon up to which EventOccurrence rows have been generated for this event'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='events_event_user_start_idx'),
+            models.Index(fields=['user', 'end_time'], name='events_event_user_end_idx'),
+        ]
 
     def __str__(self):
         """Returns the event's title as its string representation."""
@@ -56,9 +116,36 @@ class OccurrenceException(models.Model):
     Model representing an exception to a recurring event's occurrence.
     Used to mark specific occurrences as deleted (US-09).
     """
-    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='exceptions')
+    # Covered by the (event, start_time) unique constraint below
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='exceptions', db_index=False)
     start_time = models.DateTimeField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'start_time'], name='events_exception_event_start_uniq'),
+        ]
+
     def __str__(self):
         """Returns a string representation of the occurrence exception."""
-        return f"Exception for '{self.event.title}' at {self.start_time.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"Exception for '{self.event.title}' at {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+
+class EventOccurrence(models.Model):
+    """
+    Model representing a pre-expanded occurrence of an event.
+    Rows are generated up to a rolling horizon when occurrence materialization is enabled,
+    so calendar windows (US-06) can be read with an index range scan instead of expansion.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='materialized_occurrences')
+    # Covered by the (user, start_time) index below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_occurrences', db_index=False)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='events_occ_user_start_idx'),
+        ]
+
+    def __str__(self):
+        """Returns a string representation of the materialized occurrence."""
+        return f"Occurrence of event {self.event_id} at {self.start_time.strftime('%Y-%m-%d %H:%M')}"
@@ -0,0 +1,141 @@
+import heapq
+from datetime import timedelta
+from itertools import islice
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from dateutil.parser import parse
+from eventflow_backend.metrics import timed_expansion
+from .recurrence_utils import compiled_rule_cache, expand_many, iter_window, rule_to_tuple
+
+def serialize_occurrence(event_id, title, start, end, is_recurring):
+    """
+    Builds the flat occurrence dict returned by the occurrences and calendar endpoints.
+    :return: dict with keys: id, title, start, end, is_recurring_instance
+    """
+    return {
+        'id': event_id,
+        'title': title,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'is_recurring_instance': is_recurring,
+    }
+
+def parse_window_bound(value):
+    """Parses a calendar window bound, treating naive values as being in the default time zone."""
+    dt = parse(value)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+# Upper bound on the occurrences a single request can ask a series to expand
+MAX_OCCURRENCES = 1000
+
+def parse_count(value, default=10):
+    """
+    Parses an occurrences 'count' query parameter, clamping it to MAX_OCCURRENCES.
+    :param value: the raw parameter, or None when it was not passed
+    :return: int between 1 and MAX_OCCURRENCES
+    :raises ValueError: when the value is not a positive integer
+    """
+    count = default if value is None else int(value)
+    if count < 1:
+        raise ValueError('count must be positive')
+    return min(count, MAX_OCCURRENCES)
+
+def max_window():
+    """Returns the longest window the calendar-style endpoints expand, from EVENTFLOW_MAX_WINDOW_DAYS."""
+    return timedelta(days=getattr(settings, 'EVENTFLOW_MAX_WINDOW_DAYS', 366))
+
+def window_too_long(window_start, window_end):
+    """Returns whether a window spans more than max_window()."""
+    return window_end - window_start > max_window()
+
+def window_filter(window_start, window_end):
+    """
+    Returns the filter selecting the events that can have occurrences overlapping a window.
+    One-off events must overlap the window; series only need to have started before it ends.
+    """
+    return Q(start_time__lt=window_end) & (Q(recurrence_rule__isnull=False) | Q(end_time__gt=window_start))
+
+def exception_times_of(exceptions):
+    """Returns the set of cancelled instance starts, truncated to the second as instances are matched."""
+    return {exc.start_time.replace(microsecond=0) for exc in exceptions}
+
+@timed_expansion()
+def expand_series(event, exception_times, after, before=None, count=10):
+    """
+    Serializes up to count instances of a recurring event starting in [after, before).
+    :param event: Event with its recurrence_rule loaded
+    :param exception_times: set of cancelled instance starts, see exception_times_of
+    :return: list of occurrence dicts
+    """
+    # Reuse the compiled recurrence rule unless the rule changed since it was cached
+    rule = compiled_rule_cache.get(event.recurrence_rule)
+    data = []
+    for start_dt, end_dt in iter_window(event.start_time, event.end_time, rule, after, before):
+        if start_dt.replace(microsecond=0) not in exception_times:
+            data.append(serialize_occurrence(event.id, event.title, start_dt, end_dt, True))
+        if len(data) >= count:
+            break
+    return data
+
+@timed_expansion()
+def expand_window(events, exception_times, window_start, window_end):
+    """
+    Serializes every occurrence overlapping [window_start, window_end), sorted by start and event id.
+    :param events: iterable of Events (recurrence_rule loaded) selected with window_filter
+    :param exception_times: callable returning an event's set of cancelled instance starts
+    :return: list of occurrence dicts
+    """
+    instances = []
+    series = []
+    for event in events:
+        if event.recurrence_rule:
+            series.append(event)
+        else:
+            instances.append((event.start_time, event.end_time, event, False))
+
+    # Large batches of series are expanded across the process pool, exceptions excluded there
+    expanded = expand_many(
+        (event.start_time, event.end_time, rule_to_tuple(event.recurrence_rule), window_start, window_end, exception_times(event))
+        for event in series
+    )
+    for event, windows in zip(series, expanded):
+        instances.extend((start_dt, end_dt, event, True) for start_dt, end_dt in windows)
+
+    instances.sort(key=lambda instance: (instance[0], instance[2].id))
+    return [
+        serialize_occurrence(event.id, event.title, start_dt, end_dt, is_recurring)
+        for start_dt, end_dt, event, is_recurring in instances
+    ]
+
+def _upcoming_instances(event, cancelled, now):
+    """Lazily yields the instances of a series that end after now, as merge keys, skipping cancelled ones."""
+    rule = compiled_rule_cache.get(event.recurrence_rule)
+    duration = event.end_time - event.start_time
+    # Starting one duration back picks up the instance in progress, if any
+    for start_dt, end_dt in iter_window(event.start_time, event.end_time, rule, now - duration):
+        if end_dt > now and start_dt.replace(microsecond=0) not in cancelled:
+            yield start_dt, event.id, end_dt, event
+
+@timed_expansion()
+def upcoming_occurrences(one_offs, series, exception_times, now, limit):
+    """
+    Serializes the next occurrences that have not ended by now, across one-off and recurring events.
+    Each series gets a lazy generator and a heap merge pulls from them only until `limit` occurrences
+    are found, so the cost is O(limit log S) for S series after opening them, rather than expanding
+    every series in full.
+    :param one_offs: iterable of one-off Events ending after now, sorted by start time and id
+    :param series: iterable of recurring Events with their recurrence_rule loaded
+    :param exception_times: dict of event id to its set of cancelled instance starts, see exception_times_of
+    :param now: datetime, occurrences ending at or before it are skipped
+    :param limit: int, maximum number of occurrences to return
+    :return: list of occurrence dicts sorted by start and event id
+    """
+    streams = [((event.start_time, event.id, event.end_time, event) for event in one_offs)]
+    streams.extend(_upcoming_instances(event, exception_times.get(event.id, ()), now) for event in series)
+    return [
+        serialize_occurrence(event.id, event.title, start_dt, end_dt, event.recurrence_rule_id is not None)
+        for start_dt, _, end_dt, event in islice(heapq.merge(*streams), limit)
+    ]
@@ -0,0 +1,92 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from dateutil.parser import isoparse
+
+class EventKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over events ordered by (start_time, id).
+    Each page is an index range scan that starts after the last row of the previous page,
+    so deep pages cost the same as the first one. Pagination is opt-in: it only applies
+    when the request carries a 'cursor' or 'page_size' parameter, and the plain list
+    response is returned otherwise.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        """Returns whether the client asked for a paginated response."""
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def get_page_size(self, request):
+        """Returns the requested page size, clamped to [1, max_page_size]."""
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, event):
+        """Encodes the position just after an event (model instance or `.values()` row) as an opaque cursor string."""
+        if isinstance(event, dict):
+            start_time, pk = event['start_time'], event['id']
+        else:
+            start_time, pk = event.start_time, event.pk
+        return urlsafe_b64encode(f'{start_time.isoformat()}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        """Decodes a cursor string into a (start_time, id) position."""
+        try:
+            start_time, pk = urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+            return isoparse(start_time), int(pk)
+        except (ValueError, TypeError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Returns the page of events after the request's cursor, or None if pagination was not requested."""
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        queryset = queryset.order_by('start_time', 'pk')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            start_time, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(start_time__gt=start_time) | Q(start_time=start_time, pk__gt=pk))
+        # Fetch one extra row to learn whether a next page exists
+        page = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(page) > self.page_size_value
+        page = page[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        """Returns the URL of the next page, or None on the last page."""
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        """Wraps a page of serialized events with the link to the next page."""
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        """Describes the paginated response for schema generation."""
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
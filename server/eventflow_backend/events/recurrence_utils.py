@@ -1,8 +1,23 @@
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+import hashlib
+from itertools import islice
+import multiprocessing
+import os
+import re
+from threading import Lock
 from dateutil.rrule import rrule, rruleset, DAILY, WEEKLY, MONTHLY, YEARLY, MO, TU, WE, TH, FR, SA, SU
 from dateutil.relativedelta import relativedelta
 from dateutil.parser import parse
 
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is an optional speedup
+    numpy = None
+
 WEEKDAY_MAP = {
     'MO': MO,
     'TU': TU,
@@ -20,42 +35,440 @@ FREQ_MAP = {
     'YEARLY': YEARLY,
 }
 
+# Monday-first position of each weekday code, for canonical weekday lists
+WEEKDAY_INDEX = {code: index for index, code in enumerate(WEEKDAY_MAP)}
+
+RELATIVE_DAY_RE = re.compile(r'(-?\d+)([A-Z]{2})')
+
+# Field order of the compact rule tuples accepted by expand_many
+RULE_TUPLE_FIELDS = ('frequency', 'interval', 'weekdays', 'relative_day', 'end_date')
+
+def rule_to_dict(recurrence_rule):
+    """
+    Convert a RecurrenceRule model instance into the dict format used by the expanders.
+    :param recurrence_rule: RecurrenceRule instance
+    :return: dict with keys: frequency, interval, weekdays, relative_day, end_date
+    """
+    return {
+        'frequency': recurrence_rule.frequency,
+        'interval': recurrence_rule.interval,
+        'weekdays': recurrence_rule.weekdays,
+        'relative_day': recurrence_rule.relative_day,
+        'end_date': recurrence_rule.end_date.isoformat() if recurrence_rule.end_date else None,
+    }
+
+def normalize_rule(rule):
+    """
+    Bring a rule's pattern fields into canonical form without changing what they expand to:
+    weekday lists are deduplicated and ordered Monday first, and blank optional fields become None.
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date (missing ones take the model defaults)
+    :return: dict with the same keys
+    """
+    # A missing interval takes the model default; invalid ones are left for validation to reject
+    interval = rule.get('interval')
+    weekdays = rule.get('weekdays')
+    if weekdays:
+        codes = {code.strip() for code in weekdays.split(',') if code.strip()}
+        weekdays = ','.join(sorted(codes, key=lambda code: (WEEKDAY_INDEX.get(code, len(WEEKDAY_INDEX)), code)))
+    return {
+        'frequency': rule.get('frequency'),
+        'interval': 1 if interval is None else interval,
+        'weekdays': weekdays or None,
+        'relative_day': rule.get('relative_day') or None,
+        'end_date': rule.get('end_date') or None,
+    }
+
+def rule_fingerprint(rule):
+    """
+    Content address of a rule: a SHA-256 hex digest of its normalized pattern fields.
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date
+    :return: str of 64 hex digits
+    """
+    normalized = normalize_rule(rule)
+    # end_date may be a date or its ISO string; both render the same
+    canonical = '|'.join('' if normalized[field] is None else str(normalized[field]) for field in RULE_TUPLE_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def rule_to_tuple(rule):
+    """
+    Convert a RecurrenceRule model instance or rule dict into a compact, hashable, picklable tuple.
+    :param rule: RecurrenceRule instance or dict with keys: frequency, interval, weekdays, relative_day, end_date
+    :return: tuple of the values of RULE_TUPLE_FIELDS (end_date as an ISO string)
+    """
+    if not isinstance(rule, dict):
+        rule = rule_to_dict(rule)
+    return tuple(rule.get(field) for field in RULE_TUPLE_FIELDS)
+
+class CompiledRule:
+    """
+    A recurrence rule with its fields parsed into dateutil rrule arguments.
+    Independent of the series start, so one instance can serve every event sharing the rule.
+    """
+    __slots__ = ('freq', 'interval', 'until_date', 'byweekday', 'bysetpos')
+
+    def __init__(self, rule):
+        """
+        :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date
+        """
+        self.freq = FREQ_MAP.get(rule.get('frequency', 'DAILY'))
+        self.interval = rule.get('interval', 1)
+        self.until_date = parse(rule['end_date']).date() if rule.get('end_date') else None
+        self.byweekday = None
+        if rule.get('weekdays'):
+            self.byweekday = [WEEKDAY_MAP[wd.strip()] for wd in rule['weekdays'].split(',') if wd.strip() in WEEKDAY_MAP]
+        self.bysetpos = None
+        if rule.get('relative_day'):
+            # e.g. '2FR' for second Friday, '-1MO' for last Monday
+            m = RELATIVE_DAY_RE.match(rule['relative_day'])
+            if m:
+                self.bysetpos = int(m.group(1))
+                self.byweekday = [WEEKDAY_MAP[m.group(2)]]
+
+    def params(self, tzinfo):
+        """
+        Return dateutil rrule keyword arguments (everything but dtstart).
+        The rule's end_date is inclusive: occurrences on that day are still generated.
+        :param tzinfo: tzinfo of the series start, applied to the end_date bound
+        :return: dict of rrule keyword arguments
+        """
+        until = None
+        if self.until_date:
+            # end_date is a calendar date; match dtstart's tz so aware starts don't raise
+            until = datetime.combine(self.until_date, time.max, tzinfo=tzinfo)
+        return {
+            'freq': self.freq,
+            'interval': self.interval,
+            'until': until,
+            'byweekday': self.byweekday,
+            'bysetpos': self.bysetpos,
+            'wkst': MO,
+        }
+
+class CompiledRuleCache:
+    """
+    Thread-safe, size-bounded LRU cache of CompiledRule objects keyed by RecurrenceRule id.
+    Each entry remembers the rule's updated_at, so an edit made in another process is a miss here.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, recurrence_rule):
+        """
+        Return the compiled form of a RecurrenceRule, compiling and caching it on a miss.
+        :param recurrence_rule: RecurrenceRule instance
+        :return: CompiledRule
+        """
+        key = recurrence_rule.pk
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == recurrence_rule.updated_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        compiled = CompiledRule(rule_to_dict(recurrence_rule))
+        with self._lock:
+            self._entries[key] = (recurrence_rule.updated_at, compiled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, rule_id):
+        """Drop the cached entry for a RecurrenceRule id, if any."""
+        with self._lock:
+            self._entries.pop(rule_id, None)
+
+    def clear(self):
+        """Drop every cached entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+compiled_rule_cache = CompiledRuleCache()
+
+def compile_rule(rule):
+    """
+    Return a CompiledRule for a rule dict, passing already compiled rules through unchanged.
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
+    :return: CompiledRule
+    """
+    if isinstance(rule, CompiledRule):
+        return rule
+    return CompiledRule(rule)
+
+def build_rrule(start, rule, count=None):
+    """
+    Build a dateutil rrule for a recurrence rule dict anchored at the given start.
+    :param start: datetime, start of the first event
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
+    :param count: int or None, max number of instances the rrule yields
+    :return: dateutil.rrule.rrule
+    """
+    return rrule(dtstart=start, count=count, **compile_rule(rule).params(start.tzinfo))
+
+def _jump_anchor(start, params, after):
+    """
+    Find a period boundary of the series at or before `after` to restart expansion from.
+    Restarting on a period boundary keeps every later instance identical to expanding from
+    `start`; defaults dateutil derives from dtstart are pinned so they survive the move.
+    :param start: datetime, start of the first event
+    :param params: dict of rrule keyword arguments from CompiledRule.params
+    :param after: datetime, the earliest instance start of interest (after > start)
+    :return: tuple of (dtstart, dict of extra rrule keyword arguments)
+    """
+    freq = params['freq']
+    interval = params['interval']
+    if freq == DAILY:
+        step = timedelta(days=interval)
+        return start + step * ((after - start) // step), {}
+    if freq == WEEKLY:
+        step = timedelta(weeks=interval)
+        periods = (after - start) // step
+        if not periods:
+            return start, {}
+        # Restart on the week's first day so bysetpos sees the full week, as it does after the first week
+        anchor = start + step * periods - timedelta(days=start.weekday())
+        return anchor, {} if params['byweekday'] else {'byweekday': [start.weekday()]}
+    if start.tzinfo is not None:
+        after = after.astimezone(start.tzinfo)
+    if freq == MONTHLY:
+        periods = ((after.year - start.year) * 12 + after.month - start.month) // interval
+        if not periods:
+            return start, {}
+        anchor = start.replace(day=1) + relativedelta(months=periods * interval)
+        return anchor, {} if params['byweekday'] else {'bymonthday': start.day}
+    if freq == YEARLY:
+        periods = (after.year - start.year) // interval
+        if not periods:
+            return start, {}
+        anchor = start.replace(month=1, day=1) + relativedelta(years=periods * interval)
+        return anchor, {} if params['byweekday'] else {'bymonth': start.month, 'bymonthday': start.day}
+    return start, {}
+
+def iter_window(start, end, rule, after, before=None):
+    """
+    Lazily expand a recurrence rule into the instances starting inside [after, before).
+    Expansion restarts at the last period boundary before `after` rather than at `start`,
+    so the cost scales with the size of the window, not with the age of the series.
+    :param start: datetime, start of the first event
+    :param end: datetime, end of the first event
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
+    :param after: datetime, inclusive lower bound on instance starts
+    :param before: datetime or None, exclusive upper bound on instance starts (None for open-ended)
+    :return: generator of (start, end) tuples in chronological order
+    """
+    params = compile_rule(rule).params(start.tzinfo)
+    dtstart = start
+    if after > start:
+        dtstart, pinned = _jump_anchor(start, params, after)
+        params.update(pinned)
+    duration = end - start
+    for dt in rrule(dtstart=dtstart, **params):
+        if before is not None and dt >= before:
+            return
+        if dt >= after:
+            yield dt, dt + duration
+
 def expand_recurrence(start, end, rule, count=10):
     """
     Expand a recurrence rule into event instances.
     :param start: datetime, start of the first event
     :param end: datetime, end of the first event
-    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
     :param count: int, max number of instances to return
     :return: list of (start, end) tuples
     """
-    freq = FREQ_MAP.get(rule.get('frequency', 'DAILY'))
-    interval = rule.get('interval', 1)
-    until = rule.get('end_date')
-    if until:
-        until = parse(until)
-    byweekday = None
-    if rule.get('weekdays'):
-        byweekday = [WEEKDAY_MAP[wd.strip()] for wd in rule['weekdays'].split(',') if wd.strip() in WEEKDAY_MAP]
-    bysetpos = None
-    if rule.get('relative_day'):
-        # e.g. '2FR' for second Friday, '-1MO' for last Monday
-        import re
-        m = re.match(r'(-?\d+)([A-Z]{2})', rule['relative_day'])
-        if m:
-            bysetpos = int(m.group(1))
-            byweekday = [WEEKDAY_MAP[m.group(2)]]
-    r = rrule(
-        freq=freq,
-        dtstart=start,
-        interval=interval,
-        until=until,
-        byweekday=byweekday,
-        bysetpos=bysetpos,
-        count=count
+    return list(islice(iter_window(start, end, rule, start), count))
+
+def _supports_vectorized(start, compiled):
+    """
+    Check whether a rule can take the numpy fast path: DAILY or WEEKLY, with no relative_day,
+    anchored at a naive or fixed-offset start, so instances are evenly spaced in UTC as well.
+    """
+    return (
+        numpy is not None
+        and compiled.freq in (DAILY, WEEKLY)
+        and compiled.bysetpos is None
+        and compiled.interval >= 1
+        and (start.tzinfo is None or isinstance(start.tzinfo, timezone))
     )
-    instances = []
+
+def _to_wall(dt, tzinfo):
+    """Convert a datetime to a naive numpy datetime64[s] on the series start's clock."""
+    if tzinfo is not None:
+        dt = dt.astimezone(tzinfo).replace(tzinfo=None)
+    return numpy.datetime64(dt.replace(microsecond=0), 's')
+
+def _vectorized_starts(start, compiled, after, before, exclude=()):
+    """
+    Compute the instance starts in (after, before) of a DAILY or WEEKLY rule as one numpy array.
+    Instances are generated with arithmetic on the series' wall clock and a weekday mask,
+    matching what dateutil's rrule yields (including its truncation of dtstart to the second).
+    :param exclude: iterable of datetimes of cancelled instances, removed with a set difference
+    :return: numpy datetime64[s] array of instance starts in chronological order
+    """
+    tzinfo = start.tzinfo
+    day = numpy.timedelta64(1, 'D')
+    first = _to_wall(start, tzinfo)
+    lower = max(_to_wall(after, tzinfo), first - numpy.timedelta64(1, 's'))
+    upper = _to_wall(before, tzinfo) if before.microsecond == 0 else _to_wall(before, tzinfo) + numpy.timedelta64(1, 's')
+    if compiled.until_date:
+        # end_date is inclusive: anything on that calendar day still occurs
+        upper = min(upper, numpy.datetime64(compiled.until_date, 's') + day)
+    if upper <= lower:
+        return numpy.empty(0, dtype='datetime64[s]')
+    weekdays = sorted({weekday.weekday for weekday in compiled.byweekday}) if compiled.byweekday else None
+
+    if compiled.freq == DAILY:
+        step = compiled.interval * day
+        lo = max(0, (lower - first) // step)
+        hi = (upper - first) // step + 1
+        starts = first + numpy.arange(lo, hi) * step
+        if weekdays is not None:
+            # datetime64 day 0 (1970-01-01) was a Thursday, weekday 3
+            starts = starts[numpy.isin((starts.astype('datetime64[D]').astype('int64') + 3) % 7, weekdays)]
+    else:
+        # Weeks start on Monday (wkst=MO); only every interval-th week from the start's week occurs
+        time_of_day = first - first.astype('datetime64[D]')
+        monday = first.astype('datetime64[D]') - (first.astype('datetime64[D]').astype('int64') + 3) % 7
+        period = 7 * compiled.interval
+        lo = max(0, (lower.astype('datetime64[D]') - monday) // (period * day))
+        hi = (upper.astype('datetime64[D]') - monday) // (period * day) + 1
+        offsets = numpy.array(weekdays if weekdays is not None else [start.weekday()]) * day
+        weeks = monday + numpy.arange(lo, hi) * period * day
+        starts = ((weeks[:, None] + offsets[None, :]).ravel() + time_of_day).astype('datetime64[s]')
+
+    starts = starts[(starts > lower) & (starts < upper) & (starts >= first)]
+    if exclude:
+        cancelled = numpy.array([_to_wall(dt, tzinfo) for dt in exclude], dtype='datetime64[s]')
+        starts = numpy.setdiff1d(starts, cancelled, assume_unique=True)
+    return starts
+
+def expand_between(start, end, rule, after, before, exclude=None):
+    """
+    Expand a recurrence rule into the instances that overlap a time window.
+    Plain DAILY/WEEKLY rules are computed as numpy arrays when numpy is installed.
+    :param start: datetime, start of the first event
+    :param end: datetime, end of the first event
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
+    :param after: datetime, inclusive start of the window
+    :param before: datetime, exclusive end of the window
+    :param exclude: set of datetimes (to the second) of cancelled instances to leave out, or None
+    :return: list of (start, end) tuples
+    """
+    # An instance overlaps the window if it starts before `before` and ends after `after`
     duration = end - start
-    for dt in r:
-        instances.append((dt, dt + duration))
-    return instances
+    compiled = compile_rule(rule)
+    if _supports_vectorized(start, compiled):
+        starts = _vectorized_starts(start, compiled, after - duration, before, exclude or ())
+        return [(dt, dt + duration) for dt in (value.replace(tzinfo=start.tzinfo) for value in starts.tolist())]
+    return [
+        (start_dt, end_dt)
+        for start_dt, end_dt in iter_window(start, end, compiled, after - duration, before)
+        if end_dt > after and not (exclude and start_dt in exclude)
+    ]
+
+def occurs_at(start, end, rule, when):
+    """
+    Check whether a recurrence rule has an instance starting at the given time (to the second).
+    :param start: datetime, start of the first event
+    :param end: datetime, end of the first event
+    :param rule: dict with keys: frequency, interval, weekdays, relative_day, end_date, or CompiledRule
+    :param when: datetime, candidate instance start
+    :return: bool
+    """
+    when = when.replace(microsecond=0)
+    return next(iter_window(start, end, rule, when, when + timedelta(seconds=1)), None) is not None
+
+@lru_cache(maxsize=1024)
+def compile_rule_tuple(rule_tuple):
+    """
+    Return the CompiledRule for a rule tuple, memoized per process.
+    Tuples are keyed by content, so the memo never needs invalidating.
+    :param rule_tuple: tuple from rule_to_tuple
+    :return: CompiledRule
+    """
+    return CompiledRule({field: value for field, value in zip(RULE_TUPLE_FIELDS, rule_tuple) if value is not None})
+
+def _expand_specs(specs):
+    """Expand a list of (start, end, rule_tuple, after, before[, exclude]) specs in order; runs in pool workers."""
+    return [expand_between(spec[0], spec[1], compile_rule_tuple(spec[2]), *spec[3:]) for spec in specs]
+
+class ExpansionPool:
+    """
+    Process pool for expanding many recurring series at once, started on first use.
+    Batches smaller than `threshold` are expanded serially in the calling process, where pickling
+    and inter-process overhead would cost more than the expansion itself. Each server worker
+    process gets its own pool, so deployments run workers x max_workers expansion processes.
+    """
+
+    def __init__(self, threshold=1000, max_workers=None, chunks_per_worker=4):
+        """
+        :param threshold: int, smallest batch sent to the pool
+        :param max_workers: int or None, pool size (None for one worker per CPU)
+        :param chunks_per_worker: int, chunks each worker receives, to even out uneven series
+        """
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self.chunks_per_worker = chunks_per_worker
+        self._executor = None
+        self._lock = Lock()
+
+    def executor(self):
+        """Return the pool, starting it if needed."""
+        with self._lock:
+            if self._executor is None:
+                # Forking a threaded server process is unsafe; start workers from a clean interpreter
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context(method))
+            return self._executor
+
+    def shutdown(self):
+        """Stop the pool's workers; the next large batch starts a new pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def expand(self, specs):
+        """
+        Expand a batch of specs, in parallel once the batch reaches the threshold.
+        :param specs: sequence of (start, end, rule_tuple, after, before[, exclude]) tuples
+        :return: list with one list of (start, end) tuples per spec, in spec order
+        """
+        specs = list(specs)
+        if len(specs) < self.threshold:
+            return _expand_specs(specs)
+        executor = self.executor()
+        workers = self.max_workers or os.cpu_count() or 1
+        size = -(-len(specs) // (workers * self.chunks_per_worker))
+        chunks = [specs[index:index + size] for index in range(0, len(specs), size)]
+        try:
+            # map() yields chunk results in submission order, so the output order is deterministic
+            return [result for chunk in executor.map(_expand_specs, chunks) for result in chunk]
+        except BrokenProcessPool:
+            self.shutdown()
+            return _expand_specs(specs)
+
+expansion_pool = ExpansionPool()
+
+def expand_many(specs, pool=None):
+    """
+    Expand many recurrence rules into the instances overlapping their windows, like expand_between.
+    Large batches are split across a process pool; results are identical to serial expansion.
+    :param specs: sequence of (start, end, rule_tuple, after, before[, exclude]) tuples, with rule_tuple
+        from rule_to_tuple and exclude an optional set of cancelled instance starts
+    :param pool: ExpansionPool or None for the shared pool
+    :return: list with one list of (start, end) tuples per spec, in spec order
+    """
+    return (pool or expansion_pool).expand(specs)
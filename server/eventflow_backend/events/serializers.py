@@ -1,12 +1,27 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Event, RecurrenceRule, OccurrenceException
+from .models import Event, EventOccurrence, RecurrenceRule, OccurrenceException
+from .materialization import materialization_enabled, refresh_event_occurrences
+from .expansion_cache import expansion_cache
+from .icalendar import import_calendar
+from .intervals import user_busy_index
+from .recurrence_utils import RULE_TUPLE_FIELDS, compiled_rule_cache, expand_between, iter_window, normalize_rule, occurs_at, rule_fingerprint
+
+def rule_fields(recurrence_rule):
+    """Returns the pattern fields of a RecurrenceRule as model field values, or {} for no rule."""
+    if recurrence_rule is None:
+        return {}
+    return {field: getattr(recurrence_rule, field) for field in RULE_TUPLE_FIELDS}
 
 class RecurrenceRuleSerializer(serializers.ModelSerializer):
     """Serializer for the RecurrenceRule model, handling recurrence patterns for events (US-02 to US-05)."""
 
     class Meta:
         model = RecurrenceRule
-        fields = '__all__'
+        exclude = ('fingerprint',)
 
 class EventSerializer(serializers.ModelSerializer):
     """
@@ -18,51 +33,82 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        fields = '__all__'
+        exclude = ('materialized_until',)
         read_only_fields = ('user',)
 
     def validate(self, data):
         """
         Validates event data, ensuring logical consistency of dates (US-10).
         Raises ValidationError if end time is not after start time.
+        Partial updates are checked against the instance's current times.
+        With EVENTFLOW_PREVENT_OVERLAPS enabled, also rejects events overlapping the user's others.
         """
-        start = data.get('start_time')
-        end = data.get('end_time')
+        start = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end = data.get('end_time', getattr(self.instance, 'end_time', None))
         if start and end and start >= end:
             raise serializers.ValidationError('End time must be after start time.')
+        if start and end and getattr(settings, 'EVENTFLOW_PREVENT_OVERLAPS', False):
+            self.validate_no_overlap(data, start, end)
         return data
 
+    def validate_no_overlap(self, data, start, end):
+        """
+        Raises ValidationError if any occurrence of the event overlaps another of the user's events.
+        Series are checked for EVENTFLOW_OVERLAP_CHECK_DAYS from their start, or from now once they
+        have started, so edits to old series check their upcoming instances rather than their past;
+        each occurrence is one O(log n) lookup in the user's cached interval index.
+        """
+        request = self.context.get('request')
+        user_id = self.instance.user_id if self.instance else getattr(getattr(request, 'user', None), 'pk', None)
+        if user_id is None:
+            return
+        rule = None
+        if 'recurrence_rule' not in data or data['recurrence_rule'] is not None:
+            # The nested fields are already validated; partial ones keep the rest of the current rule, as update does
+            fields = {**(rule_fields(self.instance.recurrence_rule) if self.instance else {}), **(data.get('recurrence_rule') or {})}
+            rule = normalize_rule(fields) if fields else None
+        if rule and rule['end_date']:
+            rule['end_date'] = rule['end_date'].isoformat()
+
+        if rule:
+            anchor = max(start, timezone.now())
+            horizon = anchor + timedelta(days=getattr(settings, 'EVENTFLOW_OVERLAP_CHECK_DAYS', 365))
+            occurrences = expand_between(start, end, rule, anchor, horizon)
+        else:
+            anchor, horizon = start, end
+            occurrences = [(start, end)]
+        index = user_busy_index(user_id, anchor, horizon)
+        exclude_event_id = self.instance.pk if self.instance else None
+        for occurrence_start, occurrence_end in occurrences:
+            conflict = next(index.conflicts(occurrence_start, occurrence_end, exclude_event_id), None)
+            if conflict is not None:
+                title = Event.objects.filter(pk=conflict[2]).values_list('title', flat=True).first()
+                raise serializers.ValidationError(
+                    f'This event overlaps "{title}" from {conflict[0].isoformat()} to {conflict[1].isoformat()}.'
+                )
+
     def create(self, validated_data):
         """
         Creates a new event with an optional recurrence rule (US-01 to US-05).
-        Handles nested recurrence rule creation if provided.
+        A nested recurrence rule is interned, so events with the same pattern share one rule.
         """
         recurrence_data = validated_data.pop('recurrence_rule', None)
         if recurrence_data:
-            recurrence = RecurrenceRule.objects.create(**recurrence_data)
-            validated_data['recurrence_rule'] = recurrence
-        event = Event.objects.create(**validated_data)
-        return event
+            validated_data['recurrence_rule'] = RecurrenceRule.objects.intern(**recurrence_data)
+        # Saving materializes the event's occurrences, see signals.refresh_materialized_event
+        return Event.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
         """
         Updates an existing event, including its recurrence rule if provided (US-08).
-        Handles creation, updating, or deletion of the associated recurrence rule.
+        Handles adding, changing, or removing the associated recurrence rule.
         """
         recurrence_data = validated_data.pop('recurrence_rule', None)
         if recurrence_data:
-            if instance.recurrence_rule:
-                # Update existing recurrence rule
-                for attr, value in recurrence_data.items():
-                    setattr(instance.recurrence_rule, attr, value)
-                instance.recurrence_rule.save()
-            else:
-                # Create new recurrence rule if none exists
-                instance.recurrence_rule = RecurrenceRule.objects.create(**recurrence_data)
+            # Copy-on-write: rules are shared, so the event moves to the interned rule for its new pattern
+            instance.recurrence_rule = RecurrenceRule.objects.intern(**{**rule_fields(instance.recurrence_rule), **recurrence_data})
         elif 'recurrence_rule' in validated_data and validated_data['recurrence_rule'] is None:
-            # Remove recurrence rule if explicitly set to null
-            if instance.recurrence_rule:
-                instance.recurrence_rule.delete()
+            # Remove recurrence rule if explicitly set to null; the shared rule itself is kept
             instance.recurrence_rule = None
         # Update event fields
         for attr, value in validated_data.items():
@@ -77,4 +123,251 @@ class OccurrenceExceptionSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = OccurrenceException
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class EventBulkSerializer(serializers.Serializer):
+    """
+    Serializer for batched event writes: lists of creates, partial updates and deletes.
+    Every item is validated with EventSerializer first and errors are reported per item, at the
+    item's index; nothing is written unless the whole batch is valid. Valid batches are written
+    in a single transaction with bulk_create/bulk_update, so the number of queries does not
+    grow with the number of items.
+    Expects the user's event queryset in context['queryset'].
+    """
+    max_items = 10000
+
+    def get_fields(self):
+        """
+        Declares the 'create', 'update' and 'delete' lists here, since as class attributes
+        they would be shadowed by the Serializer methods of the same names.
+        """
+        return {
+            'create': serializers.ListField(child=serializers.DictField(), required=False, max_length=self.max_items),
+            'update': serializers.ListField(child=serializers.DictField(), required=False, max_length=self.max_items),
+            'delete': serializers.ListField(child=serializers.IntegerField(), required=False, max_length=self.max_items),
+        }
+
+    def validate(self, data):
+        """
+        Validates every item, collecting per-item errors (an empty dict marks a valid item).
+        Raises ValidationError if any item is invalid.
+        """
+        queryset = self.context['queryset']
+        for key in ('create', 'update', 'delete'):
+            data.setdefault(key, [])
+        errors = {}
+
+        creates = [EventSerializer(data=item, context=self.context) for item in data['create']]
+        create_errors = [{} if serializer.is_valid() else serializer.errors for serializer in creates]
+        if any(create_errors):
+            errors['create'] = create_errors
+
+        ids = [item.get('id') for item in data['update']]
+        instances = queryset.in_bulk([pk for pk in ids if isinstance(pk, int)])
+        updates = []
+        update_errors = []
+        for index, item in enumerate(data['update']):
+            instance = instances.get(item.get('id'))
+            if instance is None:
+                update_errors.append({'id': ['Event not found.']})
+                continue
+            if ids.index(item['id']) != index or item['id'] in data['delete']:
+                update_errors.append({'id': ['Each event can only be written once per request.']})
+                continue
+            serializer = EventSerializer(instance, data=item, partial=True, context=self.context)
+            update_errors.append({} if serializer.is_valid() else serializer.errors)
+            updates.append(serializer)
+        if any(update_errors):
+            errors['update'] = update_errors
+
+        existing = set(queryset.filter(pk__in=data['delete']).values_list('pk', flat=True))
+        delete_errors = [{} if pk in existing else {'id': ['Event not found.']} for pk in data['delete']]
+        if any(delete_errors):
+            errors['delete'] = delete_errors
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        data['create'] = creates
+        data['update'] = updates
+        return data
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """
+        Applies a validated batch and returns {'created': [...], 'updated': [...], 'deleted': [...]}.
+        Nested recurrence rules are interned with the same semantics as EventSerializer.create
+        and EventSerializer.update, in one batch for the whole request.
+        """
+        user = validated_data['user']
+        now = timezone.now()
+
+        # Rules are interned for creates and updates together, so events can point at shared rows
+        creates = [dict(serializer.validated_data) for serializer in validated_data['create']]
+        updates = [(serializer.instance, dict(serializer.validated_data)) for serializer in validated_data['update']]
+        patterns = [data['recurrence_rule'] for data in creates if data.get('recurrence_rule')]
+        patterns += [
+            {**rule_fields(instance.recurrence_rule), **data['recurrence_rule']}
+            for instance, data in updates if data.get('recurrence_rule')
+        ]
+        interned = RecurrenceRule.objects.intern_many(patterns) if patterns else {}
+
+        created = []
+        for data in creates:
+            rule_data = data.pop('recurrence_rule', None)
+            event = Event(user=user, **data)
+            if rule_data:
+                event.recurrence_rule = interned[rule_fingerprint(rule_data)]
+            created.append(event)
+        Event.objects.bulk_create(created)
+
+        # Updates: collect the changed columns so the table gets a single bulk_update
+        updated = []
+        event_fields = {'updated_at'}
+        for instance, data in updates:
+            rule_data = data.pop('recurrence_rule', {})
+            if rule_data:
+                # Copy-on-write: the event moves to the rule for its new pattern; shared rules are never edited
+                instance.recurrence_rule = interned[rule_fingerprint({**rule_fields(instance.recurrence_rule), **rule_data})]
+                event_fields.add('recurrence_rule')
+            elif rule_data is None:
+                instance.recurrence_rule = None
+                event_fields.add('recurrence_rule')
+            for attr, value in data.items():
+                setattr(instance, attr, value)
+            event_fields.update(data)
+            # bulk_update skips auto_now, so stamp the modification time explicitly
+            instance.updated_at = now
+            updated.append(instance)
+        if updated:
+            Event.objects.bulk_update(updated, fields=sorted(event_fields))
+
+        deleted = list(validated_data['delete'])
+        self.context['queryset'].filter(pk__in=deleted).delete()
+
+        if materialization_enabled():
+            for event in created + updated:
+                refresh_event_occurrences(event)
+        # Bulk queries send no model signals, so invalidate cached expansions explicitly
+        expansion_cache.invalidate(user.pk)
+        return {'created': created, 'updated': updated, 'deleted': deleted}
+
+
+class OccurrenceExceptionBulkSerializer(serializers.Serializer):
+    """
+    Serializer for cancelling many occurrences of recurring events at once (US-09).
+    Accepts either 'occurrences', a list of {'event': id, 'start_time': datetime} pairs that must
+    each match an instance of the event's rule, or a 'start'/'end' range that cancels every
+    instance of every one of the user's series starting inside it. All exceptions are inserted
+    with one bulk_create that ignores ones which already exist.
+    Expects the user's event queryset in context['queryset'].
+    """
+    max_items = 50000
+
+    occurrences = serializers.ListField(child=serializers.DictField(), required=False, max_length=max_items)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        """
+        Resolves the request into (event, start_time) pairs, reporting invalid pairs per item.
+        Raises ValidationError if the request is ambiguous, a pair is invalid or the range is too large.
+        """
+        has_range = 'start' in data or 'end' in data
+        if has_range == ('occurrences' in data):
+            raise serializers.ValidationError('Provide either occurrences or a start/end range.')
+        if has_range:
+            data['pairs'] = self.expand_range(data.get('start'), data.get('end'))
+        else:
+            data['pairs'] = self.resolve_pairs(data['occurrences'])
+        return data
+
+    def resolve_pairs(self, items):
+        """Validates explicit (event, start_time) pairs against the events' recurrence rules."""
+        events = self.context['queryset'].filter(recurrence_rule__isnull=False).in_bulk(
+            [item.get('event') for item in items if isinstance(item.get('event'), int)]
+        )
+        start_time_field = serializers.DateTimeField()
+        pairs = []
+        errors = []
+        for item in items:
+            event = events.get(item.get('event'))
+            if event is None:
+                errors.append({'event': ['Recurring event not found.']})
+                continue
+            try:
+                start_time = start_time_field.run_validation(item.get('start_time'))
+            except serializers.ValidationError as exc:
+                errors.append({'start_time': exc.detail})
+                continue
+            rule = compiled_rule_cache.get(event.recurrence_rule)
+            if not occurs_at(event.start_time, event.end_time, rule, start_time):
+                errors.append({'start_time': ['The event has no occurrence at this time.']})
+                continue
+            errors.append({})
+            pairs.append((event, start_time.replace(microsecond=0)))
+        if any(errors):
+            raise serializers.ValidationError({'occurrences': errors})
+        return pairs
+
+    def expand_range(self, start, end):
+        """Expands every recurring event of the user into its instances starting in [start, end)."""
+        if start is None or end is None or end <= start:
+            raise serializers.ValidationError('end must be after start.')
+        events = self.context['queryset'].filter(recurrence_rule__isnull=False, start_time__lt=end)
+        pairs = []
+        for event in events:
+            rule = compiled_rule_cache.get(event.recurrence_rule)
+            for start_dt, _ in iter_window(event.start_time, event.end_time, rule, start, end):
+                pairs.append((event, start_dt.replace(microsecond=0)))
+                if len(pairs) > self.max_items:
+                    raise serializers.ValidationError(f'The range covers more than {self.max_items} occurrences.')
+        return pairs
+
+    def create(self, validated_data):
+        """Inserts the exceptions, skipping existing ones, and returns the number of occurrences covered."""
+        pairs = validated_data['pairs']
+        with transaction.atomic():
+            OccurrenceException.objects.bulk_create(
+                [OccurrenceException(event=event, start_time=start_time) for event, start_time in pairs],
+                batch_size=1000, ignore_conflicts=True,
+            )
+            if materialization_enabled() and pairs:
+                starts_by_event = {}
+                for event, start_time in pairs:
+                    starts_by_event.setdefault(event.pk, []).append(start_time)
+                for event_id, starts in starts_by_event.items():
+                    EventOccurrence.objects.filter(event_id=event_id, start_time__in=starts).delete()
+            for user_id in {event.user_id for event, _ in pairs}:
+                expansion_cache.invalidate(user_id)
+        return len(pairs)
+
+class EventImportSerializer(serializers.Serializer):
+    """
+    Serializer for importing an uploaded iCalendar (.ics) file as the user's events.
+    The file is parsed as a stream and written in batches (see icalendar.import_calendar);
+    saving returns the import counts.
+    """
+    file = serializers.FileField()
+
+    def validate_file(self, value):
+        """Rejects uploads that are too large or do not start like an iCalendar file, before anything is parsed."""
+        max_bytes = getattr(settings, 'EVENTFLOW_ICS_MAX_UPLOAD_BYTES', None)
+        if max_bytes and value.size > max_bytes:
+            raise serializers.ValidationError(f'Upload at most {max_bytes // (1024 * 1024)} MB.')
+        head = value.read(32)
+        value.seek(0)
+        if not head.lstrip(b'\xef\xbb\xbf \r\n').upper().startswith(b'BEGIN:VCALENDAR'):
+            raise serializers.ValidationError('Upload an iCalendar (.ics) file.')
+        return value
+
+    def create(self, validated_data):
+        """
+        Imports the file for validated_data['user']; returns the counts of what was written and skipped.
+        The import runs inside the request, so files over EVENTFLOW_ICS_MAX_EVENTS events are rejected.
+        """
+        try:
+            return import_calendar(
+                validated_data['file'], validated_data['user'], max_events=getattr(settings, 'EVENTFLOW_ICS_MAX_EVENTS', None),
+            )
+        except ValueError as exc:
+            raise serializers.ValidationError({'file': [str(exc)]})
@@ -0,0 +1,79 @@
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .connections import connection_counters
+from .expansion_cache import expansion_cache
+from .materialization import materialization_enabled, refresh_event_occurrences, remove_materialized_occurrence
+from .models import Event, OccurrenceException, RecurrenceRule
+from .recurrence_utils import compiled_rule_cache
+
+@receiver([post_save, post_delete], sender=RecurrenceRule)
+def invalidate_compiled_rule(sender, instance, **kwargs):
+    """Drops a recurrence rule's compiled form whenever the rule is saved or deleted."""
+    compiled_rule_cache.invalidate(instance.pk)
+
+@receiver(post_save, sender=RecurrenceRule)
+def invalidate_rule_expansions(sender, instance, created, raw=False, **kwargs):
+    """Invalidates the cached expansions of every user with an event on an edited rule."""
+    if created or raw:
+        return
+    for user_id in Event.objects.filter(recurrence_rule=instance).values_list('user_id', flat=True).distinct():
+        expansion_cache.invalidate(user_id)
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_expansions(sender, instance, **kwargs):
+    """Invalidates the owner's cached expansions whenever one of their events is saved or deleted."""
+    expansion_cache.invalidate(instance.user_id)
+
+@receiver(post_save, sender=OccurrenceException)
+def invalidate_exception_expansions(sender, instance, **kwargs):
+    """Invalidates the owner's cached expansions and drops the materialized row when an occurrence is cancelled."""
+    expansion_cache.invalidate(instance.event.user_id)
+    if materialization_enabled():
+        remove_materialized_occurrence(instance.event, instance.start_time)
+
+@receiver(post_delete, sender=OccurrenceException)
+def restore_cancelled_occurrence(sender, instance, origin=None, **kwargs):
+    """
+    Brings back an occurrence whose exception was deleted on its own, e.g. in the admin.
+    Exceptions deleted along with their event are skipped; the event's deletion covers them.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not OccurrenceException:
+        return
+    expansion_cache.invalidate(instance.event.user_id)
+    if materialization_enabled():
+        refresh_event_occurrences(instance.event)
+
+@receiver(post_save, sender=Event)
+def refresh_materialized_event(sender, instance, raw=False, **kwargs):
+    """
+    Regenerates a saved event's materialized occurrences, whether it was saved by the API, the admin
+    or other code. bulk_create, bulk_update and QuerySet.update send no signals, so callers using
+    them refresh the events themselves (as EventBulkSerializer does) or run extend_occurrence_horizon --rebuild.
+    """
+    if materialization_enabled() and not raw:
+        refresh_event_occurrences(instance)
+
+@receiver(post_save, sender=RecurrenceRule)
+def mark_rule_events_stale(sender, instance, created, raw=False, **kwargs):
+    """
+    Marks the events of an edited rule as not materialized, so calendar reads expand them until
+    extend_occurrence_horizon regenerates them. Rules are shared, so they are not refreshed inline.
+    """
+    if materialization_enabled() and not created and not raw:
+        Event.objects.filter(recurrence_rule=instance).update(materialized_until=None)
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    """Counts requests served by this worker, for the connection reuse ratio."""
+    connection_counters.request_started()
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    """Counts connections Django opens to the default database in this worker."""
+    if connection.alias == DEFAULT_DB_ALIAS:
+        connection_counters.connection_created()
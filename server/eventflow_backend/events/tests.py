@@ -1,3 +1,1497 @@
-from django.test import TestCase
+import json
+import os
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from dateutil.rrule import rrulestr
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from eventflow_backend import renderers
+from eventflow_backend.metrics import Histogram
+
+from .models import Event, EventOccurrence, OccurrenceException, RecurrenceRule
+from .expansion_cache import expansion_cache
+from .fast_serializers import event_values_serializer
+from .occurrences import expand_series, expand_window
+from .availability import merge_free_slots
+from .benchmarking import bench_users, compare_results
+from .connections import pool_stats
+from .icalendar import fold_line, import_calendar, parse_content_line
+from .intervals import IntervalIndex
+from .serializers import EventSerializer
+from .views import EventViewSet
+from . import recurrence_utils
+from .recurrence_utils import (
+    RULE_TUPLE_FIELDS, WEEKDAY_MAP, CompiledRuleCache, ExpansionPool, build_rrule, compiled_rule_cache, expand_between, expand_many,
+    iter_window, rule_to_tuple,
+)
+
+
+def utc(*args):
+    """Builds a timezone-aware UTC datetime."""
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class EventAPITestCase(TestCase):
+    """Base test case providing an authenticated API client and event factories."""
+
+    def setUp(self):
+        # Cached expansions are keyed by user id, which the database may reuse between tests
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='secret-pass-123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_event(self, start, duration=timedelta(hours=1), user=None, **rule):
+        """Creates an event for the test user, recurring if rule fields are given."""
+        recurrence_rule = RecurrenceRule.objects.intern(**rule) if rule else None
+        return Event.objects.create(
+            title='Event',
+            start_time=start,
+            end_time=start + duration,
+            user=user or self.user,
+            recurrence_rule=recurrence_rule,
+        )
+
+
+class CalendarWindowTests(EventAPITestCase):
+    """Tests for the calendar window endpoint (US-06)."""
+
+    def test_expands_one_off_and_recurring_events_in_window(self):
+        self.make_event(utc(2025, 6, 3, 12))
+        self.make_event(utc(2025, 5, 1, 12))
+        series = self.make_event(utc(2025, 5, 1, 9), frequency='DAILY', interval=1)
+        OccurrenceException.objects.create(event=series, start_time=utc(2025, 6, 2, 9))
+
+        response = self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-04'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item['start'], item['is_recurring_instance']) for item in response.data],
+            [
+                ('2025-06-01T09:00:00+00:00', True),
+                ('2025-06-03T09:00:00+00:00', True),
+                ('2025-06-03T12:00:00+00:00', False),
+            ],
+        )
+
+    def test_includes_instances_overlapping_window_start(self):
+        self.make_event(utc(2025, 5, 31, 23), duration=timedelta(hours=2), frequency='DAILY', interval=1)
+
+        response = self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-02'})
+
+        self.assertEqual([item['start'] for item in response.data], [
+            '2025-05-31T23:00:00+00:00',
+            '2025-06-01T23:00:00+00:00',
+        ])
+
+    def test_end_date_is_inclusive(self):
+        self.make_event(utc(2025, 6, 1, 9), frequency='DAILY', interval=1, end_date='2025-06-02')
+
+        response = self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-10'})
+
+        self.assertEqual(len(response.data), 2)
+
+    def test_only_returns_own_events(self):
+        other = User.objects.create_user(username='bob', password='secret-pass-123')
+        self.make_event(utc(2025, 6, 1, 9), user=other)
+
+        response = self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-02'})
+
+        self.assertEqual(response.data, [])
+
+    def test_requires_valid_window(self):
+        self.assertEqual(self.client.get('/api/events/calendar/').status_code, 400)
+        response = self.client.get('/api/events/calendar/', {'start': '2025-06-02', 'end': '2025-06-01'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(EVENTFLOW_MAX_WINDOW_DAYS=31)
+    def test_rejects_windows_over_the_maximum_span(self):
+        self.make_event(utc(2025, 6, 1, 9), frequency='DAILY', interval=1)
+
+        response = self.client.get('/api/events/calendar/', {'start': '2000-01-01', 'end': '2100-01-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('31 days', response.data['detail'])
+        self.assertEqual(self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-07-02'}).status_code, 200)
+
+
+class WindowExpansionTests(SimpleTestCase):
+    """Differential tests of the window-bounded expansion engine against a full rrule walk."""
+
+    RULES = [
+        {'frequency': 'DAILY', 'interval': 1},
+        {'frequency': 'DAILY', 'interval': 3, 'weekdays': 'MO,TH'},
+        {'frequency': 'WEEKLY', 'interval': 1},
+        {'frequency': 'WEEKLY', 'interval': 2, 'weekdays': 'MO,WE,SU'},
+        {'frequency': 'MONTHLY', 'interval': 1},
+        {'frequency': 'MONTHLY', 'interval': 2, 'relative_day': '-1FR'},
+        {'frequency': 'MONTHLY', 'interval': 1, 'weekdays': 'TU'},
+        {'frequency': 'YEARLY', 'interval': 1},
+        {'frequency': 'YEARLY', 'interval': 2, 'relative_day': '2MO', 'end_date': '2040-01-01'},
+    ]
+    STARTS = [utc(2012, 1, 31, 9), utc(2015, 2, 28, 17, 30), utc(2019, 8, 21, 0)]
+
+    def reference(self, start, rule, after, before):
+        instances = []
+        for dt in build_rrule(start, rule):
+            if dt >= before:
+                break
+            if dt >= after:
+                instances.append((dt, dt + timedelta(hours=1)))
+        return instances
+
+    def test_matches_full_expansion(self):
+        for rule in self.RULES:
+            for start in self.STARTS:
+                for offset in (timedelta(0), timedelta(days=40, hours=5), timedelta(days=3653)):
+                    after = start + offset
+                    before = after + timedelta(days=120)
+                    with self.subTest(rule=rule, start=start, after=after):
+                        self.assertEqual(
+                            list(iter_window(start, start + timedelta(hours=1), rule, after, before)),
+                            self.reference(start, rule, after, before),
+                        )
+
+    def test_open_ended_window_is_lazy(self):
+        instances = iter_window(utc(2000, 1, 1, 9), utc(2000, 1, 1, 10), {'frequency': 'DAILY', 'interval': 1}, utc(2025, 6, 1))
+        self.assertEqual(next(instances)[0], utc(2025, 6, 1, 9))
+
+    @skipUnless(recurrence_utils.numpy, 'numpy is not installed')
+    def test_vectorized_expansion_matches_rrule(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            tzinfo = rng.choice([dt_timezone.utc, dt_timezone(timedelta(hours=-5, minutes=-30)), None])
+            start = datetime(2015, 1, 1, tzinfo=tzinfo) + timedelta(seconds=rng.randrange(10 * 365 * 86400), microseconds=rng.choice([0, 5000]))
+            end = start + timedelta(minutes=rng.choice([0, 45, 60 * 30]))
+            rule = {'frequency': rng.choice(['DAILY', 'WEEKLY']), 'interval': rng.randint(1, 4)}
+            if rng.random() < 0.6:
+                rule['weekdays'] = ','.join(rng.sample(list(WEEKDAY_MAP), rng.randint(1, 7)))
+            if rng.random() < 0.3:
+                rule['end_date'] = (start + timedelta(days=rng.randint(0, 800))).date().isoformat()
+            after = start + timedelta(seconds=rng.randrange(-100 * 86400, 1200 * 86400))
+            before = after + timedelta(seconds=rng.randrange(1, 200 * 86400))
+            with mock.patch.object(recurrence_utils, 'numpy', None):
+                expected = expand_between(start, end, rule, after, before)
+            exclude = {instance[0] for instance in expected[::3]}
+            with self.subTest(start=start, rule=rule, after=after, before=before):
+                self.assertEqual(expand_between(start, end, rule, after, before), expected)
+                self.assertEqual(
+                    expand_between(start, end, rule, after, before, exclude=exclude),
+                    [instance for instance in expected if instance[0] not in exclude],
+                )
+
+    def test_falls_back_to_rrule_for_other_rules(self):
+        start = utc(2025, 1, 31, 9)
+        with mock.patch.object(recurrence_utils, '_vectorized_starts') as vectorized:
+            for rule in self.RULES[4:] + [{'frequency': 'WEEKLY', 'interval': 1}]:
+                with self.subTest(rule=rule):
+                    zoned = start.astimezone(ZoneInfo('Europe/Berlin')) if rule['frequency'] == 'WEEKLY' else start
+                    self.assertTrue(expand_between(zoned, zoned + timedelta(hours=1), rule, zoned, zoned + timedelta(days=800)))
+        vectorized.assert_not_called()
+
+    def specs(self):
+        return [
+            (start, start + timedelta(hours=1), rule_to_tuple(rule), start + offset, start + offset + timedelta(days=60))
+            for rule in self.RULES
+            for start in self.STARTS
+            for offset in (timedelta(0), timedelta(days=400))
+        ]
+
+    def test_expand_many_matches_expand_between(self):
+        specs = self.specs()
+        self.assertEqual(
+            expand_many(specs, pool=ExpansionPool(threshold=len(specs) + 1)),
+            [expand_between(start, end, dict(zip(RULE_TUPLE_FIELDS, rule)), after, before) for start, end, rule, after, before in specs],
+        )
+
+    def test_parallel_expansion_is_ordered_and_identical(self):
+        specs = self.specs()
+        pool = ExpansionPool(threshold=1, max_workers=2)
+        try:
+            self.assertEqual(expand_many(specs, pool=pool), expand_many(specs, pool=ExpansionPool(threshold=len(specs) + 1)))
+        finally:
+            pool.shutdown()
+
+
+class OccurrencesTests(EventAPITestCase):
+    """Tests for the per-event occurrences endpoint (US-06)."""
+
+    def test_returns_count_instances_skipping_exceptions(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='WEEKLY', interval=1)
+        OccurrenceException.objects.create(event=series, start_time=utc(2025, 6, 9, 9))
+
+        response = self.client.get(f'/api/events/{series.id}/occurrences/', {'count': 2})
+
+        self.assertEqual([item['start'] for item in response.data], [
+            '2025-06-02T09:00:00+00:00',
+            '2025-06-16T09:00:00+00:00',
+        ])
+
+    def test_repeated_delete_is_idempotent(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        url = f'/api/events/{series.id}/occurrences/delete/'
+
+        for start_time in ('2025-06-03T09:00:00Z', '2025-06-03T09:00:00.250Z'):
+            self.assertEqual(self.client.post(url, {'start_time': start_time}, format='json').status_code, 204)
+
+        self.assertEqual(series.exceptions.count(), 1)
+
+    def test_window_parameters(self):
+        series = self.make_event(utc(2020, 1, 1, 9), frequency='DAILY', interval=1)
+
+        response = self.client.get(f'/api/events/{series.id}/occurrences/', {
+            'start': '2025-06-01', 'end': '2025-06-03', 'count': 10,
+        })
+
+        self.assertEqual([item['start'] for item in response.data], [
+            '2025-06-01T09:00:00+00:00',
+            '2025-06-02T09:00:00+00:00',
+        ])
+
+    def test_count_is_validated_and_clamped(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        url = f'/api/events/{series.id}/occurrences/'
+
+        for count in ('abc', '0', '-5'):
+            self.assertEqual(self.client.get(url, {'count': count}).status_code, 400)
+        self.assertEqual(len(self.client.get(url, {'count': 1000000}).data), 1000)
+
+
+class CompiledRuleCacheTests(EventAPITestCase):
+    """Tests for the per-process compiled recurrence rule cache."""
+
+    def setUp(self):
+        super().setUp()
+        compiled_rule_cache.clear()
+
+    def test_reuses_compiled_rule_until_rule_changes(self):
+        rule = RecurrenceRule.objects.create(frequency='DAILY', interval=1)
+        compiled = compiled_rule_cache.get(rule)
+
+        self.assertIs(compiled_rule_cache.get(RecurrenceRule.objects.get(pk=rule.pk)), compiled)
+        rule.interval = 2
+        rule.save()
+        self.assertIsNot(compiled_rule_cache.get(rule), compiled)
+
+    def test_evicts_least_recently_used(self):
+        cache = CompiledRuleCache(maxsize=2)
+        first, second, third = (RecurrenceRule.objects.intern(frequency='DAILY', interval=interval) for interval in (1, 2, 3))
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+
+        self.assertEqual(len(cache), 2)
+        cache.get(first)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_serializer_update_switches_compiled_rule(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        self.client.get(f'/api/events/{series.id}/occurrences/', {'count': 2})
+        self.assertEqual(len(compiled_rule_cache), 1)
+
+        self.client.patch(f'/api/events/{series.id}/', {'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 1}}, format='json')
+
+        # The event now points at another interned rule, compiled on first use
+        response = self.client.get(f'/api/events/{series.id}/occurrences/', {'count': 2})
+        self.assertEqual(response.data[1]['start'], '2025-06-09T09:00:00+00:00')
+        self.assertEqual(len(compiled_rule_cache), 2)
+
+
+@override_settings(EVENTFLOW_MATERIALIZE_OCCURRENCES=True, EVENTFLOW_OCCURRENCE_HORIZON_DAYS=30)
+class MaterializedOccurrenceTests(EventAPITestCase):
+    """Tests for the optional materialized occurrence table."""
+
+    def create_series(self, start, **rule):
+        response = self.client.post('/api/events/', {
+            'title': 'Standup',
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=15)).isoformat(),
+            'recurrence_rule': {'interval': 1, **rule},
+        }, format='json')
+        return Event.objects.get(pk=response.data['id'])
+
+    def calendar(self, start, end):
+        return self.client.get('/api/events/calendar/', {'start': start.isoformat(), 'end': end.isoformat()}).data
+
+    def test_create_materializes_up_to_horizon(self):
+        series = self.create_series(utc(2025, 6, 1), frequency='DAILY')
+
+        self.assertEqual(series.materialized_occurrences.count(), EventOccurrence.objects.count())
+        self.assertGreaterEqual(series.materialized_occurrences.count(), 30)
+        self.assertIsNotNone(series.materialized_until)
+
+    def test_calendar_reads_match_expansion(self):
+        start = utc(2025, 6, 2, 9)
+        series = self.create_series(start, frequency='WEEKLY', weekdays='MO,TH')
+        self.client.post(f'/api/events/{series.id}/occurrences/delete/', {'start_time': '2025-06-05T09:00:00Z'}, format='json')
+        window = (utc(2025, 6, 1), utc(2025, 6, 15))
+
+        materialized = self.calendar(*window)
+        with self.settings(EVENTFLOW_MATERIALIZE_OCCURRENCES=False):
+            expanded = self.calendar(*window)
+
+        self.assertEqual(materialized, expanded)
+        self.assertEqual(len(materialized), 3)
+
+    def test_falls_back_to_expansion_beyond_horizon(self):
+        self.create_series(utc(2025, 6, 2, 9), frequency='DAILY')
+        far = utc(2030, 1, 1)
+
+        self.assertEqual(len(self.calendar(far, far + timedelta(days=2))), 2)
+
+    def test_command_extends_horizon(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        call_command('extend_occurrence_horizon', stdout=StringIO())
+        count = series.materialized_occurrences.count()
+
+        with self.settings(EVENTFLOW_OCCURRENCE_HORIZON_DAYS=60):
+            call_command('extend_occurrence_horizon', stdout=StringIO())
+
+        self.assertEqual(series.materialized_occurrences.count(), count + 30)
+        starts = list(series.materialized_occurrences.values_list('start_time', flat=True))
+        self.assertEqual(len(starts), len(set(starts)))
+
+    def test_model_writes_outside_the_api_refresh_rows(self):
+        start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        series = self.make_event(start, frequency='DAILY', interval=1)
+        self.assertTrue(series.materialized_occurrences.exists())
+
+        series.start_time += timedelta(hours=1)
+        series.end_time += timedelta(hours=1)
+        series.save()
+        self.assertEqual(set(series.materialized_occurrences.values_list('start_time__hour', flat=True)), {10})
+
+        cancelled = start + timedelta(days=1, hours=1)
+        exception = OccurrenceException.objects.create(event=series, start_time=cancelled)
+        self.assertFalse(series.materialized_occurrences.filter(start_time=cancelled).exists())
+        exception.delete()
+        self.assertTrue(series.materialized_occurrences.filter(start_time=cancelled).exists())
+
+        rule = series.recurrence_rule
+        rule.interval = 2
+        rule.save()
+        series.refresh_from_db()
+        self.assertIsNone(series.materialized_until)
+        window = (start, start + timedelta(days=7))
+        with self.settings(EVENTFLOW_MATERIALIZE_OCCURRENCES=False):
+            expanded = self.calendar(*window)
+        self.assertEqual(self.calendar(*window), expanded)
+        self.assertEqual(len(expanded), 4)
+
+    @override_settings(EVENTFLOW_OCCURRENCE_RETENTION_DAYS=7)
+    def test_edits_keep_rows_before_the_retention_cutoff(self):
+        start = (timezone.now() - timedelta(days=30)).replace(microsecond=0)
+        series = self.create_series(start, frequency='DAILY')
+        cutoff = timezone.now() - timedelta(days=7)
+        history = set(series.materialized_occurrences.filter(start_time__lt=cutoff).values_list('pk', flat=True))
+        self.assertGreaterEqual(len(history), 22)
+
+        response = self.client.patch(f'/api/events/{series.pk}/', {'title': 'Daily sync'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        series.refresh_from_db()
+        rows = series.materialized_occurrences
+        self.assertTrue(history <= set(rows.values_list('pk', flat=True)))
+        expected = recurrence_utils.iter_window(
+            series.start_time, series.end_time, compiled_rule_cache.get(series.recurrence_rule), series.start_time, series.materialized_until,
+        )
+        self.assertEqual(sorted(rows.values_list('start_time', flat=True)), [start_dt for start_dt, _ in expected])
+
+
+class QueryCountTests(EventAPITestCase):
+    """Guards against endpoints whose query count grows with the size of the result."""
+
+    def seed(self, count):
+        for index in range(count):
+            series = self.make_event(utc(2025, 6, 1, 9) + timedelta(hours=index), frequency='DAILY', interval=1)
+            OccurrenceException.objects.create(event=series, start_time=series.start_time + timedelta(days=1))
+            self.make_event(utc(2025, 6, 2, 12) + timedelta(hours=index))
+
+    def count_queries(self, path, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertQueriesConstant(self, path, params=None, path_factory=None):
+        self.seed(2)
+        small = self.count_queries(path_factory() if path_factory else path, params)
+        self.seed(20)
+        large = self.count_queries(path_factory() if path_factory else path, params)
+        self.assertEqual(small, large)
+
+    def test_list(self):
+        self.assertQueriesConstant('/api/events/')
+
+    def test_calendar(self):
+        self.assertQueriesConstant('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-07-01'})
+
+    def test_occurrences(self):
+        def latest_series():
+            series = Event.objects.filter(recurrence_rule__isnull=False).latest('pk')
+            OccurrenceException.objects.bulk_create([
+                OccurrenceException(event=series, start_time=series.start_time + timedelta(days=day))
+                for day in range(2, 2 + Event.objects.count())
+            ])
+            return f'/api/events/{series.id}/occurrences/'
+
+        self.assertQueriesConstant(None, {'count': 50}, path_factory=latest_series)
+
+    def test_retrieve(self):
+        self.assertQueriesConstant(None, path_factory=lambda: f"/api/events/{Event.objects.latest('pk').id}/")
+
+
+class EventListTests(EventAPITestCase):
+    """Tests for keyset pagination and streaming on the event list."""
+
+    def setUp(self):
+        super().setUp()
+        # Several events share a start time so the id tie-breaker is exercised
+        for index in range(7):
+            self.make_event(utc(2025, 6, 1 + index // 3, 9))
+
+    def test_unpaginated_list_is_ordered(self):
+        response = self.client.get('/api/events/')
+
+        expected = list(Event.objects.order_by('start_time', 'pk').values_list('pk', flat=True))
+        self.assertEqual([item['id'] for item in response.data], expected)
+
+    def test_cursor_pages_cover_every_event_once(self):
+        seen = []
+        response = self.client.get('/api/events/', {'page_size': 2})
+        while True:
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected = list(Event.objects.order_by('start_time', 'pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/events/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+    @mock.patch.object(EventViewSet, 'stream_chunk_size', 2)
+    def test_stream_matches_list(self):
+        response = self.client.get('/api/events/', {'stream': 'true'})
+
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(streamed, json.loads(self.client.get('/api/events/').content))
+
+
+class FastSerializerParityTests(EventAPITestCase):
+    """Proves the read-only values serializer and fast renderer match EventSerializer byte for byte."""
+
+    def setUp(self):
+        super().setUp()
+        self.make_event(utc(2025, 6, 1, 9, 30, 0, 123456))
+        self.make_event(utc(2025, 6, 2, 9), frequency='WEEKLY', interval=2, weekdays='MO,FR', end_date='2025-12-31')
+        self.make_event(utc(2025, 6, 3, 9), frequency='MONTHLY', interval=1, relative_day='-1SU')
+        Event.objects.filter(pk=Event.objects.first().pk).update(
+            title='Caf\u00e9 \u2014 "quoted" \u2028 line', description='\U0001F389 party\n',
+        )
+
+    def expected(self):
+        queryset = Event.objects.select_related('recurrence_rule').order_by('start_time', 'pk')
+        return JSONRenderer().render(EventSerializer(queryset, many=True).data)
+
+    def fast(self):
+        rows = event_values_serializer.values(Event.objects.order_by('start_time', 'pk'))
+        return renderers.FastJSONRenderer().render(event_values_serializer.serialize(rows))
+
+    def test_byte_equivalent_to_event_serializer(self):
+        self.assertEqual(self.fast(), self.expected())
+
+    def test_byte_equivalent_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(self.fast(), self.expected())
+
+    def test_list_endpoint_matches_event_serializer(self):
+        self.assertEqual(self.client.get('/api/events/').content, self.expected())
+
+
+class BulkEventTests(EventAPITestCase):
+    """Tests for the bulk create/update/delete endpoint."""
+
+    def event_payload(self, start, **extra):
+        return {
+            'title': 'Imported',
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(hours=1)).isoformat(),
+            **extra,
+        }
+
+    def test_applies_creates_updates_and_deletes(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        doomed = self.make_event(utc(2025, 6, 3, 9))
+        payload = {
+            'create': [
+                self.event_payload(utc(2025, 7, 1, 9)),
+                self.event_payload(utc(2025, 7, 2, 9), recurrence_rule={'frequency': 'WEEKLY', 'interval': 1}),
+            ],
+            'update': [{'id': series.id, 'title': 'Renamed', 'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 2}}],
+            'delete': [doomed.id],
+        }
+
+        response = self.client.post('/api/events/bulk/', payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['created'][1]['recurrence_rule']['frequency'], 'WEEKLY')
+        series.refresh_from_db()
+        self.assertEqual(series.title, 'Renamed')
+        self.assertEqual((series.recurrence_rule.frequency, series.recurrence_rule.interval), ('WEEKLY', 2))
+        self.assertFalse(Event.objects.filter(pk=doomed.pk).exists())
+        self.assertEqual(Event.objects.filter(user=self.user).count(), 3)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(size):
+            payload = {'create': [
+                self.event_payload(utc(2025, 7, 1, 9) + timedelta(days=day), recurrence_rule={'frequency': 'DAILY', 'interval': 1})
+                for day in range(size)
+            ]}
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.post('/api/events/bulk/', payload, format='json').status_code, 200)
+            return len(context)
+
+        run(1)  # interns the shared rule
+        self.assertEqual(run(2), run(30))
+
+    def test_reports_per_item_errors_without_writing(self):
+        other = User.objects.create_user(username='bob', password='secret-pass-123')
+        foreign = self.make_event(utc(2025, 6, 2, 9), user=other)
+        payload = {
+            'create': [self.event_payload(utc(2025, 7, 1, 9)), {'title': 'Missing times'}],
+            'update': [{'id': foreign.id, 'title': 'Hijacked'}],
+            'delete': [foreign.id],
+        }
+
+        response = self.client.post('/api/events/bulk/', payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('start_time', response.data['create'][1])
+        self.assertIn('id', response.data['update'][0])
+        self.assertIn('id', response.data['delete'][0])
+        self.assertFalse(Event.objects.filter(user=self.user).exists())
+
+    def test_partial_update_checks_times_against_instance(self):
+        event = self.make_event(utc(2025, 6, 2, 9))
+
+        response = self.client.post('/api/events/bulk/', {
+            'update': [{'id': event.id, 'end_time': utc(2025, 6, 2, 8).isoformat()}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkOccurrenceDeleteTests(EventAPITestCase):
+    """Tests for cancelling many occurrences in one request."""
+    url = '/api/events/occurrences/delete/'
+
+    def test_cancels_explicit_pairs(self):
+        daily = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        weekly = self.make_event(utc(2025, 6, 2, 14), frequency='WEEKLY', interval=1)
+        OccurrenceException.objects.create(event=daily, start_time=utc(2025, 6, 3, 9))
+
+        response = self.client.post(self.url, {'occurrences': [
+            {'event': daily.id, 'start_time': '2025-06-03T09:00:00Z'},
+            {'event': daily.id, 'start_time': '2025-06-04T09:00:00Z'},
+            {'event': weekly.id, 'start_time': '2025-06-09T14:00:00Z'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(daily.exceptions.count(), 2)
+        self.assertEqual(weekly.exceptions.count(), 1)
+
+    def test_rejects_times_that_are_not_occurrences(self):
+        weekly = self.make_event(utc(2025, 6, 2, 14), frequency='WEEKLY', interval=1)
+        one_off = self.make_event(utc(2025, 6, 2, 9))
+
+        response = self.client.post(self.url, {'occurrences': [
+            {'event': weekly.id, 'start_time': '2025-06-09T14:00:00Z'},
+            {'event': weekly.id, 'start_time': '2025-06-10T14:00:00Z'},
+            {'event': one_off.id, 'start_time': '2025-06-02T09:00:00Z'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['occurrences'][0], {})
+        self.assertIn('start_time', response.data['occurrences'][1])
+        self.assertIn('event', response.data['occurrences'][2])
+        self.assertFalse(OccurrenceException.objects.exists())
+
+    def test_cancels_range_across_all_series(self):
+        daily = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        weekly = self.make_event(utc(2025, 6, 2, 14), frequency='WEEKLY', interval=1)
+        self.make_event(utc(2025, 6, 20, 9))
+
+        response = self.client.post(self.url, {'start': '2025-06-16T00:00:00Z', 'end': '2025-06-30T00:00:00Z'}, format='json')
+
+        self.assertEqual(response.data['count'], 16)
+        self.assertEqual(daily.exceptions.count(), 14)
+        self.assertEqual(weekly.exceptions.count(), 2)
+        calendar = self.client.get('/api/events/calendar/', {'start': '2025-06-16', 'end': '2025-06-30'}).data
+        self.assertEqual([item['is_recurring_instance'] for item in calendar], [False])
+
+    def test_requires_exactly_one_mode(self):
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+        response = self.client.post(self.url, {'occurrences': [], 'start': '2025-06-16T00:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ConditionalReadTests(EventAPITestCase):
+    """Tests for ETag/Last-Modified handling on event reads."""
+
+    def get(self, url, **headers):
+        return self.client.get(url, {'start': '2025-06-01', 'end': '2025-06-08'}, headers=headers)
+
+    def test_unchanged_calendar_is_not_modified(self):
+        self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        first = self.get('/api/events/calendar/')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Last-Modified', first)
+
+        with mock.patch('events.occurrences.expand_many') as expand, self.assertNumQueries(0):
+            second = self.get('/api/events/calendar/', if_none_match=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        expand.assert_not_called()
+
+    def test_writes_change_the_etag(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        other = self.make_event(utc(2025, 6, 3, 12))
+        etags = [self.get('/api/events/').get('ETag')]
+
+        self.client.post(f'/api/events/{series.id}/occurrences/delete/', {'start_time': '2025-06-04T09:00:00Z'}, format='json')
+        etags.append(self.get('/api/events/')['ETag'])
+        self.client.delete(f'/api/events/{other.id}/')
+        etags.append(self.get('/api/events/')['ETag'])
+        self.client.patch(f'/api/events/{series.id}/', {'title': 'Renamed'}, format='json')
+        etags.append(self.get('/api/events/')['ETag'])
+
+        self.assertEqual(len(set(etags)), 4)
+        self.assertEqual(self.get('/api/events/', if_none_match=etags[0]).status_code, 200)
+
+    def test_deletes_and_cancellations_are_never_not_modified(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        other = self.make_event(utc(2025, 6, 3, 12))
+        first = self.get('/api/events/calendar/')
+        since = 'Sat, 01 Jan 2100 00:00:00 GMT'
+
+        self.client.post(f'/api/events/{series.id}/occurrences/delete/', {'start_time': '2025-06-04T09:00:00Z'}, format='json')
+        self.assertEqual(self.get('/api/events/calendar/', if_modified_since=since).status_code, 200)
+        self.assertEqual(self.get('/api/events/calendar/', if_none_match=first['ETag']).status_code, 200)
+
+        etag = self.get('/api/events/calendar/')['ETag']
+        self.client.delete(f'/api/events/{other.id}/')
+        self.assertEqual(self.get('/api/events/calendar/', if_modified_since=since).status_code, 200)
+        self.assertEqual(self.get('/api/events/calendar/', if_none_match=etag).status_code, 200)
+
+    def test_rule_edits_change_the_etag(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        etag = self.get('/api/events/calendar/')['ETag']
+        series.recurrence_rule.interval = 2
+        series.recurrence_rule.save()
+        self.assertEqual(self.get('/api/events/calendar/', if_none_match=etag).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        self.make_event(utc(2025, 6, 2, 9))
+        etag = self.get('/api/events/')['ETag']
+        bob = User.objects.create_user(username='bob', password='secret-pass-123')
+        self.client.force_authenticate(bob)
+        self.assertEqual(self.get('/api/events/', if_none_match=etag).status_code, 200)
+
+    def test_detail_reads_check_the_event_first(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        foreign = self.make_event(utc(2025, 6, 2, 9), user=User.objects.create_user(username='bob', password='secret-pass-123'))
+        etag = self.get(f'/api/events/{series.id}/')['ETag']
+        self.assertEqual(self.get(f'/api/events/{series.id}/', if_none_match=etag).status_code, 304)
+        self.assertEqual(self.get(f'/api/events/{series.id}/occurrences/', if_none_match=etag).status_code, 304)
+
+        for pk in (foreign.id, 999999):
+            self.assertEqual(self.get(f'/api/events/{pk}/', if_none_match=etag).status_code, 404)
+            self.assertEqual(self.get(f'/api/events/{pk}/occurrences/', if_none_match=etag).status_code, 404)
+
+
+class ExpansionCacheTests(EventAPITestCase):
+    """Tests for the shared expansion cache and its per-user invalidation."""
+    window = {'start': '2025-06-01', 'end': '2025-06-08'}
+
+    def setUp(self):
+        super().setUp()
+        expansion_cache.reset_stats()
+
+    def assertCachedUntilWrite(self, write):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        first = self.client.get('/api/events/calendar/', self.window).data
+        with mock.patch('events.occurrences.expand_many') as expand:
+            self.assertEqual(self.client.get('/api/events/calendar/', self.window).data, first)
+        expand.assert_not_called()
+
+        write(series)
+
+        self.assertNotEqual(self.client.get('/api/events/calendar/', self.window).data, first)
+        self.assertEqual(expansion_cache.stats()['hits'], 1)
+        self.assertEqual(expansion_cache.stats()['misses'], 2)
+
+    def test_serializer_write_invalidates(self):
+        self.assertCachedUntilWrite(lambda series: self.client.patch(
+            f'/api/events/{series.id}/', {'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 1}}, format='json',
+        ))
+
+    def test_delete_occurrence_invalidates(self):
+        self.assertCachedUntilWrite(lambda series: self.client.post(
+            f'/api/events/{series.id}/occurrences/delete/', {'start_time': '2025-06-03T09:00:00Z'}, format='json',
+        ))
+
+    def test_destroy_invalidates(self):
+        self.assertCachedUntilWrite(lambda series: self.client.delete(f'/api/events/{series.id}/'))
+
+    def test_bulk_write_invalidates(self):
+        self.assertCachedUntilWrite(lambda series: self.client.post(
+            '/api/events/bulk/', {'update': [{'id': series.id, 'title': 'Renamed'}]}, format='json',
+        ))
+
+    def test_occurrences_are_cached_per_user(self):
+        series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        url = f'/api/events/{series.id}/occurrences/'
+        self.client.get(url, {'count': 3})
+        self.client.get(url, {'count': 3})
+        self.client.get(url, {'count': 4})
+        self.assertEqual((expansion_cache.hits, expansion_cache.misses), (1, 2))
+
+        self.client.force_authenticate(User.objects.create_user(username='bob', password='secret-pass-123'))
+        self.assertEqual(self.client.get(url, {'count': 3}).status_code, 404)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/eventflow-test-cache'}})
+    def test_file_backend(self):
+        cache.clear()
+        self.assertCachedUntilWrite(lambda series: self.client.delete(f'/api/events/{series.id}/'))
+        cache.clear()
+
+    def test_stats_are_staff_only(self):
+        self.assertEqual(self.client.get('/api/events/cache-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/events/cache-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'expansion', 'compiled_rules'})
+
+
+class AsyncEndpointTests(EventAPITestCase):
+    """Tests that the async read endpoints match their EventViewSet counterparts."""
+
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.series = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        OccurrenceException.objects.create(event=self.series, start_time=utc(2025, 6, 3, 9))
+        self.make_event(utc(2025, 6, 4, 12))
+        self.make_event(utc(2025, 6, 4, 12), user=User.objects.create_user(username='bob', password='secret-pass-123'))
+
+    async def assertMatchesSync(self, path, params=None):
+        response = await self.async_client.get(f'/api/async/events/{path}', params, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self.client.get)(f'/api/events/{path}', params)
+        self.assertEqual(response.json(), json.loads(expected.content))
+
+    async def test_list(self):
+        await self.assertMatchesSync('')
+
+    async def test_calendar(self):
+        await self.assertMatchesSync('calendar/', {'start': '2025-06-01', 'end': '2025-06-08'})
+
+    async def test_occurrences(self):
+        await self.assertMatchesSync(f'{self.series.id}/occurrences/', {'count': 5})
+
+    async def test_expansion_runs_off_the_event_loop(self):
+        threads = []
+
+        def record_thread(expand):
+            def wrapper(*args):
+                threads.append(threading.get_ident())
+                return expand(*args)
+            return wrapper
+
+        with mock.patch('events.async_views.expand_series', record_thread(expand_series)), \
+                mock.patch('events.async_views.expand_window', record_thread(expand_window)):
+            await self.assertMatchesSync(f'{self.series.id}/occurrences/', {'count': 5})
+            await self.assertMatchesSync('calendar/', {'start': '2025-06-01', 'end': '2025-06-08'})
+
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_requires_valid_token(self):
+        response = await AsyncClient().get('/api/async/events/')
+        self.assertEqual(response.status_code, 401)
+        response = await AsyncClient().get('/api/async/events/', headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+    async def test_rejects_bad_windows_and_foreign_events(self):
+        response = await self.async_client.get('/api/async/events/calendar/', {'start': '2025-06-08', 'end': '2025-06-01'}, headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get('/api/async/events/calendar/', {'start': '2000-01-01', 'end': '2100-01-01'}, headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+        other = await Event.objects.exclude(user=self.user).aget()
+        response = await self.async_client.get(f'/api/async/events/{other.id}/occurrences/', headers=self.auth)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(f'/api/async/events/{self.series.id}/occurrences/', {'count': 'abc'}, headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+        await self.assertMatchesSync(f'{self.series.id}/occurrences/', {'count': 5000})
+
+
+class IntervalIndexTests(SimpleTestCase):
+    """Differential tests of the interval index against linear scans."""
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)
+        base = utc(2025, 6, 1)
+        intervals = []
+        for event_id in range(300):
+            start = base + timedelta(minutes=rng.randrange(0, 30 * 24 * 60, 15))
+            intervals.append((start, start + timedelta(minutes=rng.choice([0, 15, 60, 240, 3 * 24 * 60])), event_id))
+        index = IntervalIndex(intervals)
+        for _ in range(300):
+            window_start = base + timedelta(minutes=rng.randrange(-600, 31 * 24 * 60))
+            window_end = window_start + timedelta(minutes=rng.randrange(1, 3000))
+            expected = sorted(i for i in intervals if i[0] < window_end and i[1] > window_start and i[1] > i[0])
+            exclude = rng.choice([None, rng.randrange(300)])
+            with self.subTest(window_start=window_start, window_end=window_end):
+                self.assertEqual(list(index.conflicts(window_start, window_end)), expected)
+                self.assertEqual(
+                    list(index.conflicts(window_start, window_end, exclude)),
+                    [i for i in expected if i[2] != exclude],
+                )
+                self.assertEqual(index.is_busy(window_start, window_end), bool(expected))
+                busy = index.busy(window_start, window_end)
+                self.assertTrue(all(earlier[1] < later[0] for earlier, later in zip(busy, busy[1:])))
+                for start, end, _ in expected:
+                    clipped = (max(start, window_start), min(end, window_end))
+                    self.assertTrue(any(block[0] <= clipped[0] and clipped[1] <= block[1] for block in busy))
+
+
+class FreeBusyTests(EventAPITestCase):
+    """Tests for the free/busy endpoint and the optional overlap check."""
+
+    def test_merges_busy_blocks(self):
+        self.make_event(utc(2025, 6, 2, 9), duration=timedelta(hours=2), frequency='DAILY', interval=1)
+        self.make_event(utc(2025, 6, 3, 10))
+        series = self.make_event(utc(2025, 6, 2, 11), frequency='DAILY', interval=1)
+        OccurrenceException.objects.create(event=series, start_time=utc(2025, 6, 3, 11))
+
+        response = self.client.get('/api/events/freebusy/', {'start': '2025-06-02T10:00:00Z', 'end': '2025-06-04T00:00:00Z'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['busy'], [
+            {'start': '2025-06-02T10:00:00+00:00', 'end': '2025-06-02T12:00:00+00:00'},
+            {'start': '2025-06-03T09:00:00+00:00', 'end': '2025-06-03T11:00:00+00:00'},
+        ])
+
+    @override_settings(EVENTFLOW_PREVENT_OVERLAPS=True)
+    def test_rejects_overlapping_writes(self):
+        self.make_event(utc(2025, 6, 9, 9), frequency='WEEKLY', interval=1)
+        payload = {'title': 'Clash', 'start_time': '2025-06-16T09:30:00Z', 'end_time': '2025-06-16T10:30:00Z'}
+
+        response = self.client.post('/api/events/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('overlaps', str(response.data))
+
+        response = self.client.post('/api/events/', {**payload, 'start_time': '2025-06-16T10:00:00Z'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        # Moving an event within its own slot only conflicts with itself, which is ignored
+        response = self.client.patch(f"/api/events/{response.data['id']}/", {'end_time': '2025-06-16T10:15:00Z'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        daily = {'title': 'Daily', 'start_time': '2025-06-10T09:00:00Z', 'end_time': '2025-06-10T09:15:00Z',
+                 'recurrence_rule': {'frequency': 'DAILY', 'interval': 1}}
+        self.assertEqual(self.client.post('/api/events/', daily, format='json').status_code, 400)
+
+    @override_settings(EVENTFLOW_PREVENT_OVERLAPS=True, EVENTFLOW_OVERLAP_CHECK_DAYS=30)
+    def test_old_series_are_checked_from_now(self):
+        start = (timezone.now() - timedelta(days=400)).replace(hour=9, minute=0, second=0, microsecond=0)
+        series = self.make_event(start, frequency='DAILY', interval=1)
+        self.make_event(start + timedelta(days=10))
+
+        response = self.client.patch(f'/api/events/{series.pk}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.make_event(start + timedelta(days=401))
+        response = self.client.patch(f'/api/events/{series.pk}/', {'title': 'Renamed again'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('overlaps', str(response.data))
+
+    def test_freebusy_window_is_capped(self):
+        with self.settings(EVENTFLOW_MAX_WINDOW_DAYS=31):
+            response = self.client.get('/api/events/freebusy/', {'start': '1950-01-01', 'end': '2050-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(EVENTFLOW_PREVENT_OVERLAPS=True)
+    def test_overlap_check_uses_validated_rules(self):
+        self.make_event(utc(2025, 6, 10, 9), frequency='WEEKLY', interval=1)
+        mondays = {'title': 'Mondays', 'start_time': '2025-06-09T09:00:00Z', 'end_time': '2025-06-09T10:00:00Z',
+                   'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 0}}
+
+        response = self.client.post('/api/events/', mondays, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('interval', response.data['recurrence_rule'])
+
+        response = self.client.post('/api/events/', {**mondays, 'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 1}}, format='json')
+        self.assertEqual(response.status_code, 201)
+        # A partial rule keeps the current frequency; read as DAILY every 2 days it would hit the Tuesdays
+        response = self.client.patch(f"/api/events/{response.data['id']}/", {'recurrence_rule': {'interval': 2}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recurrence_rule']['frequency'], 'WEEKLY')
+
+
+class FindSlotTests(EventAPITestCase):
+    """Tests for the multi-user find-slot endpoint."""
+
+    def test_merge_free_slots(self):
+        busy = [
+            [(utc(2025, 6, 2, 9), utc(2025, 6, 2, 10)), (utc(2025, 6, 2, 13), utc(2025, 6, 2, 14))],
+            [(utc(2025, 6, 2, 9, 30), utc(2025, 6, 2, 11)), (utc(2025, 6, 2, 11, 20), utc(2025, 6, 2, 12))],
+        ]
+        slots = merge_free_slots(busy, utc(2025, 6, 2, 9), utc(2025, 6, 2, 15), timedelta(minutes=30), limit=5)
+        self.assertEqual(slots, [
+            (utc(2025, 6, 2, 12), utc(2025, 6, 2, 13)),
+            (utc(2025, 6, 2, 14), utc(2025, 6, 2, 15)),
+        ])
+        self.assertEqual(len(merge_free_slots(busy, utc(2025, 6, 2, 9), utc(2025, 6, 2, 15), timedelta(minutes=30), limit=1)), 1)
+
+    def test_finds_common_free_time(self):
+        bob = User.objects.create_user(username='bob', password='secret-pass-123')
+        team = Group.objects.create(name='team')
+        team.user_set.add(self.user, bob)
+        self.make_event(utc(2025, 6, 2, 9), duration=timedelta(hours=2), frequency='DAILY', interval=1)
+        self.make_event(utc(2025, 6, 2, 12), user=bob)
+        series = self.make_event(utc(2025, 6, 2, 14), user=bob, frequency='DAILY', interval=1)
+        OccurrenceException.objects.create(event=series, start_time=utc(2025, 6, 2, 14))
+
+        response = self.client.get('/api/events/find-slot/', {
+            'users': f'{self.user.pk},{bob.pk}', 'duration': 60, 'limit': 3,
+            'start': '2025-06-02T09:00:00Z', 'end': '2025-06-03T12:00:00Z',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['duration'], 60)
+        self.assertEqual(response.data['slots'], [
+            {'start': '2025-06-02T11:00:00+00:00', 'end': '2025-06-02T12:00:00+00:00'},
+            {'start': '2025-06-02T13:00:00+00:00', 'end': '2025-06-03T09:00:00+00:00'},
+            {'start': '2025-06-03T11:00:00+00:00', 'end': '2025-06-03T12:00:00+00:00'},
+        ])
+
+    def test_rejects_bad_parameters(self):
+        window = {'start': '2025-06-02T09:00:00Z', 'end': '2025-06-03T09:00:00Z'}
+        for params in (
+            {**window, 'duration': 30},
+            {**window, 'users': self.user.pk, 'duration': 'long'},
+            {**window, 'users': self.user.pk, 'duration': 0},
+            {'users': self.user.pk, 'duration': 30},
+            {**window, 'users': f'{self.user.pk},999999', 'duration': 30},
+        ):
+            response = self.client.get('/api/events/find-slot/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_rejects_bad_limits_and_long_windows(self):
+        params = {'users': self.user.pk, 'duration': 30, 'start': '2025-06-02T09:00:00Z', 'end': '2025-06-03T09:00:00Z'}
+        for limit in ('many', 0, 51):
+            response = self.client.get('/api/events/find-slot/', {**params, 'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.data['detail'], 'limit must be an integer between 1 and 50.')
+
+        with self.settings(EVENTFLOW_MAX_WINDOW_DAYS=31):
+            response = self.client.get('/api/events/find-slot/', {**params, 'start': '1950-01-01', 'end': '2050-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_group_members_are_visible(self):
+        stranger = User.objects.create_user(username='mallory', password='secret-pass-123')
+        params = {'start': '2025-06-02T09:00:00Z', 'end': '2025-06-03T09:00:00Z', 'duration': 30}
+
+        unshared = self.client.get('/api/events/find-slot/', {**params, 'users': f'{self.user.pk},{stranger.pk}'})
+        unknown = self.client.get('/api/events/find-slot/', {**params, 'users': f'{self.user.pk},999999'})
+        self.assertEqual(unshared.status_code, 400)
+        self.assertEqual(unshared.data, unknown.data)
+        self.assertEqual(self.client.get('/api/events/find-slot/', {**params, 'users': self.user.pk}).status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/events/find-slot/', {**params, 'users': f'{self.user.pk},{stranger.pk}'}).status_code, 200)
+
+
+class UpcomingTests(EventAPITestCase):
+    """Tests for the upcoming-occurrences feed."""
+
+    def test_merges_series_and_one_offs(self):
+        daily = self.make_event(utc(2025, 6, 1, 9), frequency='DAILY', interval=1)
+        OccurrenceException.objects.create(event=daily, start_time=utc(2025, 6, 5, 9))
+        weekly = self.make_event(utc(2025, 5, 28, 11), duration=timedelta(hours=2), frequency='WEEKLY', interval=1)
+        one_off = self.make_event(utc(2025, 6, 5, 10))
+        self.make_event(utc(2025, 6, 3, 10))
+
+        with mock.patch('events.views.timezone.now', return_value=utc(2025, 6, 4, 12)), self.assertNumQueries(3):
+            response = self.client.get('/api/events/upcoming/', {'limit': 4})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['id'], item['start']) for item in response.data], [
+            (weekly.id, '2025-06-04T11:00:00+00:00'),
+            (one_off.id, '2025-06-05T10:00:00+00:00'),
+            (daily.id, '2025-06-06T09:00:00+00:00'),
+            (daily.id, '2025-06-07T09:00:00+00:00'),
+        ])
+        self.assertEqual([item['is_recurring_instance'] for item in response.data], [True, False, True, True])
+
+    def test_expands_series_lazily(self):
+        for hour in range(20):
+            self.make_event(utc(2020, 1, 1, hour), frequency='DAILY', interval=1)
+        pulled = []
+
+        def counting_iter_window(*args):
+            for instance in recurrence_utils.iter_window(*args):
+                pulled.append(instance)
+                yield instance
+
+        with mock.patch('events.occurrences.iter_window', counting_iter_window):
+            response = self.client.get('/api/events/upcoming/', {'limit': 5})
+
+        self.assertEqual(len(response.data), 5)
+        starts = [item['start'] for item in response.data]
+        self.assertEqual(starts, sorted(starts))
+        # At most one finished and one upcoming instance per series to prime the merge, plus one per result
+        self.assertLessEqual(len(pulled), 2 * 20 + 5)
+
+    def test_rejects_bad_limit(self):
+        for limit in ('0', '101', 'many'):
+            response = self.client.get('/api/events/upcoming/', {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+
+
+class ConnectionStatsTests(EventAPITestCase):
+    """Tests for the database connection stats endpoint."""
+
+    def test_reports_connection_reuse_to_staff(self):
+        self.assertEqual(self.client.get('/api/events/db-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get('/api/events/db-stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['vendor'], connection.vendor)
+        self.assertGreaterEqual(response.data['requests'], 2)
+        self.assertIsNone(response.data['pool'])
+
+    def test_pool_saturation(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            'pool_min': 1, 'pool_max': 4, 'pool_size': 4, 'pool_available': 1,
+            'requests_waiting': 2, 'requests_num': 50, 'requests_queued': 5, 'requests_wait_ms': 120,
+        }
+        stats = pool_stats(pool)
+        self.assertEqual(stats['in_use'], 3)
+        self.assertEqual(stats['saturation'], 0.75)
+        self.assertEqual((stats['waiting'], stats['requests_queued'], stats['requests_errors']), (2, 5, 0))
+
+
+class MetricsTests(EventAPITestCase):
+    """Tests for the per-request instrumentation and the /metrics endpoint."""
+
+    def server_timing(self, response):
+        """Parses a Server-Timing header into {name: (duration, description)}."""
+        timings = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            values = dict(param.split('=', 1) for param in params)
+            timings[name] = (float(values['dur']), values.get('desc', '').strip('"'))
+        return timings
+
+    def test_server_timing_breaks_down_request(self):
+        self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        self.make_event(utc(2025, 6, 4, 12))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-08'})
+
+        timings = self.server_timing(response)
+        self.assertEqual(timings['expand'][1], f'{len(response.data)} occurrences')
+        self.assertEqual(timings['db'][1], f'{len(queries)} queries')
+        self.assertGreater(timings['render'][0], 0)
+        self.assertGreaterEqual(timings['total'][0], timings['db'][0] + timings['expand'][0])
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        metrics = self.client.get('/metrics').content.decode()
+        self.assertIn('# TYPE eventflow_request_occurrences histogram', metrics)
+        self.assertIn('eventflow_request_db_queries_bucket{view="event-calendar",le="3.0"}', metrics)
+        self.assertIn('eventflow_request_duration_seconds_count{view="event-calendar",method="GET"}', metrics)
+
+    async def test_async_endpoints_are_timed(self):
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await AsyncClient().get('/api/async/events/calendar/', {'start': '2025-06-01', 'end': '2025-06-08'}, headers=auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.server_timing(response)['db'][1], '0 queries')
+
+    @override_settings(EVENTFLOW_METRICS_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_histogram_exposition(self):
+        histogram = Histogram('test_seconds', 'Test histogram.', (0.01, 0.1, 1), ('view',))
+        for value in (0.005, 0.01, 0.5, 3):
+            histogram.observe(value, ('a"b',))
+        self.assertEqual(histogram.expose(), [
+            '# HELP test_seconds Test histogram.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{view="a\\"b",le="0.01"} 2',
+            'test_seconds_bucket{view="a\\"b",le="0.1"} 2',
+            'test_seconds_bucket{view="a\\"b",le="1.0"} 3',
+            'test_seconds_bucket{view="a\\"b",le="+Inf"} 4',
+            'test_seconds_sum{view="a\\"b"} 3.515',
+            'test_seconds_count{view="a\\"b"} 4',
+        ])
+
+
+class ICalendarExportTests(EventAPITestCase):
+    """Tests for the streaming iCalendar export."""
+
+    def export(self, **headers):
+        response = self.client.get('/api/events/export.ics', headers=headers)
+        body = b''.join(response.streaming_content) if response.status_code == 200 else b''
+        return response, body.decode().replace('\r\n ', '').split('\r\n')
+
+    def test_series_round_trip_through_rrule(self):
+        self.make_event(utc(2025, 6, 3, 12))
+        weekly = self.make_event(utc(2025, 6, 2, 9), frequency='WEEKLY', interval=2, weekdays='MO,TH')
+        monthly = self.make_event(utc(2025, 1, 1, 18), frequency='MONTHLY', interval=1, relative_day='-1FR', end_date='2025-12-26')
+        OccurrenceException.objects.create(event=weekly, start_time=utc(2025, 6, 16, 9))
+        OccurrenceException.objects.create(event=monthly, start_time=utc(2025, 2, 28, 18))
+
+        with self.assertNumQueries(2):
+            response, lines = self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/calendar'))
+        self.assertEqual((lines[0], lines[-2], lines[-1]), ('BEGIN:VCALENDAR', 'END:VCALENDAR', ''))
+        self.assertEqual(lines.count('BEGIN:VEVENT'), 3)
+        self.assertIn('RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH', lines)
+        self.assertIn('RRULE:FREQ=MONTHLY;BYDAY=FR;BYSETPOS=-1;UNTIL=20251226T235959Z', lines)
+
+        # Calendar apps expanding the exported RRULE/EXDATE must see the same occurrences as the API
+        events = '\n'.join(lines).split('BEGIN:VEVENT')[1:]
+        for event in (weekly, monthly):
+            vevent = next(block for block in events if f'UID:{event.pk}@' in block)
+            recurrence = '\n'.join(line for line in vevent.split('\n') if line.startswith(('DTSTART', 'RRULE', 'EXDATE')))
+            exported = list(rrulestr(recurrence, forceset=True).between(utc(2025, 1, 1), utc(2026, 1, 1), inc=True))
+            response = self.client.get(f'/api/events/{event.pk}/occurrences/', {'count': 100, 'start': '2025-01-01T00:00:00Z', 'end': '2026-01-01T00:00:00Z'})
+            self.assertEqual([occurrence['start'] for occurrence in response.data], [start.isoformat() for start in exported])
+
+    def test_folds_long_lines_and_escapes_text(self):
+        event = self.make_event(utc(2025, 6, 3, 12))
+        event.title = 'Café; planning, ' + 'é' * 80
+        event.description = 'line one\nline two'
+        event.save()
+
+        response = self.client.get('/api/events/export.ics')
+        body = b''.join(response.streaming_content)
+
+        self.assertTrue(all(len(line) <= 75 for line in body.split(b'\r\n')))
+        body.decode()  # folds must not split multi-byte characters
+        lines = body.decode().replace('\r\n ', '').split('\r\n')
+        self.assertIn('SUMMARY:Café\\; planning\\, ' + 'é' * 80, lines)
+        self.assertIn('DESCRIPTION:line one\\nline two', lines)
+        self.assertEqual(fold_line('x' * 75), b'x' * 75 + b'\r\n')
+
+    def test_unchanged_calendar_is_not_modified(self):
+        self.make_event(utc(2025, 6, 3, 12))
+        response, _ = self.export()
+        response, _ = self.export(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_only_exports_own_events(self):
+        other = User.objects.create_user(username='bob', password='secret-pass-123')
+        self.make_event(utc(2025, 6, 3, 12), user=other)
+        _, lines = self.export()
+        self.assertNotIn('BEGIN:VEVENT', lines)
+
+
+def ics_stream(*lines):
+    """Builds a CRLF-delimited iCalendar byte stream, one bytes line per content line, as files are read."""
+    return [f'{line}\r\n'.encode() for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', *lines, 'END:VCALENDAR')]
+
+
+class ICalendarImportTests(EventAPITestCase):
+    """Tests for the iCalendar import pipeline and upload endpoint."""
+
+    def occurrence_starts(self, event, start='2025-01-01T00:00:00Z', end='2026-01-01T00:00:00Z'):
+        response = self.client.get(f'/api/events/{event.pk}/occurrences/', {'count': 400, 'start': start, 'end': end})
+        return [occurrence['start'] for occurrence in response.data]
+
+    def test_export_round_trip(self):
+        weekly = self.make_event(utc(2025, 6, 2, 9), frequency='WEEKLY', interval=2, weekdays='MO,TH')
+        self.make_event(utc(2025, 1, 31, 18), frequency='MONTHLY', interval=1, relative_day='-1FR', end_date='2025-12-26')
+        self.make_event(utc(2025, 6, 3, 12))
+        OccurrenceException.objects.create(event=weekly, start_time=utc(2025, 6, 16, 9))
+        exported = b''.join(self.client.get('/api/events/export.ics').streaming_content)
+
+        bob = User.objects.create_user(username='bob', password='secret-pass-123')
+        stats = import_calendar(exported.splitlines(keepends=True), bob)
+
+        self.assertEqual((stats['events'], stats['series'], stats['exceptions'], stats['skipped']), (3, 2, 1, 0))
+        for original in Event.objects.filter(user=self.user, recurrence_rule__isnull=False):
+            copy = Event.objects.get(user=bob, start_time=original.start_time)
+            self.assertEqual(rule_to_tuple(copy.recurrence_rule), rule_to_tuple(original.recurrence_rule))
+            self.assertEqual(
+                set(copy.exceptions.values_list('start_time', flat=True)), set(original.exceptions.values_list('start_time', flat=True)),
+            )
+
+    def test_converts_rules_to_utc_series(self):
+        stats = import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'UID:tokyo', 'DTSTART;TZID=Asia/Tokyo:20250602T080000', 'DURATION:PT45M',
+            'RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=6', 'EXDATE;TZID=Asia/Tokyo:20250604T080000', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:until', 'DTSTART:20250601T120000Z', 'DTEND:20250601T130000Z',
+            'RRULE:FREQ=DAILY;UNTIL=20250605T110000Z', 'END:VEVENT',
+        ), self.user)
+        self.assertEqual((stats['series'], stats['exceptions']), (2, 1))
+
+        # Monday 08:00 in Tokyo is Sunday 23:00 UTC, so the weekdays shift along with the start
+        tokyo = Event.objects.get(start_time=utc(2025, 6, 1, 23))
+        self.assertEqual((tokyo.recurrence_rule.weekdays, str(tokyo.recurrence_rule.end_date)), ('TU,SU', '2025-06-17'))
+        self.assertEqual(tokyo.end_time - tokyo.start_time, timedelta(minutes=45))
+        expected = rrulestr('DTSTART;TZID=Asia/Tokyo:20250602T080000\nRRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=6', forceset=True)
+        expected.exdate(datetime(2025, 6, 4, 8, tzinfo=ZoneInfo('Asia/Tokyo')))
+        self.assertEqual(self.occurrence_starts(tokyo), [start.astimezone(dt_timezone.utc).isoformat() for start in expected])
+
+        # UNTIL falls before the 5 June instance, so the last occurrence day is 4 June
+        until = Event.objects.get(start_time=utc(2025, 6, 1, 12))
+        self.assertEqual(str(until.recurrence_rule.end_date), '2025-06-04')
+
+    def test_overrides_unsupported_rules_and_dedupe(self):
+        stats = import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'UID:moved', 'RECURRENCE-ID:20250610T090000Z', 'DTSTART:20250610T150000Z',
+            'DTEND:20250610T160000Z', 'SUMMARY:Moved standup', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:moved', 'DTSTART:20250609T090000Z', 'DTEND:20250609T091500Z', 'SUMMARY:Standup',
+            'RRULE:FREQ=DAILY', 'BEGIN:VALARM', 'TRIGGER:-PT5M', 'END:VALARM', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:other', 'DTSTART:20250609T100000Z', 'DTEND:20250609T110000Z', 'RRULE:FREQ=DAILY', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:monthday', 'DTSTART:20250609T100000Z', 'DTEND:20250609T110000Z',
+            'RRULE:FREQ=MONTHLY;BYMONTHDAY=9,19', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:broken', 'DTEND:20250609T110000Z', 'END:VEVENT',
+        ), self.user, batch_size=2)
+
+        self.assertEqual(stats, {'events': 4, 'series': 2, 'rules': 1, 'exceptions': 1, 'skipped': 1, 'unsupported_rules': 1})
+        standup = Event.objects.get(title='Standup')
+        self.assertEqual(list(standup.exceptions.values_list('start_time', flat=True)), [utc(2025, 6, 10, 9)])
+        self.assertFalse(Event.objects.get(title='Moved standup').recurrence_rule)
+        self.assertEqual(Event.objects.filter(recurrence_rule=standup.recurrence_rule).count(), 2)
+
+    @override_settings(EVENTFLOW_MATERIALIZE_OCCURRENCES=True, EVENTFLOW_OCCURRENCE_HORIZON_DAYS=30)
+    def test_imports_are_materialized(self):
+        import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'UID:moved', 'RECURRENCE-ID:20250610T090000Z', 'DTSTART:20250610T150000Z',
+            'DTEND:20250610T160000Z', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:moved', 'DTSTART:20250609T090000Z', 'DTEND:20250609T091500Z',
+            'RRULE:FREQ=DAILY;COUNT=5', 'EXDATE:20250612T090000Z', 'END:VEVENT',
+        ), self.user, batch_size=1)
+
+        series = Event.objects.get(recurrence_rule__isnull=False)
+        self.assertIsNotNone(series.materialized_until)
+        self.assertEqual(
+            list(series.materialized_occurrences.values_list('start_time', flat=True)),
+            [utc(2025, 6, 9, 9), utc(2025, 6, 11, 9), utc(2025, 6, 13, 9)],
+        )
+        self.assertEqual(EventOccurrence.objects.count(), 4)
+
+    def test_out_of_range_durations_are_skipped(self):
+        stats = import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'DTSTART:20250609T090000Z', 'DURATION:P999999999W', 'END:VEVENT',
+            'BEGIN:VEVENT', 'DTSTART:99991231T090000Z', 'DURATION:P2D', 'END:VEVENT',
+            'BEGIN:VEVENT', 'DTSTART:20250609T090000Z', 'DURATION:PT1H', 'END:VEVENT',
+        ), self.user)
+        self.assertEqual((stats['events'], stats['skipped']), (1, 2))
+
+    def test_shared_rules_are_copied_on_write(self):
+        import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'DTSTART:20250609T090000Z', 'DTEND:20250609T100000Z', 'RRULE:FREQ=DAILY', 'END:VEVENT',
+            'BEGIN:VEVENT', 'DTSTART:20250609T110000Z', 'DTEND:20250609T120000Z', 'RRULE:FREQ=DAILY', 'END:VEVENT',
+        ), self.user)
+        first, second = Event.objects.order_by('start_time')
+        shared_rule = first.recurrence_rule_id
+        self.assertEqual(second.recurrence_rule_id, shared_rule)
+
+        response = self.client.patch(f'/api/events/{first.pk}/', {'recurrence_rule': {'frequency': 'WEEKLY'}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/events/bulk/', {'update': [{'id': second.pk, 'recurrence_rule': None}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        first.refresh_from_db()
+        self.assertNotEqual(first.recurrence_rule_id, shared_rule)
+        self.assertEqual((first.recurrence_rule.frequency, first.recurrence_rule.interval), ('WEEKLY', 1))
+        # Clearing the last event's rule keeps the shared row, which other users' events may reuse
+        self.assertEqual(RecurrenceRule.objects.get(pk=shared_rule).frequency, 'DAILY')
+
+    def test_upload_endpoint(self):
+        upload = SimpleUploadedFile('calendar.ics', b''.join(ics_stream(
+            'BEGIN:VEVENT', 'DTSTART;VALUE=DATE:20250609', 'SUMMARY:Offsite\\, day 1', 'END:VEVENT',
+        )), content_type='text/calendar')
+        response = self.client.post('/api/events/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['events'], 1)
+        event = Event.objects.get(user=self.user)
+        self.assertEqual((event.title, event.is_all_day, event.end_time - event.start_time), ('Offsite, day 1', True, timedelta(days=1)))
+
+        bad = SimpleUploadedFile('notes.txt', b'hello', content_type='text/plain')
+        self.assertEqual(self.client.post('/api/events/import/', {'file': bad}, format='multipart').status_code, 400)
+
+    def test_huge_counts_are_not_expanded(self):
+        stats = import_calendar(ics_stream(
+            'BEGIN:VEVENT', 'UID:daily', 'DTSTART:20250601T120000Z', 'DURATION:PT1H', 'RRULE:FREQ=DAILY;INTERVAL=2;COUNT=50000', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:monthly', 'DTSTART:20250601T120000Z', 'DURATION:PT1H', 'RRULE:FREQ=MONTHLY;COUNT=2000000000', 'END:VEVENT',
+            'BEGIN:VEVENT', 'UID:weekly', 'DTSTART:20250601T120000Z', 'DURATION:PT1H', 'RRULE:FREQ=WEEKLY;COUNT=2000000000', 'END:VEVENT',
+        ), self.user)
+
+        self.assertEqual((stats['events'], stats['series'], stats['unsupported_rules']), (3, 1, 2))
+        daily = Event.objects.get(recurrence_rule__isnull=False)
+        self.assertEqual(daily.recurrence_rule.end_date, (utc(2025, 6, 1) + timedelta(days=2 * 49999)).date())
+
+    @override_settings(EVENTFLOW_ICS_MAX_EVENTS=2, EVENTFLOW_ICS_MAX_UPLOAD_BYTES=1024)
+    def test_upload_limits(self):
+        vevent = ('BEGIN:VEVENT', 'DTSTART;VALUE=DATE:20250609', 'END:VEVENT')
+        upload = SimpleUploadedFile('calendar.ics', b''.join(ics_stream(*vevent * 3)), content_type='text/calendar')
+        response = self.client.post('/api/events/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('more than 2 events', str(response.data))
+        self.assertFalse(Event.objects.exists())
+
+        upload = SimpleUploadedFile('calendar.ics', b''.join(ics_stream('X-PADDING:' + 'x' * 2000)), content_type='text/calendar')
+        self.assertEqual(self.client.post('/api/events/import/', {'file': upload}, format='multipart').status_code, 400)
+
+    def test_parses_quoted_parameters(self):
+        self.assertEqual(
+            parse_content_line('ATTENDEE;CN="Doe; John: PM";ROLE=CHAIR:mailto:john@example.com'),
+            ('ATTENDEE', {'CN': 'Doe; John: PM', 'ROLE': 'CHAIR'}, 'mailto:john@example.com'),
+        )
+
+
+class InternedRuleTests(EventAPITestCase):
+    """Tests for content-addressed, shared recurrence rules."""
+
+    def test_identical_rules_share_one_row(self):
+        payload = {'title': 'Gym', 'start_time': '2025-06-02T07:00:00Z', 'end_time': '2025-06-02T08:00:00Z',
+                   'recurrence_rule': {'frequency': 'WEEKLY', 'interval': 1, 'weekdays': 'MO,WE,FR'}}
+        first = self.client.post('/api/events/', payload, format='json').data
+        reordered = {**payload, 'recurrence_rule': {**payload['recurrence_rule'], 'weekdays': 'FR, MO,WE'}}
+        second = self.client.post('/api/events/', reordered, format='json').data
+        bulk = self.client.post('/api/events/bulk/', {'create': [payload, payload]}, format='json').data
+
+        rule_ids = {first['recurrence_rule']['id'], second['recurrence_rule']['id'], *(event['recurrence_rule']['id'] for event in bulk['created'])}
+        self.assertEqual(len(rule_ids), 1)
+        self.assertEqual(RecurrenceRule.objects.count(), 1)
+        self.assertNotIn('fingerprint', first['recurrence_rule'])
+        self.assertEqual(second['recurrence_rule']['weekdays'], 'MO,WE,FR')
+
+    def test_editing_one_event_leaves_the_others(self):
+        first = self.make_event(utc(2025, 6, 2, 9), frequency='DAILY', interval=1)
+        second = self.make_event(utc(2025, 6, 2, 11), frequency='DAILY', interval=1)
+
+        response = self.client.patch(f'/api/events/{first.pk}/', {'recurrence_rule': {'interval': 2}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/events/bulk/', {'update': [{'id': second.pk, 'recurrence_rule': {'frequency': 'WEEKLY'}}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.recurrence_rule.frequency, first.recurrence_rule.interval), ('DAILY', 2))
+        self.assertEqual((second.recurrence_rule.frequency, second.recurrence_rule.interval), ('WEEKLY', 1))
+        self.assertEqual(RecurrenceRule.objects.count(), 3)
+
+    def test_intern_many(self):
+        existing = RecurrenceRule.objects.intern(frequency='DAILY')
+        with self.assertNumQueries(3):
+            interned = RecurrenceRule.objects.intern_many([
+                {'frequency': 'DAILY', 'interval': 1}, {'frequency': 'WEEKLY', 'weekdays': 'TH,TU'}, {'frequency': 'WEEKLY', 'weekdays': 'TU,TH'},
+            ])
+
+        self.assertEqual(len(interned), 2)
+        self.assertIn(existing, interned.values())
+        self.assertEqual(RecurrenceRule.objects.get(weekdays='TU,TH').fingerprint, recurrence_utils.rule_fingerprint({'frequency': 'WEEKLY', 'weekdays': 'TU,TH'}))
+
+    def test_normalization_keeps_invalid_intervals(self):
+        self.assertEqual(recurrence_utils.normalize_rule({'frequency': 'DAILY'})['interval'], 1)
+        self.assertEqual(recurrence_utils.normalize_rule({'frequency': 'DAILY', 'interval': 0})['interval'], 0)
+        self.assertNotEqual(
+            recurrence_utils.rule_fingerprint({'frequency': 'DAILY', 'interval': 0}),
+            recurrence_utils.rule_fingerprint({'frequency': 'DAILY', 'interval': 1}),
+        )
+
+
+class BenchmarkSuiteTests(TestCase):
+    """Tests for the seeding command and the performance regression suite."""
+
+    def test_compare_results(self):
+        baseline = {'list@1000': {'median_ms': 10.0}, 'calendar@1000': {'median_ms': 1.0}, 'removed': {'median_ms': 1.0}}
+        current = {'list@1000': {'median_ms': 13.0}, 'calendar@1000': {'median_ms': 1.4}, 'added': {'median_ms': 1.0}}
+
+        rows = {row['scenario']: row for row in compare_results(current, baseline, tolerance=0.25, min_delta_ms=0.5)}
+
+        self.assertEqual(set(rows), {'list@1000', 'calendar@1000'})
+        self.assertTrue(rows['list@1000']['regressed'])
+        self.assertAlmostEqual(rows['list@1000']['change'], 0.3)
+        # 40% slower, but within the absolute jitter floor
+        self.assertFalse(rows['calendar@1000']['regressed'])
+
+    def test_seed_calendar(self):
+        call_command('seed_calendar', users=2, events_per_user=20, recurring_ratio=0.5, exceptions_per_series=2, stdout=StringIO())
+
+        events = Event.objects.filter(user__in=bench_users())
+        self.assertEqual(bench_users().count(), 2)
+        self.assertEqual(events.count(), 40)
+        self.assertTrue(events.filter(recurrence_rule__isnull=False).exists())
+        self.assertTrue(OccurrenceException.objects.filter(event__in=events).exists())
+
+        call_command('seed_calendar', users=2, events_per_user=5, clear=True, stdout=StringIO())
+        self.assertEqual(Event.objects.filter(user__in=bench_users()).count(), 10)
+
+    def test_benchmark_suite_writes_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark_suite', sizes=[40], users=2, repeat=2, output=output, stdout=StringIO())
+            with open(output) as fh:
+                results = json.load(fh)
+            self.assertEqual(results['vendor'], connection.vendor)
+            self.assertEqual(
+                set(results['scenarios']),
+                {'expand_recurrence', *(f'{name}@40' for name in ('list', 'occurrences', 'calendar', 'create', 'delete_occurrence'))},
+            )
+
+            for stats in results['scenarios'].values():
+                stats['median_ms'] = 0.001
+            with open(output, 'w') as fh:
+                json.dump(results, fh)
+            with self.assertRaisesMessage(CommandError, 'regressed'):
+                call_command('benchmark_suite', sizes=[80], users=2, repeat=2, baseline=output, min_delta_ms=0, stdout=StringIO())
@@ -1,9 +1,16 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from eventflow_backend.renderers import FastJSONRenderer, ICalendarRenderer
 from .views import EventViewSet
 
 # Initialize the default router and register the EventViewSet at the root
 router = DefaultRouter()
 router.register(r'', EventViewSet, basename='event')
 
+# The iCalendar export keeps its file extension, which router routes cannot express
+export_ics = EventViewSet.as_view({'get': 'export_ics'}, renderer_classes=[FastJSONRenderer, ICalendarRenderer])
+
 # Use the router's automatically generated URLs
-urlpatterns = router.urls
+urlpatterns = [
+    path('export.ics', export_ics, name='event-export-ics'),
+] + router.urls
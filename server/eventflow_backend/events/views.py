@@ -1,11 +1,26 @@
+from django.http import StreamingHttpResponse
+from datetime import timedelta
+from django.utils import timezone
 from django.shortcuts import render
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, DestroyModelMixin, ListModelMixin
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from .models import Event, OccurrenceException
-from .serializers import EventSerializer, OccurrenceExceptionSerializer
-from .recurrence_utils import expand_recurrence
+from .materialization import materialization_enabled, materialized_window, remove_materialized_occurrence
+from .serializers import EventBulkSerializer, EventImportSerializer, EventSerializer, OccurrenceExceptionBulkSerializer, OccurrenceExceptionSerializer
+from .fast_serializers import event_values_serializer
+from .icalendar import iter_calendar
+from .occurrences import exception_times_of, expand_series, expand_window, max_window, parse_count, parse_window_bound, serialize_occurrence, upcoming_occurrences, window_filter, window_too_long
+from .pagination import EventKeysetPagination
+from .conditional import conditional_read
+from .expansion_cache import expansion_cache
+from .availability import find_common_slots, schedulable_user_ids
+from .connections import connection_stats
+from .intervals import user_busy_index
+from .recurrence_utils import compiled_rule_cache
+from eventflow_backend.renderers import FastJSONRenderer
 from dateutil.parser import parse
 
 class EventViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, DestroyModelMixin, ListModelMixin, viewsets.GenericViewSet):
@@ -16,10 +31,80 @@ class EventViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, Destr
     """
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = EventKeysetPagination
+    stream_chunk_size = 500
+    max_slot_users = 200
+    max_slot_results = 50
+    max_upcoming_results = 100
 
     def get_queryset(self):
-        """Returns events belonging to the authenticated user."""
-        return Event.objects.filter(user=self.request.user)
+        """
+        Returns events belonging to the authenticated user.
+        The nested recurrence rule is joined in, and exceptions are prefetched for the calendar,
+        so query counts do not grow with the number of events.
+        """
+        queryset = Event.objects.filter(user=self.request.user).select_related('recurrence_rule')
+        if self.action == 'calendar':
+            queryset = queryset.prefetch_related('exceptions')
+        return queryset
+
+    @conditional_read
+    def list(self, request, *args, **kwargs):
+        """
+        Lists the authenticated user's events ordered by start time (US-06).
+        Pass 'cursor' or 'page_size' for keyset-paginated pages, or 'stream=true' to stream
+        the full list as JSON while reading the events from the database in chunks.
+        Rows are read with `.values()` and rendered by the precompiled read-only serializer,
+        which produces the same output as EventSerializer.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('start_time', 'pk')
+        rows = event_values_serializer.values(queryset)
+        if request.query_params.get('stream') in ('1', 'true'):
+            response = StreamingHttpResponse(self.stream_events(rows), content_type='application/json')
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(event_values_serializer.serialize(page))
+        return Response(event_values_serializer.serialize(rows))
+
+    def stream_events(self, rows):
+        """
+        Yields a JSON array of serialized events, holding at most one chunk in memory at a time.
+        """
+        renderer = FastJSONRenderer()
+        yield b'['
+        chunk = []
+        first = True
+        for row in rows.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(row)
+            if len(chunk) >= self.stream_chunk_size:
+                # Render the chunk as an array and strip its brackets to splice it into the stream
+                yield (b'' if first else b',') + renderer.render(event_values_serializer.serialize(chunk))[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield (b'' if first else b',') + renderer.render(event_values_serializer.serialize(chunk))[1:-1]
+        yield b']'
+
+    @conditional_read
+    def export_ics(self, request):
+        """
+        Streams the authenticated user's events as an iCalendar file, routed at 'export.ics'.
+        Series are exported with their RRULE and cancelled occurrences as EXDATE, so nothing is expanded
+        and calendar apps can subscribe to the URL; unchanged calendars are answered with 304.
+        """
+        response = StreamingHttpResponse(
+            iter_calendar(self.get_queryset(), self.stream_chunk_size), content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="eventflow.ics"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @conditional_read
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieves a single event (US-08), answering 304 Not Modified when the client's copy is current."""
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Saves a new event with the authenticated user as the owner (US-01 to US-05)."""
@@ -33,47 +118,229 @@ class EventViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, Destr
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Creates, partially updates and deletes many events in a single transaction.
+        Expects 'create' (event objects), 'update' (event objects with 'id') and 'delete' (ids) lists.
+        Returns per-item errors, indexed like the request lists, if any item is invalid.
+        """
+        serializer = EventBulkSerializer(data=request.data, context={**self.get_serializer_context(), 'queryset': self.get_queryset()})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save(user=request.user)
+        return Response({
+            'created': EventSerializer(result['created'], many=True).data,
+            'updated': EventSerializer(result['updated'], many=True).data,
+            'deleted': result['deleted'],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_ics(self, request):
+        """
+        Imports the VEVENTs of an uploaded iCalendar file ('file', multipart) as the user's events.
+        Series keep their rules and EXDATEs as exceptions; large files are parsed as a stream and
+        written in batches. Returns counts of the events, rules and exceptions created and of skipped items.
+        """
+        serializer = EventImportSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(user=request.user), status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['get'], url_path='occurrences')
+    @conditional_read
     def occurrences(self, request, pk=None):
         """
         Retrieves occurrences of a recurring event for calendar display (US-06).
         Expands the recurrence rule into individual instances, excluding any exceptions.
-        Query parameter 'count' determines the maximum number of occurrences to return (default: 10).
+        Query parameter 'count' determines the maximum number of occurrences to return (default: 10, max 1000).
+        Optional 'start' and 'end' parameters restrict the instances to those starting in [start, end).
+        Expansions are cached in the shared expansion cache until the user's events change.
         """
         event = self.get_object()
         if not event.recurrence_rule:
             return Response({'detail': 'This event does not have a recurrence rule.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Construct recurrence rule dictionary from the event's recurrence rule
-        rule = {
-            'frequency': event.recurrence_rule.frequency,
-            'interval': event.recurrence_rule.interval,
-            'weekdays': event.recurrence_rule.weekdays,
-            'relative_day': event.recurrence_rule.relative_day,
-            'end_date': event.recurrence_rule.end_date.isoformat() if event.recurrence_rule.end_date else None,
-        }
-        count = int(request.query_params.get('count', 10))
-
-        # Fetch occurrence exceptions to exclude them from the expanded instances
-        exceptions = OccurrenceException.objects.filter(event=event).values_list('start_time', flat=True)
-        exception_times = {dt.replace(microsecond=0) for dt in exceptions}
-
-        data = []
-        duration = event.end_time - event.start_time
-        for start_dt in expand_recurrence(event.start_time, event.end_time, rule, count=1000):
-            if start_dt.replace(microsecond=0) not in exception_times:
-                occurrence_end_dt = start_dt + duration
-                data.append({
-                    'id': event.id,
-                    'title': event.title,
-                    'start': start_dt.isoformat(),
-                    'end': occurrence_end_dt.isoformat() if occurrence_end_dt else None,
-                    'is_recurring_instance': True,
-                })
-            if len(data) >= count:
-                break
-
-        return Response(data)
+        try:
+            count = parse_count(request.query_params.get('count'))
+        except ValueError:
+            return Response({'detail': 'count must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            after = parse_window_bound(request.query_params['start']) if 'start' in request.query_params else event.start_time
+            before = parse_window_bound(request.query_params['end']) if 'end' in request.query_params else None
+        except (ValueError, OverflowError):
+            return Response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        key = expansion_cache.key(request.user.pk, 'occurrences', event.pk, count, after.isoformat(), before.isoformat() if before else '')
+        return Response(expansion_cache.get_or_set(
+            key, lambda: expand_series(event, exception_times_of(event.exceptions.all()), after, before, count),
+        ))
+
+    @action(detail=False, methods=['get'], url_path='calendar')
+    @conditional_read
+    def calendar(self, request):
+        """
+        Retrieves every occurrence overlapping a calendar window in a single request (US-06).
+        Expands one-off and recurring events together, excluding any exceptions.
+        Query parameters 'start' and 'end' bound the window; 'end' is exclusive, and the window
+        spans at most EVENTFLOW_MAX_WINDOW_DAYS.
+        Windows are cached in the shared expansion cache until the user's events change.
+        """
+        start_param = request.query_params.get('start')
+        end_param = request.query_params.get('end')
+        if not start_param or not end_param:
+            return Response({'detail': 'start and end are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window_start = parse_window_bound(start_param)
+            window_end = parse_window_bound(end_param)
+        except (ValueError, OverflowError):
+            return Response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_end <= window_start:
+            return Response({'detail': 'end must be after start.'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_too_long(window_start, window_end):
+            return Response({'detail': f'The window can span at most {max_window().days} days.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        key = expansion_cache.key(request.user.pk, 'calendar', window_start.isoformat(), window_end.isoformat())
+        return Response(expansion_cache.get_or_set(key, lambda: self.expand_window(window_start, window_end)))
+
+    def expand_window(self, window_start, window_end):
+        """Returns the serialized occurrences overlapping [window_start, window_end), sorted by start."""
+        if materialization_enabled():
+            rows = materialized_window(self.request.user, window_start, window_end)
+            if rows is not None:
+                return [serialize_occurrence(*row) for row in rows]
+        events = self.get_queryset().filter(window_filter(window_start, window_end))
+        return expand_window(events, lambda event: exception_times_of(event.exceptions.all()), window_start, window_end)
+
+    @action(detail=False, methods=['get'], url_path='upcoming')
+    def upcoming(self, request):
+        """
+        Retrieves the authenticated user's next occurrences that have not ended yet (US-07).
+        Query parameter 'limit' sets how many to return (default 10, max 100).
+        Series are expanded lazily from now and merged with the one-off events, so only
+        the returned occurrences are generated, whatever the number or age of the series.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= self.max_upcoming_results:
+            return Response({'detail': f'limit must be between 1 and {self.max_upcoming_results}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        queryset = self.get_queryset()
+        one_offs = queryset.filter(recurrence_rule__isnull=True, end_time__gt=now).order_by('start_time', 'pk')[:limit]
+        series = list(queryset.filter(recurrence_rule__isnull=False))
+        exception_times = {}
+        if series:
+            # Only exceptions late enough to cancel an instance still in progress can matter
+            earliest = (now - max(event.end_time - event.start_time for event in series)).replace(microsecond=0)
+            exceptions = OccurrenceException.objects.filter(
+                event__in=[event.id for event in series], start_time__gte=earliest,
+            ).values_list('event_id', 'start_time')
+            for event_id, start_time in exceptions:
+                exception_times.setdefault(event_id, set()).add(start_time.replace(microsecond=0))
+        return Response(upcoming_occurrences(one_offs, series, exception_times, now, limit))
+
+    @action(detail=False, methods=['get'], url_path='freebusy')
+    @conditional_read
+    def freebusy(self, request):
+        """
+        Reports when the authenticated user is busy within a window, without event details.
+        Query parameters 'start' and 'end' bound the window; 'end' is exclusive, and the window
+        spans at most EVENTFLOW_MAX_WINDOW_DAYS. Overlapping and touching occurrences are merged into disjoint busy blocks.
+        """
+        try:
+            window_start = parse_window_bound(request.query_params['start'])
+            window_end = parse_window_bound(request.query_params['end'])
+        except KeyError:
+            return Response({'detail': 'start and end are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, OverflowError):
+            return Response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_end <= window_start:
+            return Response({'detail': 'end must be after start.'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_too_long(window_start, window_end):
+            return Response({'detail': f'The window can span at most {max_window().days} days.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        index = user_busy_index(request.user.pk, window_start, window_end)
+        return Response({
+            'start': window_start.isoformat(),
+            'end': window_end.isoformat(),
+            'busy': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in index.busy(window_start, window_end)],
+        })
+
+    @action(detail=False, methods=['get'], url_path='find-slot')
+    def find_slot(self, request):
+        """
+        Finds the earliest times at which several users are all free, for scheduling meetings.
+        Query parameters: 'users' (comma-separated user ids), 'duration' (minutes), 'start' and
+        'end' bounding the search window (at most EVENTFLOW_MAX_WINDOW_DAYS apart), and optional
+        'limit' (default 5, between 1 and 50).
+        Returns free slots at least 'duration' long; only busy times are consulted, never event details.
+        Users can be the requester and members of their groups; staff may pass anyone.
+        """
+        try:
+            user_ids = sorted({int(pk) for pk in request.query_params.get('users', '').split(',') if pk.strip()})
+            duration = timedelta(minutes=int(request.query_params['duration']))
+        except (KeyError, ValueError):
+            return Response({'detail': 'users and duration (minutes) are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 5))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_slot_results:
+            return Response({'detail': f'limit must be an integer between 1 and {self.max_slot_results}.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            window_start = parse_window_bound(request.query_params['start'])
+            window_end = parse_window_bound(request.query_params['end'])
+        except KeyError:
+            return Response({'detail': 'start and end are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, OverflowError):
+            return Response({'detail': 'start and end must be valid dates.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not user_ids or len(user_ids) > self.max_slot_users:
+            return Response({'detail': f'Pass between 1 and {self.max_slot_users} users.'}, status=status.HTTP_400_BAD_REQUEST)
+        if duration <= timedelta(0) or window_end - window_start < duration:
+            return Response({'detail': 'duration must be positive and the window at least duration long.'}, status=status.HTTP_400_BAD_REQUEST)
+        if window_too_long(window_start, window_end):
+            return Response({'detail': f'The window can span at most {max_window().days} days.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Unknown and unshared users get the same answer, so ids cannot be probed
+        if schedulable_user_ids(request.user, user_ids) != set(user_ids):
+            return Response({'detail': 'users must be yourself or members of a group you belong to.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = find_common_slots(user_ids, window_start, window_end, duration, limit)
+        return Response({
+            'users': user_ids,
+            'duration': int(duration.total_seconds() // 60),
+            'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots],
+        })
+
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """Reports this worker's expansion and compiled-rule cache counters, for tuning (staff only)."""
+        return Response({
+            'expansion': expansion_cache.stats(),
+            'compiled_rules': {
+                'hits': compiled_rule_cache.hits,
+                'misses': compiled_rule_cache.misses,
+                'size': len(compiled_rule_cache),
+                'maxsize': compiled_rule_cache.maxsize,
+            },
+        })
+
+    @action(detail=False, methods=['get'], url_path='db-stats', permission_classes=[permissions.IsAdminUser])
+    def db_stats(self, request):
+        """Reports this worker's database connection reuse and pool saturation, for sizing (staff only)."""
+        return Response(connection_stats())
+
+    @action(detail=False, methods=['post'], url_path='occurrences/delete')
+    def delete_occurrences(self, request):
+        """
+        Deletes many occurrences across the user's recurring events by creating exceptions (US-09).
+        Expects either 'occurrences', a list of {'event', 'start_time'} pairs, or a 'start'/'end'
+        range that cancels every instance of every series starting inside it.
+        """
+        serializer = OccurrenceExceptionBulkSerializer(data=request.data, context={**self.get_serializer_context(), 'queryset': self.get_queryset()})
+        serializer.is_valid(raise_exception=True)
+        count = serializer.save()
+        return Response({'detail': f'{count} occurrences deleted.', 'count': count}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='occurrences/delete')
     def delete_occurrence(self, request, pk=None):
@@ -88,8 +355,16 @@ class EventViewSet(CreateModelMixin, RetrieveModelMixin, UpdateModelMixin, Destr
             if not occurrence_start_time_str:
                 return Response({'detail': 'start_time is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            occurrence_start_time = parse(occurrence_start_time_str)
-            OccurrenceException.objects.create(event=event, start_time=occurrence_start_time)
+            # Exceptions match instances to the second; storing them that way lets the
+            # (event, start_time) unique constraint turn repeated deletes into no-ops
+            occurrence_start_time = parse(occurrence_start_time_str).replace(microsecond=0)
+            OccurrenceException.objects.bulk_create(
+                [OccurrenceException(event=event, start_time=occurrence_start_time)], ignore_conflicts=True,
+            )
+            if materialization_enabled() and event.recurrence_rule_id:
+                remove_materialized_occurrence(event, occurrence_start_time)
+            # bulk_create sends no post_save signal, so invalidate cached expansions here
+            expansion_cache.invalidate(event.user_id)
 
             return Response({'detail': 'Occurrence deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .authentication import user_cache
+        user_cache.maxsize = getattr(settings, 'EVENTFLOW_AUTH_USER_CACHE_SIZE', user_cache.maxsize)
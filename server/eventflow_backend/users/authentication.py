@@ -0,0 +1,94 @@
+import copy
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+class UserCache:
+    """
+    Thread-safe, size-bounded LRU cache of User rows keyed by user id, with a per-entry expiry.
+    Ids are compared as strings, since JWT claims carry them that way.
+    Entries are dropped when the user is saved or deleted in this process; the expiry bounds how
+    long a change made in another worker (e.g. deactivating the account) can go unnoticed.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id):
+        """Return the cached User for an id, or None if it is missing or expired."""
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def set(self, user_id, user, timeout):
+        """Cache a User for timeout seconds, evicting the least recently used entries beyond maxsize."""
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Drop the cached entry for a user id, if any."""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        """Drop every cached entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+user_cache = UserCache()
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reuses the user a token resolves to for EVENTFLOW_AUTH_USER_CACHE_SECONDS,
+    saving the User query on every API request. The token itself is still verified each time, and
+    the active and revoked-token checks run against the cached user. With the setting at 0 it
+    behaves exactly like JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        timeout = getattr(settings, 'EVENTFLOW_AUTH_USER_CACHE_SECONDS', 0)
+        if timeout <= 0:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, timeout)
+        else:
+            self.check_user(user, validated_token)
+        # Each request gets its own copy, so nothing one request sets on its user leaks into another
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        """Repeats the checks JWTAuthentication.get_user makes after loading the user."""
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
@@ -0,0 +1,9 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import user_cache
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drops a user's cached row whenever the user is saved or deleted, e.g. deactivated."""
+    user_cache.invalidate(instance.pk)
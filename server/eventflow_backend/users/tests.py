@@ -1,3 +1,83 @@
-from django.test import TestCase
+import time
+from unittest import mock
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.test import Client, TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import user_cache
+from .views import LoginView
+
+
+class StatelessAPITests(TestCase):
+    """Tests that API requests neither touch sessions nor run the browser-only middleware."""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='secret-pass-123')
+        self.client = APIClient()
+
+    def test_login_and_logout_write_no_session(self):
+        response = self.client.post('/api/users/login/', {'username': 'alice', 'password': 'secret-pass-123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        request = APIRequestFactory().post('/api/users/login/', {'username': 'alice', 'password': 'secret-pass-123'}, format='json')
+        self.assertIn('access', LoginView.as_view()(request).data)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.post('/api/users/logout/').status_code, 200)
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertNotIn('sessionid', self.client.cookies)
+
+    def test_browser_middleware_skips_api(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertNotIn('csrftoken', response.cookies)
+
+        # The admin keeps the full browser stack
+        response = self.client.get('/admin/login/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', response.cookies)
+        browser = Client(enforce_csrf_checks=True)
+        self.assertEqual(browser.post('/admin/login/', {'username': 'alice', 'password': 'x'}).status_code, 403)
+
+
+class CachedUserTests(TestCase):
+    """Tests for the cached JWT user resolver."""
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='alice', password='secret-pass-123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_queries_user_per_request_by_default(self):
+        self.client.get('/api/users/me/')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+
+    @override_settings(EVENTFLOW_AUTH_USER_CACHE_SECONDS=60)
+    def test_reuses_cached_user(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['username'], 'alice')
+        self.assertEqual(user_cache.hits, 1)
+
+    @override_settings(EVENTFLOW_AUTH_USER_CACHE_SECONDS=60)
+    def test_saving_user_drops_cached_entry(self):
+        self.client.get('/api/users/me/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    @override_settings(EVENTFLOW_AUTH_USER_CACHE_SECONDS=60)
+    def test_changes_from_other_workers_apply_after_expiry(self):
+        self.client.get('/api/users/me/')
+        # A queryset update sends no signal, as with a save made in another worker
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        with mock.patch('users.authentication.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
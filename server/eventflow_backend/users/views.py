@@ -2,7 +2,6 @@ from django.shortcuts import render
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth import login, logout
 from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
 from django.contrib.auth.models import User
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -41,11 +40,11 @@ class LoginView(APIView):
     def post(self, request):
         """
         Authenticates the user and returns JWT access and refresh tokens upon successful login.
+        The API is stateless: no session is created, the tokens are the only credentials.
         """
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data
-        login(request, user)
         refresh = RefreshToken.for_user(user)
         return Response({
             'refresh': str(refresh),
@@ -54,7 +53,7 @@ class LoginView(APIView):
 
 class LogoutView(APIView):
     """
-    API view for user logout, invalidating the user's session.
+    API view for user logout.
     Supports user logout requirements (US-13).
     """
     authentication_classes = [JWTAuthentication]
@@ -62,10 +61,10 @@ class LogoutView(APIView):
 
     def post(self, request):
         """
-        Logs out the authenticated user and invalidates their JWT token.
+        Confirms the logout of the authenticated user. Access tokens are stateless, so there is no
+        session to flush; the client logs out by discarding its tokens.
         """
         if request.user.is_authenticated:
-            logout(request)
             return Response({'detail': 'Logged out successfully.'}, status=status.HTTP_200_OK)
         return Response({'detail': 'Not authenticated.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,37 @@
+# Gunicorn settings for the backend container (run from /app: `gunicorn -c gunicorn.conf.py`).
+# GUNICORN_SERVER=asgi serves eventflow_backend.asgi under uvicorn workers, so the async event
+# endpoints (/api/async/events/...) do not block a worker while they wait on the database;
+# the default keeps the WSGI app under sync workers.
+import multiprocessing
+import os
+
+server = os.environ.get('GUNICORN_SERVER', 'wsgi')
+
+chdir = 'eventflow_backend'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+
+if server == 'asgi':
+    wsgi_app = 'eventflow_backend.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Persistent connections are per thread and leak under ASGI, so ASGI workers use a pool,
+    # sized for the threads that run the async views' database calls concurrently
+    os.environ.setdefault('DB_POOL', 'True')
+    os.environ.setdefault('DB_POOL_MAX_SIZE', '4')
+else:
+    wsgi_app = 'eventflow_backend.wsgi:application'
+    worker_class = 'sync'
+    # A sync worker handles one request at a time, so it never needs a second connection
+    os.environ.setdefault('DB_POOL_MAX_SIZE', '1')
+
+# Each worker starts its own recurrence expansion process pool on first use; share the CPUs
+# between the workers' pools rather than giving every worker one process per CPU
+os.environ.setdefault('EVENTFLOW_EXPANSION_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+def on_starting(arbiter):
+    """Logs the most database connections and expansion processes the workers can hold."""
+    per_worker = int(os.environ['DB_POOL_MAX_SIZE']) if os.environ.get('DB_POOL') == 'True' else 1
+    arbiter.log.info('Database connections: up to %d (%d workers x %d)', workers * per_worker, workers, per_worker)
+    expansion = int(os.environ['EVENTFLOW_EXPANSION_WORKERS'])
+    arbiter.log.info('Expansion processes: up to %d (%d workers x %d)', workers * expansion, workers, expansion)